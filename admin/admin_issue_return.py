@@ -1,10 +1,10 @@
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk
-from datetime import datetime
 from admin.styled_message_box import StyledMessageBox
-import os
-import pandas as pd
+from ui_monitor import timed_render
+from chunked_render import ChunkedRenderer
+from covers import LIST_SIZE
+from book_card import cover_label
 
 class AdminIssueReturn:
     def __init__(self, parent, admin_dashboard):
@@ -20,8 +20,58 @@ class AdminIssueReturn:
         self.ACCENT_GREEN = admin_dashboard.ACCENT_GREEN
         self.ACCENT_PURPLE = admin_dashboard.ACCENT_PURPLE
         
+        # Active-loan cards keyed by (user_email, book_id) for in-place updates
+        self.cards = {}
+        self.stat_labels = {}
+        
+        # Loan cards stream in a few per slice so large lists don't freeze the UI
+        self.renderer = ChunkedRenderer(parent, first=4)
+        self.empty_label = None
+        
+        events = self.db.events
+        events.subscribe('loan_changed', self.on_loan_changed, owner=parent)
+        events.subscribe('book_updated', self.on_book_updated, owner=parent)
+        events.subscribe('data_reloaded', self.on_data_reloaded, owner=parent)
+        
         self.show_issue_return_page()
     
+    # Hidden tabs ignore events: TabHost rebuilds them when shown again
+    
+    def on_loan_changed(self, user_email, book_id):
+        """Update one loan card (or add it, for a new loan) and the counters"""
+        if not self.parent.winfo_manager():
+            return
+        self.refresh_stats()
+        if (user_email, book_id) in self.cards:
+            self.refresh_card(user_email, book_id)
+            return
+        
+        book_data = self.db.get_borrowed_record(user_email, book_id)
+        if book_data is None or not self.matches_filter(book_data):
+            return
+        if self.renderer.pending or self.empty_label is not None:
+            self.display_borrowed_books()
+            return
+        # Newest first, like get_loan_records
+        first = self.books_frame.winfo_children()
+        card = self.create_book_card(self.books_frame, book_data)
+        if first:
+            card.pack_configure(before=first[0])
+    
+    def on_book_updated(self, book_id):
+        """Redraw the cards of an edited book"""
+        if not self.parent.winfo_manager():
+            return
+        for user_email, card_book_id in list(self.cards):
+            if card_book_id == book_id:
+                self.refresh_card(user_email, book_id)
+    
+    def on_data_reloaded(self, tables):
+        if self.parent.winfo_manager():
+            self.refresh_stats()
+            self.display_borrowed_books()
+    
+    @timed_render("Admin · Issue/Return")
     def show_issue_return_page(self):
         # Clear parent
         for widget in self.parent.winfo_children():
@@ -50,13 +100,14 @@ class AdminIssueReturn:
         stats = self.db.get_borrowed_stats()
         
         stats_data = [
-            ("📚", "Active Borrowed", stats['active_borrowed'], self.ACCENT_PURPLE),
-            ("⏳", "Pending Collection", stats['pending_collection'], "#fbbf24"),
-            ("✅", "Collected", stats['collected'], self.ACCENT_GREEN),
-            ("📥", "Returned", stats['returned'], "#64748b")
+            ("📚", "Active Borrowed", 'active_borrowed', self.ACCENT_PURPLE),
+            ("⏳", "Pending Collection", 'pending_collection', "#fbbf24"),
+            ("✅", "Collected", 'collected', self.ACCENT_GREEN),
+            ("📥", "Returned", 'returned', "#64748b")
         ]
         
-        for icon, label, value, color in stats_data:
+        self.stat_labels = {}
+        for icon, label, key, color in stats_data:
             stat_card = tk.Frame(stats_frame, bg=self.CARD_BG, 
                                highlightthickness=1, highlightbackground="#334155")
             stat_card.pack(side="left", expand=True, fill="both", padx=10)
@@ -69,13 +120,15 @@ class AdminIssueReturn:
                 bg=self.CARD_BG
             ).pack(pady=(15, 5))
             
-            tk.Label(
+            value_label = tk.Label(
                 stat_card,
-                text=str(value),
+                text=str(stats[key]),
                 font=("Helvetica", 22, "bold"),
                 fg=self.TEXT_FG,
                 bg=self.CARD_BG
-            ).pack()
+            )
+            value_label.pack()
+            self.stat_labels[key] = value_label
             
             tk.Label(
                 stat_card,
@@ -169,45 +222,46 @@ class AdminIssueReturn:
     def apply_filter(self):
         self.display_borrowed_books()
     
+    @timed_render("Admin · Issue/Return (filter)")
     def display_borrowed_books(self):
-        # Clear existing
+        # Clear existing (and drop any batches still queued for the old list)
+        self.renderer.cancel()
         for widget in self.books_frame.winfo_children():
             widget.destroy()
+        self.cards = {}
+        self.empty_label = None
         
-        # Get all borrowed books
-        borrowed_books = self.db.get_all_borrowed_books()
-        
-        # Apply filter
-        filter_value = self.filter_var.get()
-        
-        if filter_value == "pending":
-            borrowed_books = borrowed_books[
-                (borrowed_books['status'] == 'borrowed') & 
-                (borrowed_books['collected'] == False)
-            ]
-        elif filter_value == "collected":
-            borrowed_books = borrowed_books[
-                (borrowed_books['status'] == 'borrowed') & 
-                (borrowed_books['collected'] == True)
-            ]
-        elif filter_value == "returned":
-            borrowed_books = borrowed_books[borrowed_books['status'] == 'returned']
-        # 'all' shows everything
+        # Loans for the selected filter ('all' shows everything)
+        borrowed_books = self.db.get_loan_records(view=self.filter_var.get())
         
         if len(borrowed_books) == 0:
-            tk.Label(
+            self.empty_label = tk.Label(
                 self.books_frame,
                 text="📚 No books found in this category.",
                 font=("Helvetica", 16),
                 fg="#64748b",
                 bg=self.APP_BG,
                 justify="center"
-            ).pack(expand=True, pady=50)
+            )
+            self.empty_label.pack(expand=True, pady=50)
             return
         
         # Display books
-        for _, book_data in borrowed_books.iterrows():
-            self.create_book_card(self.books_frame, book_data)
+        self.renderer.start(
+            borrowed_books,
+            lambda book_data: self.create_book_card(self.books_frame, book_data)
+        )
+    
+    def matches_filter(self, book_data):
+        """Check whether a record belongs in the currently selected filter tab"""
+        filter_value = self.filter_var.get()
+        if filter_value == "pending":
+            return book_data.status == 'borrowed' and not book_data.collected
+        if filter_value == "collected":
+            return book_data.status == 'borrowed' and book_data.collected
+        if filter_value == "returned":
+            return book_data.status == 'returned'
+        return True
     
     def create_book_card(self, parent, book_data):
         # Card container
@@ -215,6 +269,13 @@ class AdminIssueReturn:
                        highlightbackground="#334155")
         card.pack(fill="both", expand=True, pady=15)
         
+        if book_data.status == 'borrowed':
+            self.cards[(book_data.user_email, book_data.book_id)] = card
+        
+        self.fill_book_card(card, book_data)
+        return card
+    
+    def fill_book_card(self, card, book_data):
         # Main content frame
         content_frame = tk.Frame(card, bg=self.CARD_BG)
         content_frame.pack(fill="both", expand=True, padx=20, pady=20)
@@ -223,32 +284,7 @@ class AdminIssueReturn:
         left_frame = tk.Frame(content_frame, bg=self.CARD_BG)
         left_frame.pack(side="left", padx=(0, 20))
         
-        try:
-            if pd.notna(book_data.get('image_path')) and os.path.exists(book_data['image_path']):
-                img = Image.open(book_data['image_path'])
-                img = img.resize((160, 220), Image.Resampling.LANCZOS)
-                photo = ImageTk.PhotoImage(img)
-                img_label = tk.Label(left_frame, image=photo, bg=self.CARD_BG)
-                img_label.image = photo
-                img_label.pack()
-            else:
-                tk.Label(
-                    left_frame,
-                    text="📚\nNo Image",
-                    font=("Helvetica", 12),
-                    fg="#64748b",
-                    bg=self.CARD_BG,
-                    justify="center"
-                ).pack()
-        except Exception:
-            tk.Label(
-                left_frame,
-                text="📚\nNo Image",
-                font=("Helvetica", 12),
-                fg="#64748b",
-                bg=self.CARD_BG,
-                justify="center"
-            ).pack()
+        cover_label(left_frame, self.db.images, book_data.cover, LIST_SIZE, self.CARD_BG).pack()
         
         # Right side - Book details
         right_frame = tk.Frame(content_frame, bg=self.CARD_BG)
@@ -257,7 +293,7 @@ class AdminIssueReturn:
         # Book title
         tk.Label(
             right_frame,
-            text=book_data['name'],
+            text=book_data.name,
             font=("Helvetica", 18, "bold"),
             fg=self.TEXT_FG,
             bg=self.CARD_BG,
@@ -267,7 +303,7 @@ class AdminIssueReturn:
         # Author
         tk.Label(
             right_frame,
-            text=f"by {book_data['author']}",
+            text=f"by {book_data.author}",
             font=("Helvetica", 12),
             fg="#94a3b8",
             bg=self.CARD_BG,
@@ -277,7 +313,7 @@ class AdminIssueReturn:
         # User info
         tk.Label(
             right_frame,
-            text=f"👤 Borrowed by: {book_data['user_name']} ({book_data['user_email']})",
+            text=f"👤 Borrowed by: {book_data.user_name} ({book_data.user_email})",
             font=("Helvetica", 11),
             fg="#cbd5e1",
             bg=self.CARD_BG,
@@ -288,11 +324,11 @@ class AdminIssueReturn:
         info_frame = tk.Frame(right_frame, bg=self.CARD_BG)
         info_frame.pack(fill="x")
         
-        status = book_data['status']
-        is_collected = book_data.get('collected', False)
+        status = book_data.status
+        is_collected = book_data.collected
         
         # Issue date
-        issue_date = datetime.fromisoformat(book_data['issue_date'])
+        issue_date = book_data.issue_date
         tk.Label(
             info_frame,
             text=f"📅 Issued: {issue_date.strftime('%d %B %Y, %I:%M %p')}",
@@ -313,8 +349,8 @@ class AdminIssueReturn:
                 anchor="w"
             ).pack(fill="x", pady=(10, 2))
             
-            if pd.notna(book_data.get('return_date')) and book_data.get('return_date'):
-                return_date = datetime.fromisoformat(book_data['return_date'])
+            if book_data.return_date is not None:
+                return_date = book_data.return_date
                 tk.Label(
                     info_frame,
                     text=f"📥 Returned on: {return_date.strftime('%d %B %Y, %I:%M %p')}",
@@ -335,8 +371,8 @@ class AdminIssueReturn:
                     anchor="w"
                 ).pack(fill="x", pady=(5, 2))
                 
-                if pd.notna(book_data.get('collection_date')) and book_data.get('collection_date'):
-                    col_date = datetime.fromisoformat(book_data['collection_date'])
+                if book_data.collection_date is not None:
+                    col_date = book_data.collection_date
                     tk.Label(
                         info_frame,
                         text=f"📍 Collected on: {col_date.strftime('%d %B %Y, %I:%M %p')}",
@@ -346,7 +382,7 @@ class AdminIssueReturn:
                         anchor="w"
                     ).pack(fill="x", pady=2)
             else:
-                collection_deadline = datetime.fromisoformat(book_data['collection_deadline'])
+                collection_deadline = book_data.collection_deadline
                 tk.Label(
                     info_frame,
                     text=f"⏳ Collect by: {collection_deadline.strftime('%d %B %Y')}",
@@ -357,13 +393,13 @@ class AdminIssueReturn:
                 ).pack(fill="x", pady=(5, 2))
             
             # Return deadline
-            return_deadline = datetime.fromisoformat(book_data['return_deadline'])
-            days_left = (return_deadline - datetime.now()).days
+            return_deadline = book_data.return_deadline
+            days_left = book_data.days_left
             deadline_color = "#ef4444" if days_left < 7 else self.ACCENT_GREEN
             
             tk.Label(
                 info_frame,
-                text=f"⏰ Return by: {return_deadline.strftime('%d %B %Y')} ({days_left} days left)",
+                text=f"⏰ Return by: {return_deadline.strftime('%d %B %Y')} ({book_data.due_text})",
                 font=("Helvetica", 10),
                 fg=deadline_color,
                 bg=self.CARD_BG,
@@ -412,23 +448,21 @@ class AdminIssueReturn:
         result = StyledMessageBox.ask_yes_no(
             self.parent,
             "Confirm Collection",
-            f"Mark '{book_data['name']}' as collected by {book_data['user_name']}?"
+            f"Mark '{book_data.name}' as collected by {book_data.user_name}?"
         )
         
         if result:
             success = self.db.mark_book_collected(
-                book_data['user_email'], 
-                book_data['book_id']
+                book_data.user_email, 
+                book_data.book_id
             )
             
             if success:
-                # Refresh the page first
-                self.show_issue_return_page()
-                # Show success message after refresh
+                # The loan_changed event updates just this card and the counters
                 self.admin_dashboard.root.after(100, lambda: StyledMessageBox.show_success(
                     self.parent,
                     "Success", 
-                    f"✅ '{book_data['name']}' marked as collected!\n\nUser: {book_data['user_name']}"
+                    f"✅ '{book_data.name}' marked as collected!\n\nUser: {book_data.user_name}"
                 ))
             else:
                 StyledMessageBox.show_error(self.parent, "Error", "Failed to update collection status!")
@@ -437,23 +471,49 @@ class AdminIssueReturn:
         result = StyledMessageBox.ask_yes_no(
             self.parent,
             "Confirm Return",
-            f"Mark '{book_data['name']}' as returned by {book_data['user_name']}?"
+            f"Mark '{book_data.name}' as returned by {book_data.user_name}?"
         )
         
         if result:
             success = self.db.mark_book_returned(
-                book_data['user_email'], 
-                book_data['book_id']
+                book_data.user_email, 
+                book_data.book_id
             )
             
             if success:
-                # Refresh the page first
-                self.show_issue_return_page()
-                # Show success message after refresh
+                # The loan_changed event updates just this card and the counters
                 self.admin_dashboard.root.after(100, lambda: StyledMessageBox.show_success(
                     self.parent,
                     "Success", 
-                    f"✅ '{book_data['name']}' has been returned!\n\nUser: {book_data['user_name']}\n\nThe book is now available in the library."
+                    f"✅ '{book_data.name}' has been returned!\n\nUser: {book_data.user_name}\n\nThe book is now available in the library."
                 ))
             else:
-                StyledMessageBox.show_error(self.parent, "Error", "Failed to update return status!")
\ No newline at end of file
+                StyledMessageBox.show_error(self.parent, "Error", "Failed to update return status!")
+    
+    def refresh_card(self, user_email, book_id):
+        """Re-render one loan card in place, or drop it if it left the current filter"""
+        card = self.cards.get((user_email, book_id))
+        if card is None or not card.winfo_exists():
+            return
+        
+        book_data = self.db.get_borrowed_record(user_email, book_id)
+        if book_data is None or not self.matches_filter(book_data):
+            card.destroy()
+            del self.cards[(user_email, book_id)]
+            if not self.books_frame.winfo_children() and not self.renderer.pending:
+                self.display_borrowed_books()
+            return
+        
+        if book_data.status != 'borrowed':
+            del self.cards[(user_email, book_id)]
+        
+        for widget in card.winfo_children():
+            widget.destroy()
+        self.fill_book_card(card, book_data)
+    
+    def refresh_stats(self):
+        """Update the stat counters without rebuilding the header"""
+        stats = self.db.get_borrowed_stats()
+        for key, label in self.stat_labels.items():
+            if label.winfo_exists():
+                label.config(text=str(stats[key]))
@@ -19,8 +19,23 @@ class AdminAnalytics:
         self.ACCENT_GREEN = admin_dashboard.ACCENT_GREEN
         self.ACCENT_PURPLE = admin_dashboard.ACCENT_PURPLE
         
+        # Every chart is an aggregate, so any change means a redraw; bursts are coalesced
+        self._redraw_id = None
+        for event in ('user_created', 'book_updated', 'loan_changed', 'data_reloaded'):
+            self.db.events.subscribe(event, self.schedule_redraw, owner=parent)
+        
         self.show_analytics_page()
     
+    def schedule_redraw(self, *args, delay_ms=1000):
+        # Hidden tabs are brought up to date by TabHost when shown again
+        if self._redraw_id is None and self.parent.winfo_manager():
+            self._redraw_id = self.parent.after(delay_ms, self._redraw)
+    
+    def _redraw(self):
+        self._redraw_id = None
+        if self.parent.winfo_manager():
+            self.show_analytics_page()
+    
     def show_analytics_page(self):
         # Clear parent
         for widget in self.parent.winfo_children():
@@ -1,9 +1,11 @@
 import tkinter as tk
 from tkinter import ttk, filedialog
-from PIL import Image, ImageTk
 from admin.styled_message_box import StyledMessageBox
+from ui_monitor import timed_render
+from tab_host import TabHost
+from book_card import BookCard
+from scroll_prefetch import ScrollPrefetcher
 import os
-import shutil
 
 
 class AdminDashboard:
@@ -15,7 +17,6 @@ class AdminDashboard:
         
         # Data files and directories
         self.books_file = os.path.join("admin", "books.json")
-        self.images_dir = os.path.join("admin", "book_images")
         
         # Initialize admin folder and files
         self.init_admin_data()
@@ -32,6 +33,9 @@ class AdminDashboard:
         # Track active nav button
         self.active_nav_button = None
         
+        # Library cards keyed by book_id for in-place updates
+        self.book_cards = {}
+        
         self.show_admin_dashboard()
     
     def init_admin_data(self):
@@ -71,8 +75,33 @@ class AdminDashboard:
         self.content_frame = tk.Frame(content_container, bg=self.APP_BG)
         self.content_frame.pack(fill="both", expand=True)
         
+        # Tabs stay alive while hidden and are rebuilt only when their tables change
+        self.tab_host = TabHost(self.content_frame, self.db, self.APP_BG)
+        self.library_frame = self.tab_host.add(
+            "library", lambda frame: self.show_book_management(), ("books",),
+            refresh=lambda page: self.show_book_management()
+        )
+        self.tab_host.add(
+            "members", self.create_members_page, ("users", "borrowed", "books"),
+            refresh=lambda page: page.show_members_page()
+        )
+        self.tab_host.add(
+            "issue_return", self.create_issue_return_page, ("borrowed", "books", "users"),
+            refresh=lambda page: page.show_issue_return_page()
+        )
+        self.tab_host.add(
+            "analytics", self.create_analytics_page, ("borrowed", "books", "users"),
+            refresh=lambda page: page.show_analytics_page()
+        )
+        
+        # Keep the library grid in step with changes made here and in other terminals
+        events = self.db.events
+        events.subscribe('book_updated', self.on_book_updated, owner=self.library_frame)
+        events.subscribe('loan_changed', self.on_loan_changed, owner=self.library_frame)
+        events.subscribe('data_reloaded', self.on_data_reloaded, owner=self.library_frame)
+        
         # Show Book Management by default
-        self.show_book_management()
+        self.show_library()
     
     
     def create_navbar(self, parent):
@@ -117,7 +146,7 @@ class AdminDashboard:
         nav_frame.pack(side="left", expand=True, padx=60)
         
         nav_items = [
-            ("📙", "Library", self.show_book_management),
+            ("📙", "Library", self.show_library),
             ("◉", "Members", self.show_member_management),
             ("⇄", "Issue/Return", self.show_issue_return),
             ("▣", "Analytics", self.show_reports)
@@ -194,7 +223,7 @@ class AdminDashboard:
             self.nav_buttons.append(btn)
         
         # Set Library (Books) as default active
-        self.set_active_nav(self.nav_buttons[0], self.show_book_management, initial=True)
+        self.set_active_nav(self.nav_buttons[0], self.show_library, initial=True)
         
         # Right side - User info and logout with modern styling
         right_frame = tk.Frame(navbar, bg=self.NAVBAR_BG)
@@ -282,30 +311,41 @@ class AdminDashboard:
         if not initial:
             command()
     
-    def clear_content(self):
-        for widget in self.content_frame.winfo_children():
-            widget.destroy()
+    @timed_render("Admin · Library")
+    def show_library(self):
+        self.tab_host.show("library")
     
+    @timed_render("Admin · Members")
     def show_member_management(self):
-        self.clear_content()
-        from admin.members import AdminMembers
-        AdminMembers(self.content_frame, self)  
+        self.tab_host.show("members")
     
+    @timed_render("Admin · Issue/Return")
     def show_issue_return(self):
-        self.clear_content()
-        from admin.admin_issue_return import AdminIssueReturn
-        AdminIssueReturn(self.content_frame, self)
+        self.tab_host.show("issue_return")
     
+    @timed_render("Admin · Analytics")
     def show_reports(self):
-        self.clear_content()
+        self.tab_host.show("analytics")
+    
+    def create_members_page(self, frame):
+        from admin.members import AdminMembers
+        return AdminMembers(frame, self)
+    
+    def create_issue_return_page(self, frame):
+        from admin.admin_issue_return import AdminIssueReturn
+        return AdminIssueReturn(frame, self)
+    
+    def create_analytics_page(self, frame):
         from admin.analysis import AdminAnalytics
-        AdminAnalytics(self.content_frame, self)
+        return AdminAnalytics(frame, self)
     
+    @timed_render("Admin · Library (rebuild)")
     def show_book_management(self):
-        self.clear_content()
+        for widget in self.library_frame.winfo_children():
+            widget.destroy()
         
         # Header
-        header_frame = tk.Frame(self.content_frame, bg=self.APP_BG)
+        header_frame = tk.Frame(self.library_frame, bg=self.APP_BG)
         header_frame.pack(fill="x", padx=40, pady=20)
         
         # Center the title
@@ -337,7 +377,7 @@ class AdminDashboard:
         add_btn.bind("<Leave>", lambda e: add_btn.config(bg=self.ACCENT_GREEN))
         
         # Search Bar
-        search_frame = tk.Frame(self.content_frame, bg=self.APP_BG)
+        search_frame = tk.Frame(self.library_frame, bg=self.APP_BG)
         search_frame.pack(fill="x", padx=40, pady=(0, 20))
         
         tk.Label(
@@ -387,7 +427,7 @@ class AdminDashboard:
 
         
         # Books Grid Container with Scrollbar
-        canvas_frame = tk.Frame(self.content_frame, bg=self.APP_BG)
+        canvas_frame = tk.Frame(self.library_frame, bg=self.APP_BG)
         canvas_frame.pack(fill="both", expand=True, padx=(40, 20), pady=(0, 20))
         
         canvas = tk.Canvas(canvas_frame, bg=self.APP_BG, highlightthickness=0)
@@ -406,7 +446,15 @@ class AdminDashboard:
             canvas.itemconfigure(self._books_window_id, width=event.width)
         canvas.bind("<Configure>", on_canvas_configure)
 
-        canvas.configure(yscrollcommand=scrollbar.set)
+        # Covers load as rows scroll near the viewport, the next ones prefetched
+        self.prefetcher = ScrollPrefetcher(
+            canvas, self.books_container, self.main_app.covers, BookCard.IMAGE_SIZE, columns=4
+        )
+        
+        def on_yscroll(first, last):
+            scrollbar.set(first, last)
+            self.prefetcher.on_scroll()
+        canvas.configure(yscrollcommand=on_yscroll)
         
         # Style scrollbar
         style = ttk.Style()
@@ -443,11 +491,15 @@ class AdminDashboard:
         
         # Load and display books
         self.display_books()
+        return self
    
+    @timed_render("Admin · Library (search)")
     def display_books(self, search_query=""):
         # Clear existing books
         for widget in self.books_container.winfo_children():
             widget.destroy()
+        self.book_cards = {}
+        self.prefetcher.reset()
         
         # If search query is the placeholder, treat it as empty
         if search_query == "Search by name, author or ID...":
@@ -473,7 +525,7 @@ class AdminDashboard:
         books = books_df.to_dict('records')
         
         # <CHANGE> display books in a responsive 4-column grid with equal spacing and full-width usage
-        cols = 4
+        cols = self.prefetcher.columns
         for c in range(cols):
             self.books_container.grid_columnconfigure(c, weight=1, uniform="bookcol")
 
@@ -482,121 +534,61 @@ class AdminDashboard:
             c = idx % cols
             cell = tk.Frame(self.books_container, bg=self.APP_BG)
             cell.grid(row=r, column=c, padx=20, pady=20, sticky="nsew")
-            self.create_book_card(cell, book)
+            self.prefetcher.add(idx, self.create_book_card(cell, book))
+        self.prefetcher.on_scroll()
 
     def create_book_card(self, parent, book):
-        # Container with fixed height
-        card_container = tk.Frame(parent, bg=self.APP_BG, height=450)
-        card_container.pack(fill="both", expand=True)
-        card_container.pack_propagate(False)
-        
-        # Use a Canvas to draw a rounded rectangle for the card
-        card_canvas = tk.Canvas(card_container, bg=self.APP_BG, highlightthickness=0)
-        card_canvas.pack(fill="both", expand=True)
-
-        # Store references to avoid garbage collection
-        card_canvas.images = []
-        
-        def redraw_card(event=None):
-            canvas = card_canvas
-            width = canvas.winfo_width()
-            height = 450  # Fixed height
-            canvas.delete("all")
-
-            # Draw the rounded card background
-            card_id = self.round_rectangle(canvas, 5, 5, width - 10, height - 5, radius=20, fill=self.CARD_BG, outline="#334155")
-
-            # Add hover effect
-            def on_hover_enter(e):
-                canvas.itemconfig(card_id, outline=self.ACCENT_PURPLE, width=2)
-            
-            def on_hover_leave(e):
-                canvas.itemconfig(card_id, outline="#334155", width=1)
-            
-            canvas.bind("<Enter>", on_hover_enter)
-            canvas.bind("<Leave>", on_hover_leave)
-
-            # --- Image ---
-            img_y_pos = 135
-            try:
-                if book.get('image_path') and os.path.exists(book['image_path']):
-                    img = Image.open(book['image_path'])
-                    # Fixed size for image
-                    img = img.resize((220, 230), Image.Resampling.LANCZOS)
-                    
-                    photo = ImageTk.PhotoImage(img)
-                    canvas.images.append(photo)  # Keep reference
-                    canvas.create_image(width / 2, img_y_pos, image=photo)
-                else:
-                    canvas.create_text(width / 2, img_y_pos, text="📚\nNo Image", font=("Helvetica", 16), fill="#64748b", justify="center")
-            except Exception:
-                canvas.create_text(width / 2, img_y_pos, text="📚\nNo Image", font=("Helvetica", 16), fill="#64748b", justify="center")
-
-            # --- Book Details ---
-            title_text = book['name'][:20] + "..." if len(book['name']) > 20 else book['name']
-            author_text = f"by {book['author'][:18]}..." if len(book['author']) > 18 else f"by {book['author']}"
-            
-            canvas.create_text(20, 280, text=title_text, anchor="nw", font=("Helvetica", 14, "bold"), fill=self.TEXT_FG)
-            canvas.create_text(20, 305, text=author_text, anchor="nw", font=("Helvetica", 11), fill="#94a3b8")
-            book_count = int(float(book.get('count', 0)))
-            count_text = f"📊 Available: {book_count}"
-            canvas.create_text(20, 330, text=count_text, anchor="nw", font=("Helvetica", 11, "bold"), fill=self.ACCENT_GREEN)
-
-            # --- Rounded Buttons ---
-            btn_width = (width - 50) / 2
-            btn_height = 38
-            btn_y = 380
-
-            self.create_rounded_button(
-                canvas, x=20, y=btn_y, width=btn_width, height=btn_height, radius=10,
-                text="✏️ Edit", text_color="white", 
-                bg_color=self.ACCENT_PURPLE, hover_color="#5568d3",
-                command=lambda b=book: self.edit_book(b)
-            )
-            
-            self.create_rounded_button(
-                canvas, x=30 + btn_width, y=btn_y, width=btn_width, height=btn_height, radius=10,
-                text="🗑️ Delete", text_color="white", 
-                bg_color="#ef4444", hover_color="#dc2626",
-                command=lambda b=book: self.delete_book(b)
-            )
-
-        card_canvas.bind("<Configure>", redraw_card)
-        # Initial draw
-        card_canvas.after(10, redraw_card)
-
-    def round_rectangle(self, canvas, x1, y1, x2, y2, radius=25, **kwargs):
-        """Draw a rounded rectangle on a canvas."""
-        points = [
-            x1 + radius, y1, x2 - radius, y1,
-            x2, y1, x2, y1 + radius,
-            x2, y2 - radius, x2, y2,
-            x2 - radius, y2, x1 + radius, y2,
-            x1, y2, x1, y2 - radius,
-            x1, y1 + radius, x1, y1
-        ]
-        return canvas.create_polygon(points, **kwargs, smooth=True)
-
-    def create_rounded_button(self, canvas, x, y, width, height, radius, text, text_color, bg_color, hover_color, command):
-        """Create a rounded button on a canvas with hover effects."""
-        button_shape = self.round_rectangle(canvas, x, y, x + width, y + height, radius=radius, fill=bg_color, outline="")
-        button_text = canvas.create_text(x + width / 2, y + height / 2, text=text, fill=text_color, font=("Helvetica", 10, "bold"))
-        
-        # Tags for binding
-        button_tag = f"button_{button_shape}"
-        canvas.addtag_withtag(button_tag, button_shape)
-        canvas.addtag_withtag(button_tag, button_text)
-
-        canvas.tag_bind(button_tag, "<Button-1>", lambda event: command())
-        
-        def on_enter(event):
-            canvas.itemconfig(button_shape, fill=hover_color)
+        card = BookCard(
+            parent, self.main_app.covers, bg=self.APP_BG, card_bg=self.CARD_BG,
+            text_fg=self.TEXT_FG, hover_outline=self.ACCENT_PURPLE, lazy=True
+        )
+        self.book_cards[book['id']] = {'book': book, 'card': card}
+        book_count = int(float(book.get('count', 0)))
+        card.set_book(book, detail=(f"📊 Available: {book_count}", self.ACCENT_GREEN))
+        card.set_button("edit", "✏️ Edit", self.ACCENT_PURPLE, "#5568d3",
+                        command=lambda b=book: self.edit_book(b))
+        card.set_button("delete", "🗑️ Delete", "#ef4444", "#dc2626",
+                        command=lambda b=book: self.delete_book(b))
+        return card
+
+    def refresh_book_card(self, book_id, book=None):
+        """Reload one book (unless given) and update only its card"""
+        entry = self.book_cards.get(book_id)
+        if entry is None or not entry['card'].canvas.winfo_exists():
+            return
         
-        def on_leave(event):
-            canvas.itemconfig(button_shape, fill=bg_color)
-            
-        canvas.tag_bind(button_tag, "<Enter>", on_enter)
-        canvas.tag_bind(button_tag, "<Leave>", on_leave)   
+        if book is None:
+            book = self.db.get_book_by_id(book_id)
+        if book is None:
+            return
+        # The card's Edit/Delete commands hold this dict, so update it in place
+        entry['book'].update(book.to_dict())
+        book_count = int(float(entry['book'].get('count', 0)))
+        entry['card'].set_book(entry['book'], detail=(f"📊 Available: {book_count}", self.ACCENT_GREEN))
+        # A new cover is painted if the card is in view
+        self.prefetcher.on_scroll()
+    
+    # Events are ignored while the Library tab is hidden: TabHost rebuilds it when shown again
+    
+    def on_book_updated(self, book_id):
+        if not self.library_frame.winfo_manager():
+            return
+        # One read, so a book deleted in between is not taken for an edit
+        book = self.db.get_book_by_id(book_id) if book_id in self.book_cards else None
+        if book is not None:
+            self.refresh_book_card(book_id, book)
+        else:
+            # Added or deleted: the grid itself changes
+            self.filter_books()
+    
+    def on_loan_changed(self, user_email, book_id):
+        # Borrowing and returning move the available count
+        if self.library_frame.winfo_manager():
+            self.refresh_book_card(book_id)
+    
+    def on_data_reloaded(self, tables):
+        if self.library_frame.winfo_manager():
+            self.filter_books()
 
     def filter_books(self):
         search_query = self.search_var.get()
@@ -749,24 +741,26 @@ class AdminDashboard:
                 StyledMessageBox.show_error(self.root, "Error", "Book ID and Count must be positive numbers!")
                 return
             
-            if self.db.get_book_by_id(book_id) is not None:
+            if self.db.book_id_exists(book_id):
                 StyledMessageBox.show_error(self.root, "Error", f"Book ID {book_id} already exists! Please use a unique ID.")
                 return
             
-            saved_image_path = None
+            cover = None
             if image_path["path"]:
                 try:
-                    ext = os.path.splitext(image_path["path"])[1]
-                    new_filename = f"book_{book_id}{ext}"
-                    saved_image_path = os.path.join(str(self.images_dir), new_filename)
-                    shutil.copy2(image_path["path"], saved_image_path)
-                except Exception as e:
+                    cover = self.db.images.put(image_path["path"])
+                except (ValueError, OSError) as e:
                     StyledMessageBox.show_warning(self.root, "Warning", f"Could not save image: {e}")
             
-            self.db.create_book_with_id(book_id, name, author, saved_image_path, count)
+            try:
+                self.db.create_book_with_id(book_id, name, author, cover, count)
+            except ValueError:
+                # Taken by another admin terminal since the check above
+                StyledMessageBox.show_error(self.root, "Error", f"Book ID {book_id} already exists! Please use a unique ID.")
+                return
             
+            # The book_updated event adds the card
             dialog.destroy()
-            self.show_book_management()
             self.root.after(100, lambda: StyledMessageBox.show_success(self.root, "Success", "Book added successfully!"))
         
         add_book_btn = tk.Button(
@@ -878,7 +872,7 @@ class AdminDashboard:
             bg=self.CARD_BG
         ).pack(anchor="w", pady=(15, 5))
         
-        image_path = {"path": book.get('image_path')}
+        image_path = {"path": None}
         
         def select_image():
             filename = filedialog.askopenfilename(
@@ -904,7 +898,7 @@ class AdminDashboard:
         )
         img_btn.pack(pady=10, padx=15)
         
-        current_img = os.path.basename(book.get('image_path', '')) if book.get('image_path') else "No image"
+        current_img = "Current cover kept" if book.get('cover') in self.db.images else "No image"
         img_label = tk.Label(
             form_frame,
             text=current_img,
@@ -944,18 +938,9 @@ class AdminDashboard:
             # Store book name before deletion
             book_name = book['name']
             
-            # Delete book and get image path
-            image_path = self.db.delete_book(book['id'])
-            
-            # Delete image file if exists
-            if image_path and os.path.exists(image_path):
-                try:
-                    os.remove(image_path)
-                except:
-                    pass
-            
-            # Refresh the book display first
-            self.show_book_management()
+            # Delete book (compaction removes its cover once no book uses it);
+            # the book_updated event removes its card
+            self.db.delete_book(book['id'])
             
             # Show success message after refresh
             self.root.after(100, lambda: StyledMessageBox.show_success(
@@ -986,64 +971,34 @@ class AdminDashboard:
         # Convert book['id'] to int for proper comparison
         old_id = int(book['id'])
         
+        # A new upload replaces the cover (None keeps it); covers are keyed by content,
+        # so a new ID needs no file changes
+        cover = None
+        if image_path["path"]:
+            try:
+                cover = self.db.images.put(image_path["path"])
+            except (ValueError, OSError) as e:
+                StyledMessageBox.show_warning(self.root, "Warning", f"Could not save image: {e}")
+        
         # Check if ID changed and if new ID already exists
         if new_id != old_id:
-            if self.db.get_book_by_id(new_id) is not None:
+            if self.db.book_id_exists(new_id):
                 StyledMessageBox.show_error(self.root, "Error", f"Book ID {new_id} already exists! Please use a unique ID.")
                 return
             
-            # Delete old book and create with new ID
-            old_image_path = book.get('image_path')
-            self.db.delete_book(old_id)
-            
-            # Handle image
-            final_image_path = None
-            if image_path["path"] and image_path["path"] != old_image_path:
-                try:
-                    ext = os.path.splitext(image_path["path"])[1]
-                    new_filename = f"book_{new_id}{ext}"
-                    final_image_path = os.path.join(str(self.images_dir), new_filename)
-                    shutil.copy2(image_path["path"], final_image_path)
-                except Exception as e:
-                    StyledMessageBox.show_warning(self.root, "Warning", f"Could not save image: {e}")
-                    final_image_path = old_image_path
-            elif old_image_path:
-                # Rename existing image file to match new ID
-                try:
-                    ext = os.path.splitext(old_image_path)[1]
-                    new_filename = f"book_{new_id}{ext}"
-                    final_image_path = os.path.join(str(self.images_dir), new_filename)
-                    if old_image_path != final_image_path:
-                        shutil.move(old_image_path, final_image_path)
-                    else:
-                        final_image_path = old_image_path
-                except Exception:
-                    final_image_path = old_image_path
-            
-            self.db.create_book_with_id(new_id, name, author, final_image_path, count)
+            # Re-key in place; cart and loan rows follow the book to its new ID
+            try:
+                self.db.rekey_book(old_id, new_id, name=name, author=author, cover=cover, count=count)
+            except ValueError:
+                # Taken by another admin terminal since the check above
+                StyledMessageBox.show_error(self.root, "Error", f"Book ID {new_id} already exists! Please use a unique ID.")
+                return
         else:
             # ID unchanged, just update
-            final_image_path = book.get('image_path')
-            if image_path["path"] and image_path["path"] != book.get('image_path'):
-                try:
-                    ext = os.path.splitext(image_path["path"])[1]
-                    new_filename = f"book_{old_id}{ext}"
-                    saved_image_path = os.path.join(str(self.images_dir), new_filename)
-                    shutil.copy2(image_path["path"], saved_image_path)
-                    final_image_path = saved_image_path
-                except Exception as e:
-                    StyledMessageBox.show_warning(self.root, "Warning", f"Could not save image: {e}")
-            
-            self.db.update_book(
-                old_id,
-                name=name,
-                author=author,
-                image_path=final_image_path,
-                count=count
-            )
+            self.db.update_book(old_id, name=name, author=author, cover=cover, count=count)
         
+        # The book_updated (or, for a new ID, data_reloaded) event redraws the grid
         dialog.destroy()
-        self.root.after(100, self.show_book_management)
         StyledMessageBox.show_success(self.root, "Success", "Book updated successfully!")
 
     def logout(self):
@@ -1,7 +1,7 @@
 import tkinter as tk
 from tkinter import ttk
-from datetime import datetime
-import pandas as pd
+from ui_monitor import timed_render
+from chunked_render import ChunkedRenderer
 
 class AdminMembers:
     def __init__(self, parent, admin_dashboard):
@@ -17,8 +17,40 @@ class AdminMembers:
         self.ACCENT_GREEN = admin_dashboard.ACCENT_GREEN
         self.ACCENT_PURPLE = admin_dashboard.ACCENT_PURPLE
         
+        # Member cards stream in a few rows per slice
+        self.renderer = ChunkedRenderer(parent, first=9)
+        
+        # Loan counters of each card keyed by email, for in-place updates
+        self.member_cards = {}
+        
+        events = self.db.events
+        events.subscribe('user_created', self.on_members_changed, owner=parent)
+        events.subscribe('data_reloaded', self.on_members_changed, owner=parent)
+        events.subscribe('loan_changed', self.on_loan_changed, owner=parent)
+        
         self.show_members_page()
     
+    def on_members_changed(self, *args):
+        # Hidden tabs are brought up to date by TabHost when shown again
+        if self.parent.winfo_manager():
+            self.filter_members()
+    
+    def on_loan_changed(self, user_email, book_id):
+        """Update the loan counters of one member card"""
+        entry = self.member_cards.get(user_email)
+        if entry is None or not self.parent.winfo_manager():
+            return
+        user, active_label, total_label = entry
+        if not active_label.winfo_exists():
+            return
+        member = self.db.get_member_record(user_email)
+        if member is None:
+            return
+        user.active_count = member.active_count
+        user.total_count = member.total_count
+        active_label.config(text=f"📚 Active: {user.active_count}")
+        total_label.config(text=f"📊 Total: {user.total_count}")
+    
     def show_members_page(self):
         # Clear parent
         for widget in self.parent.winfo_children():
@@ -137,10 +169,13 @@ class AdminMembers:
             search_query = ""
         self.display_members(search_query)
     
+    @timed_render("Admin · Members (search)")
     def display_members(self, search_query=""):
-        # Clear existing
+        # Clear existing (and drop any batches still queued for the old list)
+        self.renderer.cancel()
         for widget in self.members_container.winfo_children():
             widget.destroy()
+        self.member_cards = {}
         
         # Get all users (excluding admins)
         users_df = self.db.get_all_users()
@@ -156,44 +191,26 @@ class AdminMembers:
             ).grid(pady=50)
             return
         
-        # Get all borrowed books for filtering
-        borrowed_df = self.db.get_all_borrowed_books()
-        
         # Apply search filter
         if search_query:
             query_lower = search_query.lower()
             
-            # Get all borrowed books once for efficiency
-            all_borrows = self.db.get_all_borrowed_books()
+            # Match on name or email (as ID) ...
+            user_names = (users_df['first_name'] + ' ' + users_df['last_name']).str.lower()
+            matches = (
+                user_names.str.contains(query_lower, regex=False, na=False) |
+                users_df['email'].str.lower().str.contains(query_lower, regex=False, na=False)
+            )
             
-            # Filter users based on name or if they have a borrowed book matching the query
-            def user_matches(user):
-                # Check user name
-                user_name = f"{user['first_name']} {user['last_name']}".lower()
-                if query_lower in user_name:
-                    return True
-                
-                # Check user email (as ID)
-                if query_lower in user['email'].lower():
-                    return True
-                
-                # Check user's borrowed books
-                user_borrows = all_borrows[all_borrows['user_email'] == user['email']]
-                if not user_borrows.empty:
-                    # Check book name, author, or ID (as string)
-                    book_match = (
-                        user_borrows['name'].str.lower().str.contains(query_lower, na=False) |
-                        user_borrows['author'].str.lower().str.contains(query_lower, na=False) |
-                        user_borrows['book_id'].astype(str).str.contains(query_lower, na=False)
-                    )
-                    if book_match.any():
-                        return True
-                
-                return False
-
-            # Apply the filter function
-            matching_users_mask = users_df.apply(user_matches, axis=1)
-            users_df = users_df[matching_users_mask]
+            # ... or on any borrowed book's name, author or ID, checked once for all users
+            all_borrows = self.db.get_all_borrowed_books()
+            book_match = (
+                all_borrows['name'].str.lower().str.contains(query_lower, regex=False, na=False) |
+                all_borrows['author'].str.lower().str.contains(query_lower, regex=False, na=False) |
+                all_borrows['book_id'].astype(str).str.contains(query_lower, regex=False, na=False)
+            )
+            matches |= users_df['email'].isin(all_borrows.loc[book_match, 'user_email'])
+            users_df = users_df[matches]
         
         if len(users_df) == 0:
             tk.Label(
@@ -210,14 +227,20 @@ class AdminMembers:
         for c in range(cols):
             self.members_container.grid_columnconfigure(c, weight=1, uniform="membercol")
         
+        # Counts for every card come from a single pass over the loans table
+        members = self.db.get_member_records(users_df)
+        
         # Configure rows to not expand
-        for idx, (_, user) in enumerate(users_df.iterrows()):
+        def build(item):
+            idx, user = item
             r = idx // cols
             c = idx % cols
             self.members_container.grid_rowconfigure(r, weight=0)
             cell = tk.Frame(self.members_container, bg=self.APP_BG)
             cell.grid(row=r, column=c, padx=15, pady=15, sticky="new")
             self.create_member_card(cell, user)
+        
+        self.renderer.start(enumerate(members), build)
     
     def create_member_card(self, parent, user):
         # Card container
@@ -256,10 +279,9 @@ class AdminMembers:
         icon_label.bind("<Button-1>", on_click)
         
         # User name
-        user_name = f"{user['first_name']} {user['last_name']}"
         name_label = tk.Label(
             content,
-            text=user_name,
+            text=user.full_name,
             font=("Helvetica", 16, "bold"),
             fg=self.TEXT_FG,
             bg=self.CARD_BG,
@@ -271,7 +293,7 @@ class AdminMembers:
         # Email
         email_label = tk.Label(
             content,
-            text=user['email'],
+            text=user.email,
             font=("Helvetica", 10),
             fg="#94a3b8",
             bg=self.CARD_BG,
@@ -280,13 +302,6 @@ class AdminMembers:
         email_label.pack(pady=(5, 15))
         email_label.bind("<Button-1>", on_click)
         
-        # Get borrow statistics
-        borrowed_df = self.db.get_all_borrowed_books()
-        user_borrows = borrowed_df[borrowed_df['user_email'] == user['email']]
-        
-        active_count = len(user_borrows[user_borrows['status'] == 'borrowed'])
-        total_count = len(user_borrows)
-        
         # Stats
         stats_frame = tk.Frame(content, bg=self.CARD_BG, cursor="hand2")
         stats_frame.pack(fill="x")
@@ -294,7 +309,7 @@ class AdminMembers:
         
         active_label = tk.Label(
             stats_frame,
-            text=f"📚 Active: {active_count}",
+            text=f"📚 Active: {user.active_count}",
             font=("Helvetica", 11),
             fg=self.ACCENT_PURPLE,
             bg=self.CARD_BG,
@@ -305,7 +320,7 @@ class AdminMembers:
         
         total_label = tk.Label(
             stats_frame,
-            text=f"📊 Total: {total_count}",
+            text=f"📊 Total: {user.total_count}",
             font=("Helvetica", 11),
             fg="#64748b",
             bg=self.CARD_BG,
@@ -313,6 +328,7 @@ class AdminMembers:
         )
         total_label.pack(side="left", expand=True)
         total_label.bind("<Button-1>", on_click)
+        self.member_cards[user.email] = (user, active_label, total_label)
         
         # Click to view details
         details_label = tk.Label(
@@ -326,6 +342,7 @@ class AdminMembers:
         details_label.pack(pady=(10, 0))
         details_label.bind("<Button-1>", on_click)
     
+    @timed_render("Admin · Member details")
     def show_member_details(self, user):
         # Create detailed view dialog
         dialog = tk.Toplevel(self.admin_dashboard.root)
@@ -359,10 +376,9 @@ class AdminMembers:
         info_frame = tk.Frame(content, bg=self.CARD_BG)
         info_frame.pack(side="left")
         
-        user_name = f"{user['first_name']} {user['last_name']}"
         tk.Label(
             info_frame,
-            text=user_name,
+            text=user.full_name,
             font=("Helvetica", 24, "bold"),
             fg=self.TEXT_FG,
             bg=self.CARD_BG
@@ -370,7 +386,7 @@ class AdminMembers:
         
         tk.Label(
             info_frame,
-            text=user['email'],
+            text=user.email,
             font=("Helvetica", 12),
             fg="#94a3b8",
             bg=self.CARD_BG
@@ -429,10 +445,8 @@ class AdminMembers:
 
         dialog.protocol("WM_DELETE_WINDOW", on_dialog_close)
         
-        # Get user's borrowing records
-        borrowed_df = self.db.get_all_borrowed_books()
-        user_records = borrowed_df[borrowed_df['user_email'] == user['email']]
-        user_records = user_records.sort_values('issue_date', ascending=False)
+        # Get user's borrowing records (most recent first)
+        user_records = self.db.get_loan_records(user_email=user.email)
         
         if len(user_records) == 0:
             tk.Label(
@@ -443,7 +457,7 @@ class AdminMembers:
                 bg=self.APP_BG
             ).pack(pady=50)
         else:
-            for _, record in user_records.iterrows():
+            for record in user_records:
                 self.create_record_card(records_frame, record)
     
     def create_record_card(self, parent, record):
@@ -465,7 +479,7 @@ class AdminMembers:
         
         tk.Label(
             info_frame,
-            text=record['name'],
+            text=record.name,
             font=("Helvetica", 14, "bold"),
             fg=self.TEXT_FG,
             bg=self.CARD_BG,
@@ -474,7 +488,7 @@ class AdminMembers:
         
         tk.Label(
             info_frame,
-            text=f"by {record['author']}",
+            text=f"by {record.author}",
             font=("Helvetica", 11),
             fg="#94a3b8",
             bg=self.CARD_BG,
@@ -485,8 +499,8 @@ class AdminMembers:
         status_frame = tk.Frame(top_frame, bg=self.CARD_BG)
         status_frame.pack(side="right")
         
-        status = record['status']
-        is_collected = record.get('collected', False)
+        status = record.status
+        is_collected = record.collected
         
         if status == 'returned':
             status_text = "✅ RETURNED"
@@ -511,7 +525,7 @@ class AdminMembers:
         dates_frame = tk.Frame(content, bg=self.CARD_BG)
         dates_frame.pack(fill="x", pady=(10, 0))
         
-        issue_date = datetime.fromisoformat(record['issue_date'])
+        issue_date = record.issue_date
         tk.Label(
             dates_frame,
             text=f"📅 Issued: {issue_date.strftime('%d %b %Y, %I:%M %p')}",
@@ -520,8 +534,8 @@ class AdminMembers:
             bg=self.CARD_BG
         ).pack(side="left", padx=(0, 20))
         
-        if status == 'returned' and pd.notna(record.get('return_date')) and record.get('return_date'):
-            return_date = datetime.fromisoformat(record['return_date'])
+        if status == 'returned' and record.return_date is not None:
+            return_date = record.return_date
             tk.Label(
                 dates_frame,
                 text=f"📥 Returned: {return_date.strftime('%d %b %Y, %I:%M %p')}",
@@ -530,13 +544,13 @@ class AdminMembers:
                 bg=self.CARD_BG
             ).pack(side="left")
         elif status == 'borrowed':
-            return_deadline = datetime.fromisoformat(record['return_deadline'])
-            days_left = (return_deadline - datetime.now()).days
+            return_deadline = record.return_deadline
+            days_left = record.days_left
             deadline_color = "#ef4444" if days_left < 7 else self.ACCENT_GREEN
             
             tk.Label(
                 dates_frame,
-                text=f"⏰ Return by: {return_deadline.strftime('%d %b %Y')} ({days_left} days left)",
+                text=f"⏰ Return by: {return_deadline.strftime('%d %b %Y')} ({record.due_text})",
                 font=("Helvetica", 9),
                 fg=deadline_color,
                 bg=self.CARD_BG
@@ -0,0 +1,239 @@
+import tkinter as tk
+from PIL import ImageTk
+from covers import GRID_SIZE, preview_image
+
+
+def rounded_points(x1, y1, x2, y2, radius):
+    """Polygon points for a smoothed rounded rectangle"""
+    return [
+        x1 + radius, y1, x2 - radius, y1,
+        x2, y1, x2, y1 + radius,
+        x2, y2 - radius, x2, y2,
+        x2 - radius, y2, x1 + radius, y2,
+        x1, y2, x1, y2 - radius,
+        x1, y1 + radius, x1, y1
+    ]
+
+
+def cover_label(parent, images, cover, size, bg):
+    """Label showing a cover at size, or a No Image placeholder; pack it yourself.
+
+    The label holds the only reference to its PhotoImage, so the bitmap goes
+    away with the label.
+    """
+    try:
+        img = images.load(cover, size)
+    except Exception:
+        img = None
+    if img is None:
+        return tk.Label(
+            parent, text="📚\nNo Image", font=("Helvetica", 12), fg="#64748b", bg=bg, justify="center"
+        )
+    photo = ImageTk.PhotoImage(img)
+    label = tk.Label(parent, image=photo, bg=bg)
+    label.image = photo
+    return label
+
+
+class BookCard:
+    """Retained-mode book card drawn on a Canvas.
+
+    Every canvas item and binding is created once. Resizing only moves the
+    width-dependent items with canvas.coords, and set_book()/set_button()
+    restyle existing items with itemconfig instead of redrawing the card.
+    """
+
+    HEIGHT = 450
+    IMAGE_SIZE = GRID_SIZE
+    BORDER = "#334155"
+
+    def __init__(self, parent, covers, bg, card_bg, text_fg, hover_outline, button_y=380, lazy=False):
+        self.covers = covers
+        self.lazy = lazy
+        self.text_fg = text_fg
+        self.hover_outline = hover_outline
+        self.button_y = button_y
+        self.width = 0
+
+        # Container with fixed height
+        self.container = tk.Frame(parent, bg=bg, height=self.HEIGHT)
+        self.container.pack(fill="both", expand=True)
+        self.container.pack_propagate(False)
+
+        self.canvas = tk.Canvas(self.container, bg=bg, highlightthickness=0)
+        self.canvas.pack(fill="both", expand=True)
+
+        # Single cover slot, released when the card goes away
+        self.photo = None
+        self.image_source = None
+        self.image_preview = None
+        # None (nothing painted), "preview" (decode requested) or "full"
+        self.cover_state = None
+
+        # Buttons in display order: name -> item ids, colours and command
+        self.buttons = {}
+
+        canvas = self.canvas
+        self.card_item = canvas.create_polygon(
+            rounded_points(5, 5, 20, self.HEIGHT - 5, 20),
+            smooth=True, fill=card_bg, outline=self.BORDER
+        )
+        self.image_item = canvas.create_image(0, 135, state="hidden")
+        self.no_image_item = canvas.create_text(
+            0, 135, text="📚\nNo Image", font=("Helvetica", 16), fill="#64748b", justify="center"
+        )
+        self.title_item = canvas.create_text(20, 280, anchor="nw", font=("Helvetica", 14, "bold"), fill=text_fg)
+        self.author_item = canvas.create_text(20, 305, anchor="nw", font=("Helvetica", 11), fill="#94a3b8")
+        self.detail_item = canvas.create_text(20, 330, anchor="nw", font=("Helvetica", 11, "bold"), state="hidden")
+
+        canvas.bind("<Enter>", self._on_card_enter)
+        canvas.bind("<Leave>", self._on_card_leave)
+        canvas.bind("<Configure>", self._on_configure)
+        canvas.bind("<Destroy>", self._on_destroy)
+
+    # ==================== CONTENT ====================
+
+    def set_book(self, book, detail=None):
+        """Show a book's cover, title and author; detail is an optional (text, colour) line"""
+        name = book['name']
+        author = book['author']
+        title_text = name[:20] + "..." if len(name) > 20 else name
+        author_text = f"by {author[:18]}..." if len(author) > 18 else f"by {author}"
+        self.canvas.itemconfig(self.title_item, text=title_text)
+        self.canvas.itemconfig(self.author_item, text=author_text)
+
+        if detail is None:
+            self.canvas.itemconfig(self.detail_item, state="hidden")
+        else:
+            text, color = detail
+            self.canvas.itemconfig(self.detail_item, text=text, fill=color, state="normal")
+
+        self.set_image(book.get('cover'), book.get('cover_preview'))
+
+    def set_image(self, cover, preview=None):
+        """Show a cover, only when its key changes; one live image per card.
+
+        The stored preview is painted at once and the decoded cover, loaded
+        off the Tk thread, replaces it when ready. Lazy cards leave both to
+        load_cover(), called by their grid once they scroll near the viewport.
+        """
+        if not isinstance(cover, str) or not cover:
+            cover = None
+        if cover == self.image_source:
+            return
+        self.image_source = cover
+        self.image_preview = preview
+        self.cover_state = None
+        if cover is None:
+            self._show(None)
+        elif self.lazy:
+            self._show(None, placeholder=False)
+        else:
+            self.load_cover()
+
+    def load_cover(self):
+        """Paint the cover, or its preview until it is decoded; no-op once requested"""
+        cover = self.image_source
+        if cover is None or self.cover_state is not None:
+            return
+        img = self.covers.cached(cover, self.IMAGE_SIZE)
+        if img is not None:
+            self.cover_state = "full"
+            self._show(img)
+            return
+        self.cover_state = "preview"
+        self._show(preview_image(self.image_preview, self.IMAGE_SIZE))
+        self.covers.request(cover, self.IMAGE_SIZE, lambda img, c=cover: self._on_cover_loaded(c, img))
+
+    def release_cover(self):
+        """Drop the cover image of a card scrolled far away; load_cover() paints it again"""
+        if self.image_source is None or self.cover_state is None:
+            return
+        self.cover_state = None
+        self._show(None, placeholder=False)
+
+    def _on_cover_loaded(self, cover, img):
+        # The card may have moved on to another book, been released, or gone, meanwhile
+        if cover == self.image_source and self.cover_state == "preview" and self.canvas.winfo_exists():
+            self.cover_state = "full"
+            self._show(img)
+
+    def _show(self, img, placeholder=True):
+        self.photo = ImageTk.PhotoImage(img) if img is not None else None
+        if self.photo is not None:
+            self.canvas.itemconfig(self.image_item, image=self.photo, state="normal")
+            self.canvas.itemconfig(self.no_image_item, state="hidden")
+        else:
+            self.canvas.itemconfig(self.image_item, image="", state="hidden")
+            self.canvas.itemconfig(self.no_image_item, state="normal" if placeholder else "hidden")
+
+    def set_button(self, name, text, bg_color, hover_color, command=None):
+        """Create or restyle a rounded button; command=None leaves it inert"""
+        button = self.buttons.get(name)
+        if button is None:
+            tag = f"button_{name}"
+            shape = self.canvas.create_polygon(rounded_points(0, 0, 20, 20, 10), smooth=True, outline="", tags=(tag,))
+            label = self.canvas.create_text(
+                0, 0, fill="white", font=("Helvetica", 10, "bold"), tags=(tag,)
+            )
+            button = self.buttons[name] = {'shape': shape, 'text': label, 'hover': False}
+            # Handlers look the button up at event time, so they are bound only once
+            self.canvas.tag_bind(tag, "<Button-1>", lambda e, n=name: self._on_button_click(n))
+            self.canvas.tag_bind(tag, "<Enter>", lambda e, n=name: self._on_button_hover(n, True))
+            self.canvas.tag_bind(tag, "<Leave>", lambda e, n=name: self._on_button_hover(n, False))
+            self._layout()
+
+        button.update(bg=bg_color, hover_color=hover_color, command=command)
+        self.canvas.itemconfig(button['text'], text=text)
+        self.canvas.itemconfig(button['shape'], fill=hover_color if button['hover'] else bg_color)
+
+    # ==================== LAYOUT ====================
+
+    def _layout(self):
+        width = self.width
+        if width <= 1:
+            return
+        canvas = self.canvas
+        canvas.coords(self.card_item, *rounded_points(5, 5, width - 10, self.HEIGHT - 5, 20))
+        canvas.coords(self.image_item, width / 2, 135)
+        canvas.coords(self.no_image_item, width / 2, 135)
+
+        # Buttons share the row equally with 10px gaps
+        count = len(self.buttons)
+        if not count:
+            return
+        btn_height = 38
+        btn_width = (width - 40 - 10 * (count - 1)) / count
+        for index, button in enumerate(self.buttons.values()):
+            x = 20 + index * (btn_width + 10)
+            canvas.coords(button['shape'], *rounded_points(x, self.button_y, x + btn_width, self.button_y + btn_height, 10))
+            canvas.coords(button['text'], x + btn_width / 2, self.button_y + btn_height / 2)
+
+    # ==================== EVENTS ====================
+
+    def _on_configure(self, event):
+        if event.width != self.width:
+            self.width = event.width
+            self._layout()
+
+    def _on_card_enter(self, event):
+        self.canvas.itemconfig(self.card_item, outline=self.hover_outline, width=2)
+
+    def _on_card_leave(self, event):
+        self.canvas.itemconfig(self.card_item, outline=self.BORDER, width=1)
+
+    def _on_button_hover(self, name, inside):
+        button = self.buttons[name]
+        button['hover'] = inside
+        self.canvas.itemconfig(button['shape'], fill=button['hover_color'] if inside else button['bg'])
+
+    def _on_button_click(self, name):
+        command = self.buttons[name]['command']
+        if command is not None:
+            command()
+
+    def _on_destroy(self, event):
+        # <Destroy> also fires for child widgets; only react to the canvas itself
+        if event.widget is self.canvas:
+            self.photo = None
+            self.image_source = None
@@ -0,0 +1,109 @@
+import time
+
+
+class ChunkedRenderer:
+    """Builds a long list of widgets in time-sliced batches on the Tk event loop.
+
+    The first screenful is built synchronously so the page never paints
+    empty; the rest is built in slices of at most budget_ms, each scheduled
+    with after() so input and redraw events are handled in between.
+    start() replaces any run in progress, suspend()/resume() park a run
+    while its page is hidden.
+    """
+
+    def __init__(self, widget, budget_ms=8, first=8):
+        self.widget = widget
+        self.budget = budget_ms / 1000
+        self.first = first
+        self.generation = 0
+        self._items = None
+        self._build = None
+        self._done = None
+        self._after_id = None
+        self._suspended = False
+
+    @property
+    def pending(self):
+        """True while items are still waiting to be built"""
+        return self._items is not None
+
+    def start(self, items, build, done=None):
+        """Build build(item) for every item; done() runs after the last one"""
+        self.cancel()
+        self._items = iter(items)
+        self._build = build
+        self._done = done
+
+        # First screenful now, so the page paints with content
+        generation = self.generation
+        for _ in range(self.first):
+            if not self._build_next():
+                return
+        if generation == self.generation and not self._suspended:
+            # Let the first screenful lay out and paint before the next slice
+            self._after_id = self.widget.after_idle(self._schedule)
+
+    def cancel(self):
+        """Drop the current run; already scheduled slices become no-ops"""
+        self.generation += 1
+        self._unschedule()
+        self._items = None
+        self._build = None
+        self._done = None
+        self._suspended = False
+
+    def suspend(self):
+        """Stop building until resume(), e.g. while the page's tab is hidden"""
+        self._suspended = True
+        self._unschedule()
+
+    def resume(self):
+        if not self._suspended:
+            return
+        self._suspended = False
+        if self.pending:
+            self._schedule()
+
+    def _unschedule(self):
+        if self._after_id is not None:
+            try:
+                self.widget.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+
+    def _schedule(self):
+        generation = self.generation
+        self._after_id = self.widget.after(1, lambda: self._slice(generation))
+
+    def _slice(self, generation):
+        self._after_id = None
+        if generation != self.generation or self._suspended:
+            return
+        if not self.widget.winfo_exists():
+            self.cancel()
+            return
+
+        deadline = time.perf_counter() + self.budget
+        while time.perf_counter() < deadline:
+            if not self._build_next():
+                return
+            if generation != self.generation:
+                # build() started a new run or cancelled this one
+                return
+        self._schedule()
+
+    def _build_next(self):
+        """Build one item; returns False once the list is exhausted"""
+        try:
+            item = next(self._items)
+        except StopIteration:
+            done = self._done
+            self._items = None
+            self._build = None
+            self._done = None
+            if done is not None:
+                done()
+            return False
+        self._build(item)
+        return True
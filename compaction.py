@@ -0,0 +1,71 @@
+"""Compaction and vacuum for the LibraEase data directory.
+
+Drops orphaned cart rows, removes duplicate rows, rewrites every table in
+index-friendly sort order as a fresh checkpoint (emptying the journal),
+deletes cover blobs no book references and clears temp files left by
+crashed terminals. It is safe to run while the
+app is open; terminals pick the new files up on their next read.
+
+    python compaction.py
+    python compaction.py --every 30
+
+The app also runs it in the background every LIBRAEASE_COMPACT_MINUTES
+(default 30, 0 turns it off).
+"""
+import sys
+import time
+import argparse
+import threading
+import traceback
+
+
+class CompactionThread(threading.Thread):
+    """Runs db.compact() every interval seconds until stop()"""
+
+    def __init__(self, db, interval):
+        super().__init__(name="compaction", daemon=True)
+        self.db = db
+        self.interval = interval
+        self.last_result = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.last_result = self.db.compact()
+            except Exception:
+                # Keep the job alive; the next pass starts from fresh tables
+                traceback.print_exc()
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def format_result(result):
+    if result is None:
+        return "tables kept changing during compaction; nothing swapped, try again later"
+    lines = [f"{name:<12}{removed:>8} rows removed" for name, removed in sorted(result.items()) if name != 'covers']
+    lines.append(f"{'covers':<12}{result.get('covers', 0):>8} unreferenced covers removed")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact the LibraEase data directory (run from the app folder)")
+    parser.add_argument("--every", type=float, default=0.0, help="repeat every N minutes instead of running once")
+    args = parser.parse_args()
+
+    from database import DatabaseManager
+    db = DatabaseManager()
+
+    while True:
+        started = time.perf_counter()
+        result = db.compact()
+        print(format_result(result))
+        print(f"compaction took {time.perf_counter() - started:.2f}s", file=sys.stderr)
+        if not args.every:
+            return 0 if result is not None else 1
+        time.sleep(args.every * 60)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+import heapq
+import queue
+import itertools
+import threading
+from collections import OrderedDict
+
+
+# Priorities of queued decodes: covers a card is waiting for come first
+REQUEST = 0
+PREFETCH = 1
+
+# Decoded covers kept for cards scrolled back into view (a grid cover is ~150 KB)
+CACHE_BYTES = 32 * 2**20
+
+
+class CoverLoader:
+    """Decodes cover renditions on worker threads and hands them to the Tk thread.
+
+    Cards paint their placeholder at once and call request(); the decoded
+    PIL image comes back through the callback on the Tk event loop, where
+    the card turns it into a PhotoImage (Tk objects must not be created on
+    other threads). Identical requests in flight share one decode.
+
+    Decoded images stay in an LRU cache bounded to cache_bytes, which
+    prefetch() fills ahead of scrolling; requests always jump the queue
+    of pending prefetches.
+    """
+
+    POLL_MS = 15
+
+    def __init__(self, root, images, workers=2, cache_bytes=CACHE_BYTES):
+        self.root = root
+        self.images = images
+        self.cache_bytes = cache_bytes
+        self._done = queue.SimpleQueue()
+        self._after_id = None
+
+        # Tk thread only
+        self._waiting = {}  # (key, size) -> callbacks
+        self._pending = set()  # jobs queued or being decoded
+        self._cache = OrderedDict()  # (key, size) -> image, least recently used first
+        self._cached_bytes = 0
+
+        # Shared with the workers, under _cond
+        self._cond = threading.Condition()
+        self._heap = []  # (priority, seq, job); entries no longer in _queued are skipped
+        self._queued = {}  # job -> priority
+        self._seq = itertools.count()
+
+        for number in range(workers):
+            threading.Thread(target=self._work, name=f"cover-{number}", daemon=True).start()
+
+    # ==================== REQUESTS ====================
+
+    def cached(self, key, size):
+        """The decoded cover if it is in the cache, else None"""
+        job = (key, tuple(size))
+        img = self._cache.get(job)
+        if img is not None:
+            self._cache.move_to_end(job)
+        return img
+
+    def request(self, key, size, callback):
+        """Decode key at size; callback(image) runs on the Tk thread, or never if there is no such cover"""
+        job = (key, tuple(size))
+        img = self.cached(key, size)
+        if img is not None:
+            callback(img)
+            return
+        self._waiting.setdefault(job, []).append(callback)
+        if job not in self._pending:
+            self._pending.add(job)
+            self._enqueue(job, REQUEST)
+        else:
+            # Possibly still queued as a prefetch: move it to the front
+            with self._cond:
+                if self._queued.get(job) == PREFETCH:
+                    self._push(job, REQUEST)
+        self._schedule()
+
+    def prefetch(self, keys, size):
+        """Decode covers into the cache ahead of need, nearest first.
+
+        Replaces the previous prefetch list: queued prefetches not in keys
+        are dropped, and only as many are queued as the cache can hold
+        alongside the covers on screen.
+        """
+        size = tuple(size)
+        jobs = []
+        for key in keys:
+            job = (key, size)
+            if job not in self._cache and job not in jobs:
+                jobs.append(job)
+        del jobs[self.prefetch_limit(size):]
+        wanted = set(jobs)
+
+        with self._cond:
+            for job, priority in list(self._queued.items()):
+                if priority == PREFETCH and job not in wanted:
+                    del self._queued[job]
+                    self._pending.discard(job)
+            if not self._queued:
+                self._heap.clear()
+            for job in jobs:
+                if job not in self._pending:
+                    self._pending.add(job)
+                    self._push(job, PREFETCH)
+            self._cond.notify_all()
+        if self._pending:
+            self._schedule()
+
+    def prefetch_limit(self, size):
+        """How many covers of size one prefetch may queue: half the cache"""
+        return max(1, self.cache_bytes // 2 // (size[0] * size[1] * 3))
+
+    # ==================== WORKERS ====================
+
+    def _enqueue(self, job, priority):
+        with self._cond:
+            self._push(job, priority)
+            self._cond.notify()
+
+    def _push(self, job, priority):
+        # Callers hold self._cond
+        self._queued[job] = priority
+        heapq.heappush(self._heap, (priority, next(self._seq), job))
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while True:
+                    while not self._heap:
+                        self._cond.wait()
+                    priority, _, job = heapq.heappop(self._heap)
+                    # Skip entries that were cancelled or re-queued at a higher priority
+                    if self._queued.get(job) == priority:
+                        del self._queued[job]
+                        break
+            self._done.put((job, self._decode(job)))
+
+    def _decode(self, job):
+        try:
+            img = self.images.load(*job)
+            if img is not None:
+                img.load()
+            return img
+        except Exception:
+            # Unreadable file: the card keeps its placeholder
+            return None
+
+    # ==================== DELIVERY ====================
+
+    def _schedule(self):
+        if self._after_id is None:
+            self._after_id = self.root.after(self.POLL_MS, self._deliver)
+
+    def _deliver(self):
+        self._after_id = None
+        while True:
+            try:
+                job, img = self._done.get_nowait()
+            except queue.Empty:
+                break
+            self._pending.discard(job)
+            callbacks = self._waiting.pop(job, ())
+            if img is None:
+                continue
+            self._remember(job, img)
+            for callback in callbacks:
+                try:
+                    callback(img)
+                except Exception as e:
+                    self.root.report_callback_exception(type(e), e, e.__traceback__)
+        if self._pending:
+            self._schedule()
+
+    def _remember(self, job, img):
+        if job in self._cache:
+            return
+        self._cache[job] = img
+        self._cached_bytes += _size_of(img)
+        while self._cached_bytes > self.cache_bytes and len(self._cache) > 1:
+            _, old = self._cache.popitem(last=False)
+            self._cached_bytes -= _size_of(old)
+
+
+def _size_of(img):
+    return img.width * img.height * len(img.getbands())
@@ -0,0 +1,263 @@
+import io
+import os
+import base64
+import time
+import hashlib
+import threading
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+
+# Stored covers are JPEG masters capped at this size (aspect ratio kept)
+MASTER_MAX = (1200, 1200)
+JPEG_QUALITY = 85
+
+# Card sizes the UI draws covers at: catalogue grid (BookCard) and loan lists
+GRID_SIZE = (220, 230)
+LIST_SIZE = (160, 220)
+RENDITION_SIZES = (GRID_SIZE, LIST_SIZE)
+
+# Uploads beyond these are rejected rather than decoded
+MAX_SOURCE_BYTES = 50 * 2**20
+MAX_SOURCE_PIXELS = 60_000_000
+
+# Transparent covers are flattened onto the card background
+BACKGROUND = (30, 41, 59)
+
+# Placeholder colours kept in books.csv: a few pixels, painted stretched until the cover is decoded
+PREVIEW_SIZE = (4, 5)
+
+
+class ImageStore:
+    """Content-addressed cover store shared by every terminal.
+
+    A cover is a normalized JPEG master named by the SHA-256 of its bytes,
+    in a directory sharded on the first two hex digits
+    (objects/ab/ab12....jpg), with its card renditions next to it
+    (ab12....220x230.jpg). books.csv references covers by that key, so
+    identical uploads are stored once, re-keying a book never touches a
+    file, and blobs are never rewritten - only added, and removed by
+    collect_garbage() once nothing references them. Which keys exist is
+    kept in memory, so drawing a card costs no filesystem probe.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self._keys = None
+        self._lock = threading.Lock()
+
+    # ==================== INGEST ====================
+
+    def put(self, source):
+        """Validate an uploaded image, store it normalized with its renditions and return its key.
+
+        Raises ValueError for files that are not usable images.
+        """
+        master = _normalize(source)
+        data = _encode(master)
+        key = hashlib.sha256(data).hexdigest()
+        if key in self:
+            try:
+                # Restart the garbage-collection grace period of a cover being reused
+                os.utime(self.path(key))
+                return key
+            except FileNotFoundError:
+                # Collected by another terminal meanwhile: store it again
+                self._forget(key)
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _write(path, data)
+        # After the master, so they count as up to date (see stale_renditions)
+        self.make_renditions(key, master)
+        with self._lock:
+            self._index().add(key)
+        return key
+
+    def make_renditions(self, key, image=None, sizes=RENDITION_SIZES):
+        """Write the card-size renditions of a cover (decoding the master unless image is given)"""
+        if image is None:
+            with Image.open(self.path(key)) as source:
+                image = source.convert("RGB")
+        for size in sizes:
+            # Same stretch-to-fit as the cards have always drawn covers with
+            _write(self.path(key, size), _encode(image.resize(size, Image.Resampling.LANCZOS)))
+
+    def stale_renditions(self, key, sizes=RENDITION_SIZES):
+        """Sizes whose rendition is missing or older than the master"""
+        master = self.path(key).stat().st_mtime_ns
+        stale = []
+        for size in sizes:
+            try:
+                if self.path(key, size).stat().st_mtime_ns >= master:
+                    continue
+            except FileNotFoundError:
+                pass
+            stale.append(size)
+        return stale
+
+    # ==================== LOOKUP ====================
+
+    def path(self, key, size=None):
+        """File of a cover's master, or of its rendition at size"""
+        name = f"{key}.jpg" if size is None else f"{key}.{size[0]}x{size[1]}.jpg"
+        return self.objects / key[:2] / name
+
+    def __contains__(self, key):
+        if not isinstance(key, str) or not key:
+            return False
+        with self._lock:
+            keys = self._index()
+            if key in keys:
+                return True
+        # Possibly stored by another terminal since the index was built
+        if self.path(key).exists():
+            with self._lock:
+                keys.add(key)
+            return True
+        return False
+
+    def preview(self, key):
+        """Tiny placeholder of a cover (see make_preview), or '' if there is no such cover"""
+        img = self._open(key, LIST_SIZE)
+        if img is None:
+            return ''
+        with img:
+            return make_preview(img)
+
+    def keys(self):
+        with self._lock:
+            return set(self._index())
+
+    def load(self, key, size):
+        """A cover as a PIL image of exactly size, or None if there is no such cover"""
+        img = self._open(key, size)
+        if img is None:
+            return None
+        if img.size != tuple(size):
+            img = img.resize(size, Image.Resampling.LANCZOS)
+        return img
+
+    def _open(self, key, size):
+        """The rendition of a cover at size, else its master; None if there is no such cover"""
+        if key not in self:
+            return None
+        try:
+            return Image.open(self.path(key, size))
+        except FileNotFoundError:
+            # Rendition not generated (yet) for this size
+            pass
+        try:
+            return Image.open(self.path(key))
+        except FileNotFoundError:
+            # Collected by another terminal since the key was indexed
+            self._forget(key)
+            return None
+
+    def _forget(self, key):
+        with self._lock:
+            self._index().discard(key)
+
+    def _index(self):
+        """Keys of every stored master, scanned once (callers hold self._lock)"""
+        if self._keys is None:
+            keys = set()
+            if self.objects.is_dir():
+                for shard in os.scandir(self.objects):
+                    if not shard.is_dir():
+                        continue
+                    for entry in os.scandir(shard.path):
+                        stem, dot, ext = entry.name.partition(".")
+                        if ext == "jpg":
+                            keys.add(stem)
+            self._keys = keys
+        return self._keys
+
+    # ==================== CLEANUP ====================
+
+    def collect_garbage(self, referenced, grace=3600):
+        """Delete covers no book references; returns how many were removed.
+
+        Blobs younger than grace seconds are kept: a terminal may have
+        stored a cover whose book row is not committed yet.
+        """
+        cutoff = time.time() - grace
+        removed = 0
+        for key in self.keys() - set(referenced):
+            master = self.path(key)
+            try:
+                if master.stat().st_mtime > cutoff:
+                    continue
+            except FileNotFoundError:
+                pass
+            for path in master.parent.glob(f"{key}.*"):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._forget(key)
+            removed += 1
+        return removed
+
+
+# ==================== PREVIEWS ====================
+
+def make_preview(image):
+    """A few averaged pixels of an image as a short base64 string (80 characters)"""
+    small = image.convert("RGB").resize(PREVIEW_SIZE, Image.Resampling.BOX)
+    return base64.b64encode(small.tobytes()).decode("ascii")
+
+
+def preview_image(preview, size):
+    """The placeholder behind a make_preview() string, smoothly stretched to size (None if invalid)"""
+    if not isinstance(preview, str) or not preview:
+        return None
+    try:
+        small = Image.frombytes("RGB", PREVIEW_SIZE, base64.b64decode(preview))
+    except ValueError:
+        return None
+    return small.resize(size, Image.Resampling.BICUBIC)
+
+
+# ==================== ENCODING ====================
+
+def _normalize(source):
+    """Decode, validate and orient an upload as an RGB image no larger than MASTER_MAX"""
+    if os.path.getsize(source) > MAX_SOURCE_BYTES:
+        raise ValueError(f"Image is larger than {MAX_SOURCE_BYTES // 2**20} MB")
+    try:
+        with Image.open(source) as img:
+            if img.width * img.height > MAX_SOURCE_PIXELS:
+                raise ValueError(f"Image is too large ({img.width}×{img.height} pixels)")
+            # Only shrinks: decodes at a fraction of the size for JPEG sources
+            img.draft("RGB", MASTER_MAX)
+            img.load()
+            master = _flatten(ImageOps.exif_transpose(img))
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ValueError(f"Not a readable image: {e}")
+    master.thumbnail(MASTER_MAX, Image.Resampling.LANCZOS)
+    return master
+
+
+def _flatten(img):
+    """RGB copy of any PIL image, with transparency composited onto the card background"""
+    if img.mode in ("RGBA", "LA", "P"):
+        img = img.convert("RGBA")
+        flat = Image.new("RGB", img.size, BACKGROUND)
+        flat.paste(img, mask=img.getchannel("A"))
+        return flat
+    return img.convert("RGB")
+
+
+def _encode(img):
+    buffer = io.BytesIO()
+    img.save(buffer, "JPEG", quality=JPEG_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def _write(path, data):
+    temp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(temp, "wb") as handle:
+        handle.write(data)
+    os.replace(temp, path)
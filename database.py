@@ -1,9 +1,23 @@
 import pandas as pd
 import numpy as np
 import os
+import json
+import atexit
+import threading
 from pathlib import Path
+from instrumentation import DatabaseInstrumentation
+from records import loan_records, member_records
+from migrations import migrate, LOAN_DATE_COLUMNS
+from file_lock import FileLock
+from id_sequence import IdSequence
+from journal import Journal
+from events import EventBus
+from covers import ImageStore
 
 class DatabaseManager:
+    # Journaled operations between two checkpoints of the CSV files
+    CHECKPOINT_EVERY = 500
+    
     def __init__(self):
         # Create data directory if not exists
         self.data_dir = Path("data")
@@ -16,74 +30,825 @@ class DatabaseManager:
         self.cart_file = self.data_dir / "cart.csv"
         self.images_dir = Path("data/book_images")
         self.images_dir.mkdir(exist_ok=True)
+        # Covers are content-addressed blobs; books.csv stores their keys
+        self.images = ImageStore(self.images_dir)
+        # Returned loans live in per-year partitions (by issue date) so the
+        # active loans in borrowed.csv stay small
+        self.archive_dir = self.data_dir / "loans_archive"
+        self.archive_dir.mkdir(exist_ok=True)
+        # Row counts (in total and per user) and book ids of the partitions as of
+        # their last checkpoint, so stats, member totals and re-keys need not read them
+        self.archive_counts_file = self.archive_dir / "counts.json"
+        self._table_paths = {
+            'users': self.users_file,
+            'books': self.books_file,
+            'cart': self.cart_file,
+            'borrowed': self.borrowed_file,
+        }
+        
+        # Parsed tables keyed by path, validated against the checkpoint file's (mtime, size)
+        self._cache = {}
+        self._indexes = {}
+        self._loans = {}
+        self._history = None
+        # Archive partitions are read on first use; until then stats use
+        # {path: (signature, (rows, {user_id: rows}, {book_id}))}
+        self._archive_counts = {}
+        self._io_lock = threading.RLock()
+        self._write_counts = {}
+        # Pinned column dtypes, valid once migrate() has brought the files up to date;
+        # they also keep journaled rows from drifting to object dtype in memory
+        self._dtypes = {
+            self.users_file: {'id': 'int64'},
+            self.books_file: {'id': 'int64', 'cover': 'object', 'cover_preview': 'object'},
+            self.cart_file: {'user_id': 'int64', 'book_id': 'int64'},
+            self.borrowed_file: {
+                'user_id': 'Int64', 'book_id': 'int64', 'collected': 'bool',
+                **{column: 'Int64' for column in LOAN_DATE_COLUMNS},
+            },
+        }
         
-        # Initialize dataframes
+        # Lock on the data directory, shared with other terminals: journal
+        # appends, checkpoints and book ID allocation all happen under it
+        self._write_lock = FileLock(self.data_dir / "data.lock")
+        self._book_ids = IdSequence(self.data_dir / "book_id.seq", self._write_lock, seed=self._max_book_id)
+        
+        # Mutations are appended to the journal and applied to the cached
+        # tables; the CSV files are checkpoints (see JOURNAL below)
+        self._journal = Journal(self.data_dir / "journal.log")
+        self._journal_state = None  # (generation, offset) replayed so far
+        self._syncing = False
+        self._watched = False
+        self._dirty = set()
+        self._pending = 0
+        
+        # Change events for the open pages, published for every applied
+        # record - including those replayed from other terminals
+        self.events = EventBus()
+        
+        # Optional per-call timing / I/O instrumentation (LIBRAEASE_INSTRUMENT=1)
+        self.instrumentation = None
+        if os.getenv("LIBRAEASE_INSTRUMENT", "").lower() in ("1", "true", "yes"):
+            self.enable_instrumentation()
+        
+        # Initialize dataframes and upgrade files written by older versions
         self.init_database()
+        self.schema_version = migrate(self)
+        self._recover()
+        atexit.register(self.close)
+    
+    def enable_instrumentation(self):
+        """Start recording wall time and CSV I/O for every public call"""
+        if self.instrumentation is not None:
+            return self.instrumentation
+        self.instrumentation = DatabaseInstrumentation()
+        self.instrumentation.attach(self)
+        atexit.register(lambda: print(self.instrumentation.format_report()))
+        return self.instrumentation
+    
+    # ==================== FILE I/O ====================
+    
+    def _signature(self, path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            # Archive partition that so far exists only in memory
+            return None
+        return (st.st_mtime_ns, st.st_size)
+    
+    def _table(self, path):
+        """Cached, shared DataFrame for a table (checkpoint plus journal) - callers must not modify it"""
+        with self._io_lock:
+            # With a change watcher running, other terminals' writes arrive through refresh();
+            # a locked mutator still syncs, as it computes new values from what it reads
+            if not self._watched or path not in self._cache or self._write_lock.held:
+                self._sync(path)
+            if path not in self._cache:
+                # Archive partition, read the first time history reaches it
+                self._load(path)
+            return self._cache[path][1]
+    
+    def _load(self, path):
+        """Parse a checkpoint file into the cache (callers hold self._io_lock)"""
+        if self.instrumentation is not None:
+            self.instrumentation.record_read(path)
+        signature = self._signature(path)
+        self._cache[path] = (signature, pd.read_csv(path, dtype=self._pinned(path)))
+        self._write_counts[path] = self._write_counts.get(path, 0) + 1
+    
+    def _unload(self, path):
+        """Drop an archive partition and everything derived from it until it is needed again"""
+        with self._io_lock:
+            self._cache.pop(path, None)
+            self._loans.pop(path, None)
+            for key in [key for key in self._indexes if key[0] == path]:
+                del self._indexes[key]
+            self._history = None
+    
+    def _read_csv(self, path):
+        """Private copy of a whole table"""
+        return self._table(path).copy()
+    
+    def _write_csv(self, df, path):
+        """Rewrite a table file directly; only for setup and migrations, mutations go through _commit"""
+        with self._io_lock:
+            df.to_csv(path, index=False)
+            # Re-parse on next read so dtypes match what is on disk
+            self._cache.pop(path, None)
+            self._write_counts[path] = self._write_counts.get(path, 0) + 1
+        if self.instrumentation is not None:
+            self.instrumentation.record_write(path)
+    
+    def _write_tables(self, frames):
+        """Write tables out as checkpoint files: every file is staged first, then swapped in with os.replace"""
+        with self._io_lock:
+            self._swap_tables(self._stage_tables(frames), frames)
+    
+    def _stage_tables(self, frames, suffix=".tmp"):
+        """Write each frame to a temp file next to its table; returns {path: temp}"""
+        staged = {}
+        for path, df in frames.items():
+            temp = path.with_name(path.name + suffix)
+            df.to_csv(temp, index=False)
+            staged[path] = temp
+        return staged
+    
+    def _swap_tables(self, staged, frames):
+        """Move staged files over their tables; the in-memory frames already match them"""
+        with self._io_lock:
+            for path, temp in staged.items():
+                os.replace(temp, path)
+                self._cache[path] = (self._signature(path), frames[path])
+            archived = [path for path in staged if path.parent == self.archive_dir]
+            if archived:
+                self._record_archive_counts(archived)
+        if self.instrumentation is not None:
+            for path in staged:
+                self.instrumentation.record_write(path)
+    
+    def _index(self, path, column):
+        """(df, {value of column: row positions in df}), the index rebuilt only when the table changes.
+        
+        The positions are only valid for the df returned with them: a sync,
+        refresh or compaction may swap in a new frame at any time, so take
+        rows from that df rather than from another _table() call.
+        """
+        with self._io_lock:
+            df = self._table(path)
+            key = (path, column)
+            cached = self._indexes.get(key)
+            if cached is not None and cached[0] is df:
+                return cached
+            index = {}
+            for pos, value in enumerate(df[column].tolist()):
+                index.setdefault(value, []).append(pos)
+            self._indexes[key] = (df, index)
+            return self._indexes[key]
+    
+    def _loan_frame(self, path, df=None):
+        """One loans table or partition with date columns as datetime64, rebuilt only when it changes.
+        
+        df pins the version of the table to convert (default: the current one).
+        """
+        with self._io_lock:
+            if df is None:
+                df = self._table(path)
+            cached = self._loans.get(path)
+            if cached is not None and cached[0] is df:
+                return cached[1]
+            loans = df.copy()
+            for column in LOAN_DATE_COLUMNS:
+                loans[column] = pd.to_datetime(loans[column], unit='s')
+            self._loans[path] = (df, loans)
+            return loans
+    
+    def _loans_table(self, history=False):
+        """Shared active-loans frame (dates as datetime64); history=True appends every archive partition"""
+        with self._io_lock:
+            if not history:
+                return self._loan_frame(self.borrowed_file)
+            frames = [self._loan_frame(path) for path in self._loan_paths(history=True)]
+            cached = self._history
+            if cached is not None and len(cached[0]) == len(frames) and all(
+                    a is b for a, b in zip(cached[0], frames)):
+                return cached[1]
+            history_df = pd.concat([df for df in frames if len(df) > 0] or frames[:1], ignore_index=True)
+            self._history = (frames, history_df)
+            return history_df
+    
+    def _partition_path(self, year):
+        return self.archive_dir / f"loans_{year}.csv"
+    
+    def _archive_paths(self):
+        """Archive partitions on disk or so far only in memory, oldest year first"""
+        with self._io_lock:
+            paths = set(self.archive_dir.glob("loans_*.csv"))
+            paths.update(path for path in self._cache if path.parent == self.archive_dir)
+            return sorted(paths)
+    
+    def _archive_counts_of(self, path):
+        """(rows, {user_id: rows}, {book_id}) of an archive partition, without reading it if it is not loaded yet"""
+        with self._io_lock:
+            if path in self._cache:
+                return self._count_loans(self._table(path))
+            signature = self._signature(path)
+            cached = self._archive_counts.get(path)
+            if cached is None or cached[0] != signature:
+                recorded = self._read_archive_counts().get(path.name)
+                if recorded is not None and len(recorded) == 5 and tuple(recorded[:2]) == signature:
+                    counts = (
+                        recorded[2],
+                        {int(user_id): rows for user_id, rows in recorded[3].items()},
+                        set(recorded[4]),
+                    )
+                else:
+                    # Written outside a checkpoint (a migration) or by an older version: count it once
+                    counts = self._count_loans(pd.read_csv(
+                        path, usecols=['user_id', 'book_id'], dtype={'user_id': 'Int64', 'book_id': 'int64'}
+                    ))
+                cached = self._archive_counts[path] = (signature, counts)
+            return cached[1]
+    
+    def _archive_rows(self, path):
+        """Rows in an archive partition (see _archive_counts_of)"""
+        return self._archive_counts_of(path)[0]
+    
+    def _archived_loans_per_user(self):
+        """{user_id: archived loans} over every partition, without loading the unloaded ones"""
+        totals = {}
+        for path in self._archive_paths():
+            for user_id, rows in self._archive_counts_of(path)[1].items():
+                totals[user_id] = totals.get(user_id, 0) + rows
+        return totals
+    
+    def _archive_paths_with_book(self, book_id):
+        """Archive partitions holding loans of book_id; unloaded ones are found through counts.json"""
+        with self._io_lock:
+            paths = []
+            for path in self._archive_paths():
+                if path in self._cache:
+                    found = book_id in self._index(path, 'book_id')[1]
+                else:
+                    found = book_id in self._archive_counts_of(path)[2]
+                if found:
+                    paths.append(path)
+            return paths
+    
+    @staticmethod
+    def _count_loans(loans_df):
+        """(rows, {user_id: rows}, {book_id}) of a loans frame; rows without a user only count towards the total"""
+        per_user = loans_df['user_id'].value_counts()
+        return (
+            len(loans_df),
+            {int(user_id): int(rows) for user_id, rows in per_user.items()},
+            {int(book_id) for book_id in loans_df['book_id'].unique()},
+        )
+    
+    def _read_archive_counts(self):
+        """{partition file name: [mtime_ns, size, rows, {user_id: rows}, [book_id]]} from counts.json"""
+        try:
+            with open(self.archive_counts_file) as handle:
+                return json.load(handle)
+        except (FileNotFoundError, ValueError):
+            return {}
+    
+    def _record_archive_counts(self, paths):
+        """Note the rows of partitions just swapped in (callers hold the write lock)"""
+        counts = self._read_archive_counts()
+        for path in paths:
+            rows, per_user, book_ids = self._count_loans(self._cache[path][1])
+            counts[path.name] = [
+                *self._signature(path), rows,
+                {str(user_id): n for user_id, n in per_user.items()}, sorted(book_ids),
+            ]
+        temp = self.archive_counts_file.with_name(self.archive_counts_file.name + ".tmp")
+        with open(temp, "w") as handle:
+            json.dump(counts, handle)
+        os.replace(temp, self.archive_counts_file)
+    
+    def _loan_paths(self, history=False):
+        """The active loans table, plus the archive partitions when history is wanted"""
+        if history:
+            return [self.borrowed_file, *self._archive_paths()]
+        return [self.borrowed_file]
+    
+    def _pinned(self, path):
+        """Pinned dtypes of a table; archive partitions share the loans table's"""
+        if path.parent == self.archive_dir:
+            path = self.borrowed_file
+        return self._dtypes.get(path, {})
+    
+    # ==================== JOURNAL ====================
+    # Mutations are journaled as logical operations and applied to the cached
+    # frames; the CSV files are checkpoints. Every _apply_* handler is
+    # idempotent (operations carry absolute values and loan keys), so
+    # replaying records that already reached a checkpoint is harmless.
+    
+    def _sync(self, path=None):
+        """Catch the cached tables up with the checkpoint files and the journal tail.
+        
+        Costs a stat of the table (every table if path is None) and one of the
+        journal when nothing has changed.
+        """
+        with self._io_lock:
+            if self._syncing:
+                return
+            paths = [path] if path is not None else list(self._table_paths.values())
+            # Archive partitions not loaded yet are read by _table, already caught up
+            paths = [p for p in paths if p in self._cache or p.parent != self.archive_dir]
+            stale = self._journal_state is None or any(
+                p not in self._cache or self._cache[p][0] != self._signature(p) for p in paths
+            )
+            if not stale:
+                generation, offset = self._journal_state
+                if self._journal.size() == offset:
+                    return
+                # Another terminal appended, or checkpointed and started a new generation
+                stale = self._journal.header() != generation
+            self._syncing = True
+            try:
+                if stale:
+                    self._reload()
+                else:
+                    self._replay()
+            finally:
+                self._syncing = False
+    
+    def _reload(self):
+        """Re-read the checkpoint files that changed and replay the whole journal on top.
+        
+        A table this process has not modified since its last checkpoint, and
+        whose file is unchanged, is kept: its frame already matches the file.
+        Only archive partitions already loaded are re-read; the replay loads
+        those its records reach, and the rest wait for a history query.
+        """
+        previous = {path: df for path, (_, df) in self._cache.items()}
+        kept = {
+            path: entry for path, entry in self._cache.items()
+            if path not in self._dirty and entry[0] is not None and entry[0] == self._signature(path)
+        }
+        self._cache.clear()
+        loaded = sorted(path for path in previous if path.parent == self.archive_dir and path.exists())
+        for path in [*self._table_paths.values(), *loaded]:
+            if path in kept:
+                self._cache[path] = kept[path]
+            else:
+                self._load(path)
+        self._dirty.clear()
+        self._pending = 0
+        self._journal_state = (self._journal.header(), 0)
+        self._replay(publish=False)
+        
+        # One coarse event instead of one per replayed record; usually the
+        # tables are what this process already had (its own records checkpointed)
+        changed = set()
+        for name, path in self._table_paths.items():
+            old = previous.get(path)
+            new = self._cache[path][1]
+            if old is None or (old is not new and not old.equals(new)):
+                changed.add(name)
+        if any(path not in previous or (previous[path] is not df and not previous[path].equals(df))
+               for path, (_, df) in self._cache.items() if path.parent == self.archive_dir):
+            changed.add('borrowed')
+        if previous and changed:
+            self.events.publish('data_reloaded', tuple(sorted(changed)))
+    
+    def _replay(self, publish=True):
+        """Apply the journal records past the replayed offset"""
+        generation, offset = self._journal_state
+        records, offset = self._journal.read(offset)
+        for record in records:
+            self._apply(record)
+            if publish:
+                self._publish(record)
+        self._journal_state = (generation, offset)
+        self._pending += len(records)
+    
+    def refresh(self):
+        """Catch up with other terminals' writes now, publishing their change events"""
+        with self._io_lock:
+            self._sync()
+    
+    def set_watched(self, watched):
+        """Declare that a change watcher calls refresh() whenever the data directory changes.
+        
+        While set, lock-free reads trust the cached tables instead of
+        checking the files on every call; reads under the write lock, which
+        mutators check and compute from, still sync.
+        """
+        with self._io_lock:
+            self._watched = watched
+    
+    def _apply(self, record):
+        getattr(self, f"_apply_{record['op']}")(record)
+    
+    def _publish(self, record):
+        """Change events for one applied journal record (see events.EventBus)"""
+        op = record['op']
+        publish = self.events.publish
+        if op == 'create_user':
+            publish('user_created', record['user']['email'])
+        elif op == 'create_book':
+            publish('book_updated', record['book']['id'])
+        elif op in ('update_book', 'delete_book'):
+            publish('book_updated', record['id'])
+        elif op == 'rekey_book':
+            # Cart and loan rows moved with the book; cheaper to redraw than to chase them
+            publish('data_reloaded', ('books', 'borrowed', 'cart'))
+        elif op in ('cart_add', 'cart_remove', 'cart_clear'):
+            publish('cart_changed', self._user_email(record['user_id']), record.get('book_id'))
+        elif op == 'borrow':
+            # The loan also takes a copy from stock and the book out of the cart
+            email, book_id = self._user_email(record['loan']['user_id']), record['loan']['book_id']
+            publish('loan_changed', email, book_id)
+            publish('cart_changed', email, book_id)
+            publish('book_updated', book_id)
+        elif op in ('collect', 'return'):
+            publish('loan_changed', self._user_email(record['user_id']), record['book_id'])
+            if record.get('count') is not None:
+                # A return that puts the copy back in stock
+                publish('book_updated', record['book_id'])
+    
+    def _commit(self, op, **fields):
+        """Journal one logical mutation, then apply it to the cached tables"""
+        record = {'op': op, **fields}
+        with self._write_lock, self._io_lock:
+            self._sync()
+            generation, offset = self._journal_state
+            if generation is None:
+                generation = self._journal.reset()
+                offset = self._journal.size()
+            elif self._journal.size() != offset:
+                # Torn record from a writer that crashed mid-append
+                self._journal.truncate(offset)
+            written = self._journal.append(record)
+            self._journal_state = (generation, offset + written)
+            self._syncing = True
+            try:
+                self._apply(record)
+            finally:
+                self._syncing = False
+            self._pending += 1
+            self._publish(record)
+        if self.instrumentation is not None:
+            self.instrumentation.record_append(self._journal.path, written)
+        if self._pending >= self.CHECKPOINT_EVERY:
+            self.checkpoint()
+    
+    def checkpoint(self):
+        """Write the tables changed since the last checkpoint and start an empty journal"""
+        with self._write_lock, self._io_lock:
+            self._sync()
+            frames = {path: self._cache[path][1] for path in self._dirty}
+            if frames:
+                self._write_tables(frames)
+            generation, offset = self._journal_state
+            if self._pending or generation is None or self._journal.size() != offset:
+                self._journal_state = (self._journal.reset(), self._journal.size())
+            self._dirty.clear()
+            self._pending = 0
+    
+    def close(self):
+        """Checkpoint and close the journal; also runs at interpreter exit"""
+        try:
+            self.checkpoint()
+        except OSError:
+            # Data directory already gone (e.g. a removed temp dir)
+            pass
+        self._journal.close()
+    
+    def _recover(self):
+        """Replay whatever the last session journaled after its final checkpoint, then checkpoint it"""
+        with self._write_lock:
+            self._sync()
+            if self._pending or self._journal_state[0] is None:
+                self.checkpoint()
+    
+    def _replace(self, path, df):
+        """Swap in the new version of a table after a journaled change"""
+        self._cache[path] = (self._cache[path][0], df)
+        self._write_counts[path] = self._write_counts.get(path, 0) + 1
+        self._dirty.add(path)
+    
+    def _append_row(self, path, row):
+        df = self._table(path)
+        new_row = pd.DataFrame([row]).astype(self._pinned(path))
+        self._replace(path, pd.concat([df, new_row], ignore_index=True))
+    
+    def _set_fields(self, path, positions, fields):
+        df = self._table(path).copy()
+        for column, value in fields.items():
+            df.iloc[positions, df.columns.get_loc(column)] = value
+        self._replace(path, df)
+    
+    def _drop_rows(self, path, positions):
+        df = self._table(path)
+        self._replace(path, df.drop(index=df.index[positions]).reset_index(drop=True))
+    
+    def _cart_rows(self, user_id, book_id):
+        """Positions of one cart entry, through the user_id index"""
+        df, index = self._index(self.cart_file, 'user_id')
+        book_ids = df['book_id']
+        return [pos for pos in index.get(user_id, []) if book_ids.iat[pos] == book_id]
+    
+    def _loan_rows(self, user_id, book_id, issue_dates, path=None):
+        """Positions of the loans identified by (user_id, book_id, issue_date), through the user_id index"""
+        path = path or self.borrowed_file
+        df, index = self._index(path, 'user_id')
+        book_ids, issued = df['book_id'], df['issue_date']
+        dates = set(issue_dates)
+        return [pos for pos in index.get(user_id, [])
+                if book_ids.iat[pos] == book_id and pd.notna(issued.iat[pos]) and int(issued.iat[pos]) in dates]
+    
+    def _active_loan_dates(self, user_id, book_id):
+        """Issue dates (epoch seconds) of a user's open loans of a book"""
+        loans = self._user_rows(self.borrowed_file, user_id)
+        active = loans[(loans['book_id'] == book_id) & (loans['status'] == 'borrowed')]
+        return [int(value) for value in active['issue_date'].dropna()]
+    
+    def _archive(self, positions):
+        """Move active-table loan rows into the archive partitions of their issue year"""
+        hot = self._table(self.borrowed_file)
+        moving = hot.iloc[positions]
+        years = pd.to_datetime(moving['issue_date'], unit='s').dt.year
+        for year, rows in moving.groupby(years):
+            path = self._partition_path(int(year))
+            if path not in self._cache and not path.exists():
+                self._cache[path] = (None, hot.iloc[:0].copy())
+            # Loans already archived (a replayed record the checkpoint has) are skipped
+            new = [not self._loan_rows(user_id, book_id, [issued], path)
+                   for user_id, book_id, issued in zip(rows['user_id'], rows['book_id'], rows['issue_date'])]
+            if any(new):
+                self._replace(path, pd.concat([self._table(path), rows[new]], ignore_index=True))
+        self._drop_rows(self.borrowed_file, positions)
+    
+    def _apply_create_user(self, op):
+        if op['user']['email'] not in self._index(self.users_file, 'email')[1]:
+            self._append_row(self.users_file, op['user'])
+    
+    def _apply_create_book(self, op):
+        if op['book']['id'] not in self._index(self.books_file, 'id')[1]:
+            self._append_row(self.books_file, op['book'])
+    
+    def _apply_update_book(self, op):
+        positions = self._index(self.books_file, 'id')[1].get(op['id'])
+        if positions:
+            self._set_fields(self.books_file, positions[:1], op['fields'])
+    
+    def _apply_rekey_book(self, op):
+        book_id, new_id = op['id'], op['new_id']
+        _, index = self._index(self.books_file, 'id')
+        positions = index.get(book_id)
+        if not positions or (new_id != book_id and new_id in index):
+            return
+        self._set_fields(self.books_file, positions[:1], {'id': new_id, **op['fields']})
+        # Only the cart and loan rows (active and archived) of this book, found through the
+        # book_id indexes; archive partitions without the book are not even loaded
+        for path in (self.cart_file, self.borrowed_file, *self._archive_paths_with_book(book_id)):
+            rows = self._index(path, 'book_id')[1].get(book_id)
+            if rows:
+                self._set_fields(path, rows, {'book_id': new_id})
+    
+    def _apply_delete_book(self, op):
+        positions = self._index(self.books_file, 'id')[1].get(op['id'])
+        if positions:
+            self._drop_rows(self.books_file, positions)
+    
+    def _apply_cart_add(self, op):
+        if not self._cart_rows(op['user_id'], op['book_id']):
+            self._append_row(self.cart_file, {'user_id': op['user_id'], 'book_id': op['book_id']})
+    
+    def _apply_cart_remove(self, op):
+        rows = self._cart_rows(op['user_id'], op['book_id'])
+        if rows:
+            self._drop_rows(self.cart_file, rows)
+    
+    def _apply_cart_clear(self, op):
+        rows = self._index(self.cart_file, 'user_id')[1].get(op['user_id'])
+        if rows:
+            self._drop_rows(self.cart_file, rows)
+    
+    def _apply_borrow(self, op):
+        loan = op['loan']
+        if not self._loan_rows(loan['user_id'], loan['book_id'], [loan['issue_date']]):
+            self._append_row(self.borrowed_file, loan)
+        self._apply_update_book({'id': loan['book_id'], 'fields': {'count': op['count']}})
+        self._apply_cart_remove({'user_id': loan['user_id'], 'book_id': loan['book_id']})
+    
+    def _apply_collect(self, op):
+        rows = self._loan_rows(op['user_id'], op['book_id'], op['issue_dates'])
+        if rows:
+            self._set_fields(self.borrowed_file, rows, {'collected': True, 'collection_date': op['date']})
+    
+    def _apply_return(self, op):
+        rows = self._loan_rows(op['user_id'], op['book_id'], op['issue_dates'])
+        fields = {'status': 'returned'}
+        if op['date'] is not None:
+            fields['return_date'] = op['date']
+        if rows:
+            self._set_fields(self.borrowed_file, rows, fields)
+            self._archive(rows)
+        if op['count'] is not None:
+            self._apply_update_book({'id': op['book_id'], 'fields': {'count': op['count']}})
+    
+    def _user_id(self, email):
+        """Integer id behind an email, through the users email index (None if unknown)"""
+        with self._io_lock:
+            users, index = self._index(self.users_file, 'email')
+            positions = index.get(email.lower())
+            if not positions:
+                return None
+            return int(users['id'].iat[positions[0]])
+    
+    def _user_email(self, user_id):
+        """Email behind an integer user id, through the users id index (None if unknown)"""
+        with self._io_lock:
+            users, index = self._index(self.users_file, 'id')
+            positions = index.get(user_id)
+            if not positions:
+                return None
+            return users['email'].iat[positions[0]]
+    
+    def _user_rows(self, path, user_id, loans=False):
+        """A user's cart or loan rows through the user_id index; loans=True converts dates to datetime64"""
+        with self._io_lock:
+            df, index = self._index(path, 'user_id')
+            if loans:
+                df = self._loan_frame(path, df)
+            return df.iloc[index.get(user_id, [])]
+    
+    def _user_loans(self, user_id, history=False):
+        """A user's loans (dates as datetime64), from the archive partitions too when history is wanted"""
+        frames = [self._user_rows(path, user_id, loans=True) for path in self._loan_paths(history)]
+        if len(frames) == 1:
+            return frames[0]
+        return pd.concat([df for df in frames if len(df) > 0] or frames[:1], ignore_index=True)
+    
+    def _epoch(self, moment):
+        """Seconds since 1970-01-01 for a naive local datetime"""
+        return int(pd.Timestamp(moment).value // 10**9)
+    
+    def data_version(self, *tables):
+        """Token that changes whenever any of the named tables is written, here or by another process"""
+        with self._io_lock:
+            self._sync()
+            return tuple(
+                (self._write_counts.get(self._table_paths[name], 0), self._signature(self._table_paths[name]))
+                for name in tables
+            )
+    
+    def warm_up(self):
+        """Parse every table and build lookup indexes ahead of first use"""
+        for path in (self.users_file, self.books_file, self.cart_file, self.borrowed_file):
+            self._table(path)
+        self._index(self.users_file, 'email')
+        self._index(self.books_file, 'id')
+        self._index(self.cart_file, 'user_id')
+        self._index(self.borrowed_file, 'user_id')
     
     def init_database(self):
         """Initialize CSV files if they don't exist"""
         # Users CSV
         if not self.users_file.exists():
             users_df = pd.DataFrame(columns=[
-                'email', 'first_name', 'last_name', 'password', 'role'
+                'id', 'email', 'first_name', 'last_name', 'password', 'role'
             ])
-            users_df.to_csv(self.users_file, index=False)
+            self._write_csv(users_df, self.users_file)
         
         # Books CSV
         if not self.books_file.exists():
             books_df = pd.DataFrame(columns=[
-                'id', 'name', 'author', 'image_path', 'count'
+                'id', 'name', 'author', 'cover', 'cover_preview', 'count'
             ])
-            books_df.to_csv(self.books_file, index=False)
+            self._write_csv(books_df, self.books_file)
 
         # Cart CSV
         if not self.cart_file.exists():
             cart_df = pd.DataFrame(columns=[
-                'user_email', 'book_id'
+                'user_id', 'book_id'
             ])
-            cart_df.to_csv(self.cart_file, index=False)
+            self._write_csv(cart_df, self.cart_file)
 
         # Borrowed Books CSV
         if not self.borrowed_file.exists():
             borrowed_df = pd.DataFrame(columns=[
-                'user_email', 'book_id', 'issue_date', 'collection_deadline', 
+                'user_id', 'book_id', 'issue_date', 'collection_deadline', 
                 'return_deadline', 'status', 'collected', 'collection_date', 'return_date'
             ])
-            borrowed_df.to_csv(self.borrowed_file, index=False)
+            self._write_csv(borrowed_df, self.borrowed_file)
+    
+    # ==================== COMPACTION ====================
+    
+    def compact(self):
+        """Drop orphaned cart rows, dedupe and re-sort every table, swap the result in as a checkpoint and drop unused covers.
+        
+        The compacted tables are built and staged from a snapshot without
+        holding the data directory lock. The lock is only taken for the swap,
+        after checking that nothing was written meanwhile (otherwise the pass
+        starts over). Returns {table name: rows removed, 'covers': covers
+        removed}, or None if the tables kept changing under it.
+        """
+        for _attempt in range(3):
+            with self._io_lock:
+                self._sync()
+                unloaded = [path for path in self._archive_paths() if path not in self._cache]
+                snapshot = {path: self._table(path) for path in (*self._table_paths.values(), *self._archive_paths())}
+                dirty = set(self._dirty)
+            
+            compacted = self._compacted(snapshot)
+            changed = {
+                path: df for path, df in compacted.items()
+                if path in dirty or not df.equals(snapshot[path])
+            }
+            staged = self._stage_tables(changed, suffix=f".{os.getpid()}.compact")
+            
+            with self._write_lock, self._io_lock:
+                self._sync()
+                if any(self._cache.get(path, (None, None))[1] is not df for path, df in snapshot.items()):
+                    for temp in staged.values():
+                        os.remove(temp)
+                    continue
+                
+                self._swap_tables(staged, changed)
+                for path in changed:
+                    self._write_counts[path] = self._write_counts.get(path, 0) + 1
+                self._dirty.clear()
+                self._pending = 0
+                self._journal_state = (self._journal.reset(), self._journal.size())
+                
+                # Checkpoint temp files left behind by a crashed terminal (checkpoints run under this lock)
+                for directory in (self.data_dir, self.archive_dir):
+                    for leftover in directory.glob("*.tmp"):
+                        leftover.unlink()
+            
+            # Partitions read only for this pass go back to being unloaded
+            for path in unloaded:
+                if path not in self._dirty:
+                    self._unload(path)
+            # Rebuild the lookup indexes here rather than on the UI thread's next read
+            self.warm_up()
+            result = {path.stem: len(snapshot[path]) - len(compacted[path]) for path in snapshot}
+            # Cover blobs that no book references any more (deleted books, replaced covers)
+            result['covers'] = self.images.collect_garbage(self._table(self.books_file)['cover'].dropna())
+            return result
+        return None
+    
+    def _compacted(self, snapshot):
+        """Deduplicated, orphan-free and sorted copies of the snapshot tables"""
+        users = snapshot[self.users_file].drop_duplicates('id').sort_values('id', kind='stable')
+        books = snapshot[self.books_file].drop_duplicates('id').sort_values('id', kind='stable')
+        
+        # Cart rows of deleted books or users are garbage; loans are history and stay
+        cart = snapshot[self.cart_file]
+        cart = cart[cart['user_id'].isin(users['id']) & cart['book_id'].isin(books['id'])]
+        cart = cart.drop_duplicates(['user_id', 'book_id']).sort_values(['user_id', 'book_id'], kind='stable')
+        
+        compacted = {self.users_file: users, self.books_file: books, self.cart_file: cart}
+        loan_key = ['user_id', 'book_id', 'issue_date']
+        for path in snapshot:
+            if path != self.borrowed_file and path.parent != self.archive_dir:
+                continue
+            loans = snapshot[path].drop_duplicates(loan_key)
+            # Active loans clustered per user (user_id index), archived ones in issue order
+            order = loan_key if path == self.borrowed_file else ['issue_date', 'user_id']
+            compacted[path] = loans.sort_values(order, kind='stable')
+        return {path: df.reset_index(drop=True) for path, df in compacted.items()}
     
     # ==================== USER OPERATIONS ====================
     
     def get_all_users(self):
         """Get all users as DataFrame"""
-        return pd.read_csv(self.users_file)
+        return self._read_csv(self.users_file)
     
     def get_user_by_email(self, email):
         """Get user by email, returns Series or None"""
-        df = pd.read_csv(self.users_file)
-        user = df[df['email'] == email.lower()]
-        if len(user) > 0:
-            return user.iloc[0]
+        with self._io_lock:
+            users, index = self._index(self.users_file, 'email')
+            positions = index.get(email.lower())
+            if positions:
+                return users.iloc[positions[0]].copy()
         return None
     
     def user_exists(self, email):
         """Check if user exists"""
-        df = pd.read_csv(self.users_file)
-        return email.lower() in df['email'].values
+        return email.lower() in self._index(self.users_file, 'email')[1]
     
     def create_user(self, email, first_name, last_name, password, role):
-        """Create new user"""
-        df = pd.read_csv(self.users_file)
-        
-        new_user = pd.DataFrame([{
-            'email': email.lower(),
-            'first_name': first_name,
-            'last_name': last_name,
-            'password': password,
-            'role': role
-        }])
-        
-        df = pd.concat([df, new_user], ignore_index=True)
-        df.to_csv(self.users_file, index=False)
+        """Create new user; False if the email was taken (possibly by another terminal since user_exists)"""
+        with self._write_lock:
+            if self.user_exists(email):
+                return False
+            users_df = self._table(self.users_file)
+            new_id = int(users_df['id'].max()) + 1 if len(users_df) > 0 else 1
+            
+            self._commit('create_user', user={
+                'id': new_id,
+                'email': email.lower(),
+                'first_name': first_name,
+                'last_name': last_name,
+                'password': password,
+                'role': role
+            })
         return True
     
     def validate_login(self, email, password):
@@ -91,6 +856,7 @@ class DatabaseManager:
         user = self.get_user_by_email(email)
         if user is not None and user['password'] == password:
             return {
+                'id': int(user['id']),
                 'email': user['email'],
                 'first_name': user['first_name'],
                 'last_name': user['last_name'],
@@ -102,7 +868,7 @@ class DatabaseManager:
     
     def get_all_books(self):
         """Get all books as DataFrame"""
-        df = pd.read_csv(self.books_file)
+        df = self._read_csv(self.books_file)
         # Handle empty dataframe
         if len(df) == 0:
             return df
@@ -112,19 +878,21 @@ class DatabaseManager:
     
     def get_book_by_id(self, book_id):
         """Get book by ID"""
-        df = pd.read_csv(self.books_file)
-        if len(df) == 0:
-            return None
-        
-        # Convert both to int for comparison
-        book_id = int(book_id)
-        df['id'] = df['id'].astype(int)
-        
-        book = df[df['id'] == book_id]
-        if len(book) > 0:
-            return book.iloc[0]
+        with self._io_lock:
+            books, index = self._index(self.books_file, 'id')
+            positions = index.get(int(book_id))
+            if positions:
+                return books.iloc[positions[0]].copy()
         return None
     
+    def book_id_exists(self, book_id):
+        """Check if a book ID is taken, through the books id index"""
+        return int(book_id) in self._index(self.books_file, 'id')[1]
+    
+    def _max_book_id(self):
+        """Highest book ID in the table, used to seed the ID sequence"""
+        return max(self._index(self.books_file, 'id')[1], default=0)
+    
     def search_books(self, query):
         """Search books by name, author or ID"""
         df = self.get_all_books()
@@ -140,123 +908,110 @@ class DatabaseManager:
         
         return df[mask]
     
-    def create_book(self, name, author, image_path=None, count=1):
+    def create_book(self, name, author, cover=None, count=1):
         """Create new book"""
-        df = pd.read_csv(self.books_file)
-        
-        if len(df) > 0:
-            new_id = int(np.max(df['id'].values) + 1)
-        else:
-            new_id = 1
-        
-        new_book = pd.DataFrame([{
-            'id': new_id,
-            'name': name,
-            'author': author,
-            'image_path': image_path if image_path else '',
-            'count': count  # Added
-        }])
-        
-        df = pd.concat([df, new_book], ignore_index=True)
-        df.to_csv(self.books_file, index=False)
-        return new_id
+        with self._write_lock:
+            new_id = self._book_ids.next()
+            # IDs given by hand (create_book_with_id) may be ahead of the sequence
+            while self.book_id_exists(new_id):
+                new_id = self._book_ids.next()
+            
+            self._commit('create_book', book={
+                'id': new_id,
+                'name': name,
+                'author': author,
+                'cover': cover if cover else '',
+                'cover_preview': self.images.preview(cover),
+                'count': int(count)
+            })
+            return new_id
     
-    def create_book_with_id(self, book_id, name, author, image_path=None, count=1):
+    def create_book_with_id(self, book_id, name, author, cover=None, count=1):
         """Create new book with specific ID"""
-        df = pd.read_csv(self.books_file)
-        
-        if book_id in df['id'].values:
-            raise ValueError(f"Book ID {book_id} already exists")
-        
-        new_book = pd.DataFrame([{
-            'id': book_id,
-            'name': name,
-            'author': author,
-            'image_path': image_path if image_path else '',
-            'count': count  
-        }])
-        
-        df = pd.concat([df, new_book], ignore_index=True)
-        df.to_csv(self.books_file, index=False)
-        return book_id
+        book_id = int(book_id)
+        with self._write_lock:
+            if self.book_id_exists(book_id):
+                raise ValueError(f"Book ID {book_id} already exists")
+            
+            self._commit('create_book', book={
+                'id': book_id,
+                'name': name,
+                'author': author,
+                'cover': cover if cover else '',
+                'cover_preview': self.images.preview(cover),
+                'count': int(count)
+            })
+            self._book_ids.advance_to(book_id)
+            return book_id
     
-    def update_book(self, book_id, name=None, author=None, image_path=None, count=None):
+    def _book_fields(self, name=None, author=None, cover=None, count=None):
+        """Journal-ready dict of the book fields being changed"""
+        fields = {'name': name, 'author': author, 'cover': cover,
+                  'count': None if count is None else int(count)}
+        if cover is not None:
+            # Journaled with the cover, so every terminal gets the placeholder without opening the image
+            fields['cover_preview'] = self.images.preview(cover)
+        return {column: value for column, value in fields.items() if value is not None}
+    
+    def update_book(self, book_id, name=None, author=None, cover=None, count=None):
         """Update book information"""
-        df = pd.read_csv(self.books_file)
-        
-        # Convert book_id to int for comparison
         book_id = int(book_id)
-        if len(df) > 0:
-            df['id'] = df['id'].astype(int)
-        
-        idx = df[df['id'] == book_id].index
-        if len(idx) == 0:
-            return False
-        
-        idx = idx[0]
-        
-        if name is not None:
-            df.at[idx, 'name'] = name
-        if author is not None:
-            df.at[idx, 'author'] = author
-        if image_path is not None:
-            df.at[idx, 'image_path'] = image_path
-        if count is not None:
-            df.at[idx, 'count'] = count
-        
-        df.to_csv(self.books_file, index=False)
+        with self._write_lock:
+            if not self.book_id_exists(book_id):
+                return False
+            self._commit('update_book', id=book_id, fields=self._book_fields(name, author, cover, count))
         return True
+
+    def rekey_book(self, book_id, new_id, name=None, author=None, cover=None, count=None):
+        """Change a book's ID (and optionally its details), carrying cart and loan rows along.
+
+        One journaled operation; applying it touches only the rows found
+        through the book_id indexes.
+        """
+        book_id, new_id = int(book_id), int(new_id)
+        with self._write_lock:
+            if not self.book_id_exists(book_id):
+                return False
+            if new_id != book_id and self.book_id_exists(new_id):
+                raise ValueError(f"Book ID {new_id} already exists")
+            
+            self._commit('rekey_book', id=book_id, new_id=new_id,
+                         fields=self._book_fields(name, author, cover, count))
+            self._book_ids.advance_to(new_id)
+            return True
+    
     # Add method to decrease count when borrowing:
     def decrease_book_count(self, book_id):
         """Decrease book count by 1"""
-        df = pd.read_csv(self.books_file)
-        idx = df[df['id'] == book_id].index
-        if len(idx) == 0:
-            return False
-        
-        idx = idx[0]
-        current_count = df.at[idx, 'count']
-        if current_count > 0:
-            df.at[idx, 'count'] = current_count - 1
-            df.to_csv(self.books_file, index=False)
+        with self._write_lock:
+            book = self.get_book_by_id(book_id)
+            if book is None or book['count'] <= 0:
+                return False
+            self._commit('update_book', id=int(book_id), fields={'count': int(book['count']) - 1})
             return True
-        return False
 
     # Add method to increase count when returning:
     def increase_book_count(self, book_id):
         """Increase book count by 1"""
-        df = pd.read_csv(self.books_file)
-        idx = df[df['id'] == book_id].index
-        if len(idx) == 0:
-            return False
-        
-        idx = idx[0]
-        df.at[idx, 'count'] = df.at[idx, 'count'] + 1
-        df.to_csv(self.books_file, index=False)
-        return True
+        with self._write_lock:
+            book = self.get_book_by_id(book_id)
+            if book is None:
+                return False
+            self._commit('update_book', id=int(book_id), fields={'count': int(book['count']) + 1})
+            return True
     
     def delete_book(self, book_id):
         """Delete book by ID"""
-        df = pd.read_csv(self.books_file)
-        
-        # Convert book_id to int for comparison
         book_id = int(book_id)
-        if len(df) > 0:
-            df['id'] = df['id'].astype(int)
-        
-        # Get image path before deleting
-        book = df[df['id'] == book_id]
-        if len(book) > 0:
-            image_path = book.iloc[0]['image_path']
-            
-            # Delete from dataframe
-            df = df[df['id'] != book_id]
-            df.to_csv(self.books_file, index=False)
-            
-            # Return image path for deletion
-            return image_path if pd.notna(image_path) and image_path else None
-        
-        return None
+        with self._write_lock:
+            book = self.get_book_by_id(book_id)
+            if book is None:
+                return None
+            self._commit('delete_book', id=book_id)
+        
+        # The cover blob stays until compaction finds it unreferenced
+        cover = book['cover']
+        return cover if pd.notna(cover) and cover else None
     
     def get_book_count(self):
         """Get total number of books using numpy"""
@@ -272,7 +1027,7 @@ class DatabaseManager:
     
     def get_user_stats(self):
         """Get user statistics using numpy"""
-        df = pd.read_csv(self.users_file)
+        df = self._read_csv(self.users_file)
         
         if len(df) == 0:
             return {'total': 0, 'admins': 0, 'users': 0}
@@ -293,7 +1048,7 @@ class DatabaseManager:
             return {'total': 0, 'with_images': 0}
         
         # Count books with images using numpy
-        has_image = df['image_path'].notna() & (df['image_path'] != '')
+        has_image = df['cover'].notna() & (df['cover'] != '')
         
         return {
             'total': int(np.int64(len(df))),
@@ -304,47 +1059,40 @@ class DatabaseManager:
     
     def add_to_cart(self, user_email, book_id):
         """Add book to user's cart"""
-        df = pd.read_csv(self.cart_file)
-        
-        # Check if already in cart
-        if self.is_in_cart(user_email, book_id):
-            return False  # Already exists
-        
-        new_item = pd.DataFrame([{
-            'user_email': user_email.lower(),
-            'book_id': book_id
-        }])
-        
-        df = pd.concat([df, new_item], ignore_index=True)
-        df.to_csv(self.cart_file, index=False)
+        with self._write_lock:
+            user_id = self._user_id(user_email)
+            if user_id is None:
+                return False
+            
+            # Check if already in cart
+            if self.is_in_cart(user_email, book_id):
+                return False  # Already exists
+            
+            self._commit('cart_add', user_id=user_id, book_id=int(book_id))
         return True
 
     def remove_from_cart(self, user_email, book_id):
         """Remove book from user's cart"""
-        df = pd.read_csv(self.cart_file)
+        user_id = self._user_id(user_email)
+        if user_id is None:
+            return False
         
-        # Remove the item
-        df = df[~((df['user_email'] == user_email.lower()) & (df['book_id'] == book_id))]
-        df.to_csv(self.cart_file, index=False)
+        self._commit('cart_remove', user_id=user_id, book_id=int(book_id))
         return True
 
     def is_in_cart(self, user_email, book_id):
         """Check if book is in user's cart"""
-        df = pd.read_csv(self.cart_file)
-        mask = (df['user_email'] == user_email.lower()) & (df['book_id'] == book_id)
-        return np.any(mask)
+        user_cart = self._user_rows(self.cart_file, self._user_id(user_email))
+        return bool(np.any(user_cart['book_id'] == book_id))
 
     def get_user_cart(self, user_email):
         """Get all cart items for a user with book details"""
-        cart_df = pd.read_csv(self.cart_file)
+        user_cart = self._user_rows(self.cart_file, self._user_id(user_email))
         books_df = self.get_all_books()
         
-        # Filter cart for this user
-        user_cart = cart_df[cart_df['user_email'] == user_email.lower()]
-        
         if len(user_cart) == 0:
             # Return empty DataFrame with correct columns matching books structure
-            return pd.DataFrame(columns=['id', 'name', 'author', 'image_path'])
+            return pd.DataFrame(columns=['id', 'name', 'author', 'cover'])
         
         # Get book IDs from cart
         book_ids = user_cart['book_id'].values
@@ -354,96 +1102,75 @@ class DatabaseManager:
         
         # Handle case where books were deleted but still in cart
         if len(cart_books) == 0:
-            return pd.DataFrame(columns=['id', 'name', 'author', 'image_path'])
+            return pd.DataFrame(columns=['id', 'name', 'author', 'cover'])
         
         return cart_books
     
     def get_cart_count(self, user_email):
-        """Get number of items in user's cart using numpy"""
-        df = pd.read_csv(self.cart_file)
-        user_cart = df[df['user_email'] == user_email.lower()]
-        return int(np.int64(len(user_cart)))
+        """Get number of items in user's cart"""
+        return len(self._user_rows(self.cart_file, self._user_id(user_email)))
 
     def clear_cart(self, user_email):
         """Clear all items from user's cart"""
-        df = pd.read_csv(self.cart_file)
-        df = df[df['user_email'] != user_email.lower()]
-        df.to_csv(self.cart_file, index=False)
+        user_id = self._user_id(user_email)
+        if user_id is None:
+            return False
+        
+        self._commit('cart_clear', user_id=user_id)
         return True
     
     # ==================== BORROWING OPERATIONS ====================
     
     def can_borrow_book(self, user_email):
         """Check if user can borrow more books (max 2)"""
-        df = pd.read_csv(self.borrowed_file)
-        user_borrowed = df[(df['user_email'] == user_email.lower()) & 
-                        (df['status'] == 'borrowed')]
-        return len(user_borrowed) < 2
+        return self.get_borrowed_count(user_email) < 2
     
     def is_book_borrowed_by_user(self, user_email, book_id):
         """Check if a specific user has borrowed a specific book and it's still active"""
-        df = pd.read_csv(self.borrowed_file)
-        borrowed = df[(df['user_email'] == user_email.lower()) & 
-                    (df['book_id'] == book_id) & 
-                    (df['status'] == 'borrowed')]
-        return len(borrowed) > 0
+        loans = self._user_rows(self.borrowed_file, self._user_id(user_email))
+        return bool(np.any((loans['book_id'] == book_id) & (loans['status'] == 'borrowed')))
 
     def user_has_borrowed_book(self, user_email, book_id):
         """Check if user has already borrowed this specific book"""
-        df = pd.read_csv(self.borrowed_file)
-        borrowed = df[(df['user_email'] == user_email.lower()) & 
-                    (df['book_id'] == book_id) & 
-                    (df['status'] == 'borrowed')]
-        return len(borrowed) > 0
+        return self.is_book_borrowed_by_user(user_email, book_id)
 
     def borrow_book(self, user_email, book_id):
         """Borrow a book"""
         from datetime import datetime, timedelta
         
-        if not self.can_borrow_book(user_email):
-            return {'success': False, 'message': 'You can only borrow maximum 2 books at a time!'}
-        
-        if self.user_has_borrowed_book(user_email, book_id):
-            return {'success': False, 'message': 'You have already borrowed this book!'}
-        
-        # Check if book is available
-        book = self.get_book_by_id(book_id)
-        if book is None or book.get('count', 0) <= 0:
-            return {'success': False, 'message': 'This book is currently not available!'}
-        
-        # Decrease book count
-        if not self.decrease_book_count(book_id):
-            return {'success': False, 'message': 'Failed to borrow book!'}
-        
-        df = pd.read_csv(self.borrowed_file)
-        
-        if 'collected' not in df.columns:
-            df['collected'] = False
-        if 'collection_date' not in df.columns:
-            df['collection_date'] = ''
-        if 'return_date' not in df.columns:
-            df['return_date'] = ''
-        
-        issue_date = datetime.now()
-        collection_deadline = issue_date + timedelta(days=3)
-        return_deadline = issue_date + timedelta(days=45)
-        
-        new_borrow = pd.DataFrame([{
-            'user_email': user_email.lower(),
-            'book_id': book_id,
-            'issue_date': issue_date.isoformat(),
-            'collection_deadline': collection_deadline.isoformat(),
-            'return_deadline': return_deadline.isoformat(),
-            'status': 'borrowed',
-            'collected': False,
-            'collection_date': '',
-            'return_date': ''
-        }])
-        
-        df = pd.concat([df, new_borrow], ignore_index=True)
-        df.to_csv(self.borrowed_file, index=False)
-        
-        self.remove_from_cart(user_email, book_id)
+        book_id = int(book_id)
+        with self._write_lock:
+            user_id = self._user_id(user_email)
+            if user_id is None:
+                return {'success': False, 'message': 'Unknown user!'}
+            
+            if not self.can_borrow_book(user_email):
+                return {'success': False, 'message': 'You can only borrow maximum 2 books at a time!'}
+            
+            if self.user_has_borrowed_book(user_email, book_id):
+                return {'success': False, 'message': 'You have already borrowed this book!'}
+            
+            # Check if book is available
+            book = self.get_book_by_id(book_id)
+            if book is None or book.get('count', 0) <= 0:
+                return {'success': False, 'message': 'This book is currently not available!'}
+            
+            issue_date = datetime.now()
+            collection_deadline = issue_date + timedelta(days=3)
+            return_deadline = issue_date + timedelta(days=45)
+            
+            # Loan row, decreased book count and cart removal as one operation
+            self._commit('borrow', count=int(book['count']) - 1, loan={
+                'user_id': user_id,
+                'book_id': book_id,
+                'issue_date': self._epoch(issue_date),
+                'collection_deadline': self._epoch(collection_deadline),
+                'return_deadline': self._epoch(return_deadline),
+                'status': 'borrowed',
+                'collected': False,
+                'collection_date': None,
+                'return_date': None
+            })
         
         return {
             'success': True, 
@@ -452,23 +1179,12 @@ class DatabaseManager:
         }
 
     def get_user_borrowed_books(self, user_email):
-        """Get all borrowed books for a user with book details"""
-        borrowed_df = pd.read_csv(self.borrowed_file)
+        """Get all borrowed books for a user with book details (dates as datetime64)"""
+        user_borrowed = self._user_loans(self._user_id(user_email), history=True)
         books_df = self.get_all_books()
         
-        # Add missing columns if they don't exist
-        if 'collected' not in borrowed_df.columns:
-            borrowed_df['collected'] = False
-        if 'collection_date' not in borrowed_df.columns:
-            borrowed_df['collection_date'] = ''
-        if 'return_date' not in borrowed_df.columns:
-            borrowed_df['return_date'] = ''
-        
-        # Filter borrowed books for this user
-        user_borrowed = borrowed_df[borrowed_df['user_email'] == user_email.lower()]
-        
         if len(user_borrowed) == 0:
-            return pd.DataFrame(columns=['id', 'name', 'author', 'image_path', 
+            return pd.DataFrame(columns=['id', 'name', 'author', 'cover', 
                                         'issue_date', 'collection_deadline', 
                                         'return_deadline', 'status', 'collected',
                                         'collection_date', 'return_date'])
@@ -477,7 +1193,7 @@ class DatabaseManager:
         merged = user_borrowed.merge(books_df, left_on='book_id', right_on='id', how='left')
         
         # Select and rename columns - include all new columns
-        result = merged[['id', 'name', 'author', 'image_path', 'issue_date', 
+        result = merged[['id', 'name', 'author', 'cover', 'issue_date', 
                         'collection_deadline', 'return_deadline', 'status', 
                         'collected', 'collection_date', 'return_date']]
         
@@ -488,54 +1204,54 @@ class DatabaseManager:
 
     def get_borrowed_count(self, user_email):
         """Get count of currently borrowed books"""
-        df = pd.read_csv(self.borrowed_file)
-        borrowed = df[(df['user_email'] == user_email.lower()) & 
-                    (df['status'] == 'borrowed')]
-        return int(np.int64(len(borrowed)))
+        loans = self._user_rows(self.borrowed_file, self._user_id(user_email))
+        return int(np.sum((loans['status'] == 'borrowed').values))
 
     def return_book(self, user_email, book_id):
         """Mark a book as returned (for admin use)"""
-        df = pd.read_csv(self.borrowed_file)
-        
-        # Find the borrowed record
-        mask = ((df['user_email'] == user_email.lower()) & 
-                (df['book_id'] == book_id) & 
-                (df['status'] == 'borrowed'))
-        
-        if not np.any(mask):
-            return False
-        
-        # Update status to returned
-        df.loc[mask, 'status'] = 'returned'
-        df.to_csv(self.borrowed_file, index=False)
+        book_id = int(book_id)
+        with self._write_lock:
+            user_id = self._user_id(user_email)
+            if user_id is None:
+                return False
+            
+            # Find the borrowed record
+            issue_dates = self._active_loan_dates(user_id, book_id)
+            if not issue_dates:
+                return False
+            
+            # Update status to returned
+            self._commit('return', user_id=user_id, book_id=book_id, issue_dates=issue_dates,
+                         date=None, count=None)
         return True
     
     # ==================== ADMIN BORROWING OPERATIONS ====================
 
     def get_all_borrowed_books(self):
-        """Get all borrowed books with user and book details for admin"""
-        borrowed_df = pd.read_csv(self.borrowed_file)
-        books_df = self.get_all_books()
-        users_df = self.get_all_users()
-        
-        if len(borrowed_df) == 0:
+        """Get all borrowed books, archived ones included, with user and book details for admin (dates as datetime64)"""
+        return self._loan_details(self._loans_table(history=True))
+
+    def _loan_details(self, loans_df):
+        """Join loans (dates as datetime64) with their book and borrower"""
+        if len(loans_df) == 0:
             return pd.DataFrame(columns=['user_email', 'user_name', 'book_id', 'name', 
-                                        'author', 'image_path', 'issue_date', 
+                                        'author', 'cover', 'issue_date', 
                                         'collection_deadline', 'return_deadline', 
-                                        'status', 'collected'])
+                                        'status', 'collected', 'collection_date',
+                                        'return_date'])
         
-        # Add collected column if not exists
-        if 'collected' not in borrowed_df.columns:
-            borrowed_df['collected'] = False
+        books_df = self.get_all_books()
+        users_df = self._table(self.users_file)
         
         # Merge with books data
-        merged = borrowed_df.merge(books_df, left_on='book_id', right_on='id', how='left')
+        merged = loans_df.merge(books_df, left_on='book_id', right_on='id', how='left')
         
-        # Merge with users data to get names
+        # Merge with users data to get emails and names
         merged = merged.merge(
-            users_df[['email', 'first_name', 'last_name']], 
-            left_on='user_email', 
-            right_on='email', 
+            users_df[['id', 'email', 'first_name', 'last_name']].rename(
+                columns={'id': 'user_id', 'email': 'user_email'}
+            ),
+            on='user_id', 
             how='left'
         )
         
@@ -544,72 +1260,123 @@ class DatabaseManager:
         
         # Select required columns
         result = merged[['user_email', 'user_name', 'book_id', 'name', 'author', 
-                        'image_path', 'issue_date', 'collection_deadline', 
-                        'return_deadline', 'status', 'collected']]
+                        'cover', 'issue_date', 'collection_deadline', 
+                        'return_deadline', 'status', 'collected',
+                        'collection_date', 'return_date']]
         
         # Sort by issue date (most recent first)
         result = result.sort_values('issue_date', ascending=False)
         
         return result
 
+    def get_loan_records(self, user_email=None, view="all"):
+        """Loans as LoanRecords (most recent first); view is all, pending, collected or returned.
+        
+        Pending and collected loans are all active, so only those views skip
+        the archive partitions.
+        """
+        history = view in ("all", "returned")
+        if user_email is None:
+            df = self._loan_details(self._loans_table(history=history))
+        else:
+            df = self._loan_details(self._user_loans(self._user_id(user_email), history=history))
+        
+        collected = df['collected'].fillna(False).astype(bool)
+        if view == "pending":
+            df = df[(df['status'] == 'borrowed') & ~collected]
+        elif view == "collected":
+            df = df[(df['status'] == 'borrowed') & collected]
+        elif view == "returned":
+            df = df[df['status'] == 'returned']
+        
+        return loan_records(df)
+
+    def get_member_records(self, users_df=None):
+        """Members (role User) as MemberRecords with active/total loan counts.
+        
+        Archived loans are counted per user from counts.json, so the archive
+        partitions are not read.
+        """
+        if users_df is None:
+            users_df = self.get_all_users()
+            users_df = users_df[users_df['role'] == 'User']
+        with self._io_lock:
+            borrowed_df = self._table(self.borrowed_file)
+            archived = self._archived_loans_per_user()
+        return member_records(users_df, borrowed_df, archived)
+
+    def get_member_record(self, user_email):
+        """One member as a MemberRecord (see get_member_records), or None"""
+        with self._io_lock:
+            users, index = self._index(self.users_file, 'email')
+            positions = index.get(user_email.lower())
+            if not positions:
+                return None
+            return self.get_member_records(users.iloc[positions[:1]])[0]
+
+    def get_borrowed_record(self, user_email, book_id):
+        """Get the most recent loan of a book by a user as a LoanRecord.
+        
+        A user's open loan of a book is newer than any returned one, so the
+        archive partitions are only read when the book is not on loan.
+        """
+        user_id = self._user_id(user_email)
+        for history in (False, True):
+            loans = self._user_loans(user_id, history=history)
+            loans = loans[loans['book_id'] == book_id]
+            if len(loans) > 0:
+                record = self._loan_details(loans)
+                return loan_records(record.iloc[:1])[0]
+        return None
+
     def mark_book_collected(self, user_email, book_id):
         """Mark a borrowed book as collected by user"""
         from datetime import datetime
         
-        df = pd.read_csv(self.borrowed_file)
-        
-        # Add collected column if not exists
-        if 'collected' not in df.columns:
-            df['collected'] = False
-        
-        # Add collection_date column if not exists
-        if 'collection_date' not in df.columns:
-            df['collection_date'] = ''
-        
-        # Find the borrowed record
-        mask = ((df['user_email'] == user_email.lower()) & 
-                (df['book_id'] == book_id) & 
-                (df['status'] == 'borrowed'))
-        
-        if not np.any(mask):
-            return False
-        
-        # Update collected status and date
-        df.loc[mask, 'collected'] = True
-        df.loc[mask, 'collection_date'] = datetime.now().isoformat()
-        df.to_csv(self.borrowed_file, index=False)
+        book_id = int(book_id)
+        with self._write_lock:
+            user_id = self._user_id(user_email)
+            if user_id is None:
+                return False
+            
+            # Find the borrowed record
+            issue_dates = self._active_loan_dates(user_id, book_id)
+            if not issue_dates:
+                return False
+            
+            # Update collected status and date
+            self._commit('collect', user_id=user_id, book_id=book_id, issue_dates=issue_dates,
+                         date=self._epoch(datetime.now()))
         return True
 
     def mark_book_returned(self, user_email, book_id):
         """Mark a borrowed book as returned"""
         from datetime import datetime
         
-        df = pd.read_csv(self.borrowed_file)
-        
-        if 'return_date' not in df.columns:
-            df['return_date'] = ''
-        
-        mask = ((df['user_email'] == user_email.lower()) & 
-                (df['book_id'] == book_id) & 
-                (df['status'] == 'borrowed'))
-        
-        if not np.any(mask):
-            return False
-        
-        df.loc[mask, 'status'] = 'returned'
-        df.loc[mask, 'return_date'] = datetime.now().isoformat()
-        df.to_csv(self.borrowed_file, index=False)
-        
-        # Increase book count
-        self.increase_book_count(book_id)
-        
+        book_id = int(book_id)
+        with self._write_lock:
+            user_id = self._user_id(user_email)
+            if user_id is None:
+                return False
+            
+            issue_dates = self._active_loan_dates(user_id, book_id)
+            if not issue_dates:
+                return False
+            
+            # Status, return date and increased book count as one operation
+            book = self.get_book_by_id(book_id)
+            count = None if book is None else int(book['count']) + 1
+            self._commit('return', user_id=user_id, book_id=book_id, issue_dates=issue_dates,
+                         date=self._epoch(datetime.now()), count=count)
         return True
 
     def get_borrowed_stats(self):
         """Get borrowing statistics for admin"""
-        df = pd.read_csv(self.borrowed_file)
+        df = self._table(self.borrowed_file)
+        # Archived loans are only counted (see _archive_rows), never loaded
+        archived = sum(self._archive_rows(path) for path in self._archive_paths())
         
-        if len(df) == 0:
+        if len(df) + archived == 0:
             return {
                 'total_borrowed': 0,
                 'active_borrowed': 0,
@@ -618,16 +1385,12 @@ class DatabaseManager:
                 'returned': 0
             }
         
-        # Add collected column if not exists
-        if 'collected' not in df.columns:
-            df['collected'] = False
-        
         active = df[df['status'] == 'borrowed']
         
         return {
-            'total_borrowed': int(np.int64(len(df))),
+            'total_borrowed': int(np.int64(len(df) + archived)),
             'active_borrowed': int(np.int64(len(active))),
             'pending_collection': int(np.sum((active['collected'] == False).values)),
             'collected': int(np.sum((active['collected'] == True).values)),
-            'returned': int(np.int64(len(df[df['status'] == 'returned'])))
+            'returned': int(np.int64(archived + len(df[df['status'] == 'returned'])))
         }
\ No newline at end of file
@@ -0,0 +1,117 @@
+import sys
+import threading
+import tkinter as tk
+from collections import deque
+
+
+class EventBus:
+    """Change events from DatabaseManager to the open pages.
+
+    publish() may be called from any thread (journal replay, background
+    compaction); it only queues the event, and only if somebody subscribed
+    to it. Once attach(root) has run, queued events are delivered on the Tk
+    thread: at the next idle moment when published from that thread,
+    otherwise by a short poll. Identical events queued between two
+    deliveries are delivered once.
+
+    Events published by DatabaseManager:
+        user_created(email)
+        book_updated(book_id)         catalogue entry added, edited or deleted
+        cart_changed(email, book_id)  book_id is None when the cart was cleared
+        loan_changed(email, book_id)  borrowed, collected or returned; a borrow is followed by
+                                      cart_changed and book_updated, a return that restocks
+                                      the book by book_updated
+        data_reloaded(tables)         tables re-read wholesale (another terminal checkpointed,
+                                      or a book was re-keyed); pages redraw rather than patch
+    """
+
+    POLL_MS = 100
+
+    def __init__(self):
+        self._subscribers = {}  # event -> [(callback, owner widget or None)]
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._root = None
+        self._thread = None
+        self._idle_id = None
+
+    def attach(self, root):
+        """Deliver events on root's event loop; call from the Tk thread"""
+        self._root = root
+        self._thread = threading.get_ident()
+        self._poll()
+
+    def subscribe(self, event, callback, owner=None):
+        """Call callback(*args) for every event; dropped once owner (a widget) is destroyed.
+
+        Returns a function that unsubscribes again.
+        """
+        with self._lock:
+            self._prune()
+            self._subscribers.setdefault(event, []).append((callback, owner))
+        return lambda: self.unsubscribe(event, callback)
+
+    def unsubscribe(self, event, callback):
+        with self._lock:
+            entries = self._subscribers.get(event, [])
+            self._subscribers[event] = [entry for entry in entries if entry[0] != callback]
+
+    def publish(self, event, *args):
+        with self._lock:
+            if not self._subscribers.get(event):
+                return
+            self._queue.append((event, args))
+        if (self._root is not None and self._idle_id is None
+                and threading.get_ident() == self._thread):
+            try:
+                self._idle_id = self._root.after_idle(self.dispatch)
+            except tk.TclError:
+                # Root already destroyed
+                pass
+
+    def dispatch(self):
+        """Deliver every queued event now (Tk thread only)"""
+        self._idle_id = None
+        batch = []
+        seen = set()
+        while self._queue:
+            item = self._queue.popleft()
+            if item not in seen:
+                seen.add(item)
+                batch.append(item)
+
+        for event, args in batch:
+            with self._lock:
+                entries = list(self._subscribers.get(event, ()))
+            for callback, owner in entries:
+                if owner is not None and not _alive(owner):
+                    continue
+                try:
+                    callback(*args)
+                except Exception:
+                    # Same treatment as an exception in any other Tk callback
+                    if self._root is None:
+                        raise
+                    self._root.report_callback_exception(*sys.exc_info())
+
+    def _poll(self):
+        if self._queue:
+            self.dispatch()
+        try:
+            self._root.after(self.POLL_MS, self._poll)
+        except tk.TclError:
+            pass
+
+    def _prune(self):
+        """Forget subscriptions whose owner widget is gone"""
+        for event, entries in self._subscribers.items():
+            self._subscribers[event] = [
+                entry for entry in entries if entry[1] is None or _alive(entry[1])
+            ]
+
+
+def _alive(widget):
+    try:
+        return bool(widget.winfo_exists())
+    except tk.TclError:
+        return False
@@ -0,0 +1,75 @@
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """Exclusive advisory lock on a side file, shared by every process using the data directory.
+
+    Re-entrant within a process, so a locked method may call another one.
+    Uses flock() on POSIX and msvcrt.locking() on Windows.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._handle = None
+        self._owner = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                self._handle = open(self.path, "a+")
+                self._lock(self._handle)
+            except Exception:
+                if self._handle is not None:
+                    self._handle.close()
+                    self._handle = None
+                self._thread_lock.release()
+                raise
+            self._owner = threading.get_ident()
+        self._depth += 1
+        return self
+
+    @property
+    def held(self):
+        """True if the calling thread holds the lock"""
+        return self._owner == threading.get_ident()
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0:
+            handle = self._handle
+            self._handle = None
+            self._owner = None
+            try:
+                self._unlock(handle)
+            finally:
+                handle.close()
+        self._thread_lock.release()
+
+    def _lock(self, handle):
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            return
+        handle.seek(0)
+        while True:
+            try:
+                # LK_LOCK retries for ~10 seconds, then raises
+                msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+
+    def _unlock(self, handle):
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,46 @@
+import os
+from pathlib import Path
+
+
+class IdSequence:
+    """Persisted, monotonic id counter.
+
+    The last issued id lives in a one-line file; allocation is a locked
+    read-increment-write of that file, so admin terminals sharing the data
+    directory never hand out the same id and no table scan is needed.
+    seed() supplies the starting value when the file does not exist yet.
+    """
+
+    def __init__(self, path, lock, seed):
+        self.path = Path(path)
+        self.lock = lock
+        self.seed = seed
+
+    def current(self):
+        """Last issued id"""
+        with self.lock:
+            return self._read()
+
+    def next(self):
+        """Allocate and persist the next id"""
+        with self.lock:
+            value = self._read() + 1
+            self._write(value)
+            return value
+
+    def advance_to(self, value):
+        """Make sure the sequence never issues value or anything below it"""
+        with self.lock:
+            if value > self._read():
+                self._write(value)
+
+    def _read(self):
+        try:
+            return int(self.path.read_text().strip())
+        except (OSError, ValueError):
+            return int(self.seed())
+
+    def _write(self, value):
+        temp = self.path.with_suffix(".tmp")
+        temp.write_text(f"{value}\n")
+        os.replace(temp, self.path)
@@ -0,0 +1,193 @@
+import os
+import sys
+import time
+import threading
+import functools
+from pathlib import Path
+
+
+# Directories whose frames count as "UI actions" when attributing database calls
+UI_DIRS = ("admin", "user")
+UI_FILES = ("main.py",)
+
+
+class DatabaseInstrumentation:
+    """Records wall time and CSV I/O for every DatabaseManager call"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.started_at = time.time()
+        # (method, ui_action) -> aggregated counters
+        self.method_stats = {}
+        # ui_action -> aggregated counters for top-level calls only
+        self.action_stats = {}
+
+    # ==================== WIRING ====================
+
+    def attach(self, db):
+        """Wrap every public method of a DatabaseManager instance"""
+        for name in dir(type(db)):
+            if name.startswith("_"):
+                continue
+            method = getattr(db, name)
+            if callable(method):
+                setattr(db, name, self._wrap(name, method))
+
+    def _wrap(self, name, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            stack = self._stack()
+            call = {
+                'reads': 0, 'writes': 0,
+                'bytes_read': 0, 'bytes_written': 0,
+            }
+            top_level = len(stack) == 0
+            action = self._ui_action() if top_level else stack[0]['action']
+            call['action'] = action
+            stack.append(call)
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                stack.pop()
+                self._record(name, call, elapsed, top_level)
+        return wrapper
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    # ==================== I/O HOOKS ====================
+
+    def record_read(self, path):
+        """Count a full CSV read on every active call"""
+        size = _file_size(path)
+        for call in self._stack():
+            call['reads'] += 1
+            call['bytes_read'] += size
+
+    def record_write(self, path):
+        """Count a full CSV write on every active call"""
+        size = _file_size(path)
+        for call in self._stack():
+            call['writes'] += 1
+            call['bytes_written'] += size
+
+    def record_append(self, path, size):
+        """Count a journal append of size bytes on every active call"""
+        for call in self._stack():
+            call['writes'] += 1
+            call['bytes_written'] += size
+
+    # ==================== AGGREGATION ====================
+
+    def _record(self, name, call, elapsed, top_level):
+        action = call['action']
+        with self._lock:
+            _accumulate(self.method_stats.setdefault((name, action), _empty()), call, elapsed)
+            if top_level:
+                _accumulate(self.action_stats.setdefault(action, _empty()), call, elapsed)
+
+    def _ui_action(self):
+        """Find the nearest UI frame (admin/, user/ or main.py) on the call stack"""
+        frame = sys._getframe(2)
+        while frame is not None:
+            path = Path(frame.f_code.co_filename)
+            if path.name in UI_FILES or path.parent.name in UI_DIRS:
+                qualname = getattr(frame.f_code, "co_qualname", frame.f_code.co_name)
+                where = path.name if path.name in UI_FILES else f"{path.parent.name}/{path.name}"
+                return f"{where}:{qualname}"
+            frame = frame.f_back
+        return "<no ui>"
+
+    def reset(self):
+        """Drop all collected statistics"""
+        with self._lock:
+            self.method_stats.clear()
+            self.action_stats.clear()
+            self.started_at = time.time()
+
+    def summary_by_method(self):
+        """Aggregate statistics per DatabaseManager method"""
+        with self._lock:
+            items = list(self.method_stats.items())
+        totals = {}
+        for (name, _action), stats in items:
+            _merge(totals.setdefault(name, _empty()), stats)
+        return totals
+
+    def format_report(self):
+        """Build a plain-text report sorted by total wall time"""
+        by_method = self.summary_by_method()
+        with self._lock:
+            by_action = {k: dict(v) for k, v in self.action_stats.items()}
+            by_pair = {k: dict(v) for k, v in self.method_stats.items()}
+
+        lines = [
+            f"DatabaseManager instrumentation ({time.time() - self.started_at:.0f}s window)",
+            "",
+            "Per method (inclusive of nested calls):",
+            _header(),
+        ]
+        for name, stats in _sorted(by_method):
+            lines.append(_row(name, stats))
+
+        lines += ["", "Per UI action (top-level calls only):", _header()]
+        for action, stats in _sorted(by_action):
+            lines.append(_row(action, stats))
+
+        lines += ["", "Hot paths (method <- UI action):", _header()]
+        for (name, action), stats in _sorted(by_pair)[:25]:
+            lines.append(_row(f"{name} <- {action}", stats))
+        return "\n".join(lines)
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _empty():
+    return {
+        'calls': 0, 'total_s': 0.0, 'max_s': 0.0,
+        'reads': 0, 'writes': 0, 'bytes_read': 0, 'bytes_written': 0,
+    }
+
+
+def _accumulate(stats, call, elapsed):
+    stats['calls'] += 1
+    stats['total_s'] += elapsed
+    stats['max_s'] = max(stats['max_s'], elapsed)
+    for key in ('reads', 'writes', 'bytes_read', 'bytes_written'):
+        stats[key] += call[key]
+
+
+def _merge(target, stats):
+    target['calls'] += stats['calls']
+    target['total_s'] += stats['total_s']
+    target['max_s'] = max(target['max_s'], stats['max_s'])
+    for key in ('reads', 'writes', 'bytes_read', 'bytes_written'):
+        target[key] += stats[key]
+
+
+def _sorted(stats):
+    return sorted(stats.items(), key=lambda item: item[1]['total_s'], reverse=True)
+
+
+def _header():
+    return (f"{'name':<60} {'calls':>7} {'total ms':>10} {'avg ms':>8} {'max ms':>8} "
+            f"{'reads':>7} {'writes':>7} {'KB read':>10} {'KB written':>10}")
+
+
+def _row(name, stats):
+    calls = max(stats['calls'], 1)
+    return (f"{name[:60]:<60} {stats['calls']:>7} {stats['total_s'] * 1000:>10.1f} "
+            f"{stats['total_s'] * 1000 / calls:>8.2f} {stats['max_s'] * 1000:>8.2f} "
+            f"{stats['reads']:>7} {stats['writes']:>7} "
+            f"{stats['bytes_read'] / 1024:>10.1f} {stats['bytes_written'] / 1024:>10.1f}")
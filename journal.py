@@ -0,0 +1,153 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+
+logger = logging.getLogger("libraease.journal")
+
+
+class Journal:
+    """Append-only log of logical mutations (one JSON object per line) since the last checkpoint.
+
+    The first line is a header carrying a generation token; reset() starts a
+    new generation after the tables have been checkpointed, so readers that
+    tail the file notice when it has been emptied under them. Each append is
+    flushed to the OS at once, while fsync is batched: at most one per
+    sync_interval seconds, with a timer covering the end of a burst.
+    Cross-process exclusion is the caller's job (DatabaseManager holds the
+    data directory lock around appends and resets).
+    """
+
+    def __init__(self, path, sync_interval=0.05):
+        self.path = Path(path)
+        self.sync_interval = sync_interval
+        self._lock = threading.RLock()
+        self._handle = None
+        self._last_sync = 0.0
+        self._timer = None
+
+    # ==================== READING ====================
+
+    def size(self):
+        try:
+            return os.stat(self.path).st_size
+        except FileNotFoundError:
+            return 0
+
+    def header(self):
+        """Generation token of the current journal, or None if there is none"""
+        try:
+            with open(self.path, "rb") as handle:
+                line = handle.readline()
+        except FileNotFoundError:
+            return None
+        try:
+            return json.loads(line)['generation']
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    def read(self, offset=0):
+        """Complete records after offset, and the offset just past the last one.
+
+        Only an unterminated final line counts as torn (a crash mid-append):
+        reading stops before it. A newline-terminated line that does not
+        parse is logged and skipped, so the records after it are still
+        read and the returned offset never stops short of them.
+        """
+        try:
+            with open(self.path, "rb") as handle:
+                handle.seek(offset)
+                data = handle.read()
+        except FileNotFoundError:
+            return [], offset
+
+        records = []
+        position = 0
+        while True:
+            end = data.find(b"\n", position)
+            if end < 0:
+                break
+            line = data[position:end]
+            position = end + 1
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.error("skipping unreadable journal line at byte %d of %s",
+                             offset + position - len(line) - 1, self.path)
+                continue
+            if isinstance(record, dict) and 'op' in record:
+                records.append(record)
+        return records, offset + position
+
+    # ==================== WRITING ====================
+
+    def append(self, record):
+        """Append one record; returns the number of bytes written"""
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode()
+        with self._lock:
+            handle = self._open()
+            handle.write(line)
+            handle.flush()
+            if time.monotonic() - self._last_sync >= self.sync_interval:
+                self._fsync()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.sync_interval, self.sync)
+                self._timer.daemon = True
+                self._timer.start()
+        return len(line)
+
+    def truncate(self, offset):
+        """Cut a torn tail left by a crashed writer.
+
+        Refuses (ValueError) if anything past offset is newline-terminated:
+        that is a committed record, not a torn one.
+        """
+        with self._lock:
+            with open(self.path, "r+b") as handle:
+                handle.seek(offset)
+                if b"\n" in handle.read():
+                    raise ValueError(f"{self.path}: complete records after byte {offset}, not truncating")
+                handle.truncate(offset)
+                os.fsync(handle.fileno())
+
+    def reset(self):
+        """Empty the journal and start a new generation; returns the new token"""
+        generation = uuid.uuid4().hex
+        header = (json.dumps({'generation': generation}) + "\n").encode()
+        with self._lock:
+            self.sync()
+            # Truncate in place (rather than replace) so open append handles stay valid
+            with open(self.path, "wb") as handle:
+                handle.write(header)
+                handle.flush()
+                os.fsync(handle.fileno())
+        return generation
+
+    def sync(self):
+        """fsync appended records now"""
+        with self._lock:
+            if self._handle is not None:
+                self._fsync()
+
+    def close(self):
+        with self._lock:
+            self.sync()
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+
+    def _open(self):
+        if self._handle is None:
+            self._handle = open(self.path, "ab")
+        return self._handle
+
+    def _fsync(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        os.fsync(self._handle.fileno())
+        self._last_sync = time.monotonic()
@@ -2,7 +2,12 @@ import tkinter as tk
 from tkinter import ttk
 from admin.styled_message_box import StyledMessageBox
 from database import DatabaseManager
+from compaction import CompactionThread
+from watcher import DataWatcher
+from cover_loader import CoverLoader
+from ui_monitor import EventLoopMonitor, show_report_window
 import os
+import threading
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -18,6 +23,10 @@ class LibraryManagementSystem:
         # Admin passkey
         self.ADMIN_PASSKEY = os.getenv("ADMIN_PASSKEY")
         self.db = DatabaseManager()
+        # Change events reach the pages on this event loop
+        self.db.events.attach(self.root)
+        # Catalogue cards decode their covers in the background
+        self.covers = CoverLoader(self.root, self.db.images)
         # Data files
         self.users_file = "users.json"
 
@@ -31,9 +40,32 @@ class LibraryManagementSystem:
         self.APP_BG = "#0f172a"  # slate-900 tone
         self.root.configure(bg=self.APP_BG)
 
+        # Event-loop monitor and Debug menu (LIBRAEASE_DEBUG=1)
+        self.monitor = None
+        self.debug_menu_bar = None
+        if os.getenv("LIBRAEASE_DEBUG", "").lower() in ("1", "true", "yes"):
+            self.init_debug_tools()
+
         # Show welcome screen
         self.show_welcome_screen()
 
+        # Warm up heavy imports and tables once the welcome screen has painted
+        self.warm_up_thread = None
+        self.root.after(300, self.start_warm_up)
+
+        # Background compaction of the data directory (LIBRAEASE_COMPACT_MINUTES, 0 = off)
+        self.compaction = None
+        compact_minutes = float(os.getenv("LIBRAEASE_COMPACT_MINUTES", "30"))
+        if compact_minutes > 0:
+            self.compaction = CompactionThread(self.db, compact_minutes * 60)
+            self.compaction.start()
+
+        # Pick up other terminals' changes as they happen (LIBRAEASE_WATCH=0 turns it off)
+        self.watcher = None
+        if os.getenv("LIBRAEASE_WATCH", "1").lower() not in ("0", "false", "no"):
+            self.watcher = DataWatcher(self.db)
+            self.watcher.start()
+
     def center_window(self, width, height):
         screen_width = self.root.winfo_screenwidth()
         screen_height = self.root.winfo_screenheight()
@@ -44,8 +76,64 @@ class LibraryManagementSystem:
     def init_data_files(self):
         pass
 
+    def start_warm_up(self):
+        """Preload heavy modules and tables in the background while the user logs in"""
+        if self.warm_up_thread is not None:
+            return
+        self.warm_up_thread = threading.Thread(target=self.warm_up, name="warm-up", daemon=True)
+        self.warm_up_thread.start()
+
+    def warm_up(self):
+        # Imports only - no Tcl calls happen off the main thread
+        try:
+            import PIL.Image
+            import PIL.ImageTk
+            import matplotlib.pyplot
+            import matplotlib.figure
+            import matplotlib.backends.backend_tkagg
+            import admin.manage_book
+            import admin.members
+            import admin.admin_issue_return
+            import admin.analysis
+            import user.book
+        except ImportError:
+            pass
+        self.db.warm_up()
+
+    def init_debug_tools(self):
+        threshold = int(os.getenv("LIBRAEASE_SLOW_CALLBACK_MS", "100"))
+        self.monitor = EventLoopMonitor(self.root, threshold_ms=threshold).start()
+
+        self.debug_menu_bar = tk.Menu(self.root)
+        debug_menu = tk.Menu(self.debug_menu_bar, tearoff=0)
+        debug_menu.add_command(
+            label="Page render times…",
+            command=lambda: show_report_window(self.root, "Page Render Times", self.monitor.format_render_report)
+        )
+        debug_menu.add_command(
+            label="Event loop & slow callbacks…",
+            command=lambda: show_report_window(self.root, "Event Loop", self.monitor.format_loop_report)
+        )
+        debug_menu.add_command(label="Database I/O report…", command=self.show_db_report)
+        debug_menu.add_separator()
+        debug_menu.add_command(label="Reset statistics", command=self.reset_debug_stats)
+        self.debug_menu_bar.add_cascade(label="Debug", menu=debug_menu)
+        self.root.config(menu=self.debug_menu_bar)
+
+    def show_db_report(self):
+        # Turn DB instrumentation on lazily so the menu works without LIBRAEASE_INSTRUMENT
+        instrumentation = self.db.instrumentation or self.db.enable_instrumentation()
+        show_report_window(self.root, "Database I/O", instrumentation.format_report)
+
+    def reset_debug_stats(self):
+        self.monitor.reset()
+        if self.db.instrumentation is not None:
+            self.db.instrumentation.reset()
+
     def clear_window(self):
         for widget in self.root.winfo_children():
+            if widget is self.debug_menu_bar:
+                continue
             widget.destroy()
 
     def create_background(self, parent):
@@ -435,7 +523,10 @@ class LibraryManagementSystem:
                 StyledMessageBox.show_error(self.root, "Error", "Email already exists! Please log in.")
                 return
 
-            self.db.create_user(email, first_name, last_name, password, role)
+            if not self.db.create_user(email, first_name, last_name, password, role):
+                # Registered from another terminal since the check above
+                StyledMessageBox.show_error(self.root, "Error", "Email already exists! Please log in.")
+                return
 
             # Set current user
             self.current_user = {
@@ -0,0 +1,177 @@
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+
+SCHEMA_FILE = "schema.json"
+
+# Loan dates are stored as int64 seconds since 1970-01-01 in local wall-clock time
+LOAN_DATE_COLUMNS = ('issue_date', 'collection_deadline', 'return_deadline', 'collection_date', 'return_date')
+
+
+# ==================== MIGRATION STEPS ====================
+# Each step upgrades the CSV files from the previous version. Steps read the
+# raw files (no pinned dtypes) because they run before the layout is current.
+
+def _add_loan_tracking_columns(db):
+    """v1: borrowed.csv gains collected / collection_date / return_date"""
+    df = pd.read_csv(db.borrowed_file)
+    if 'collected' not in df.columns:
+        df['collected'] = False
+    df['collected'] = df['collected'].fillna(False).astype(bool)
+    for column in ('collection_date', 'return_date'):
+        if column not in df.columns:
+            df[column] = pd.NA
+    db._write_csv(df, db.borrowed_file)
+
+
+def _loan_dates_to_epoch(db):
+    """v2: ISO date strings in borrowed.csv become int64 epoch seconds"""
+    df = pd.read_csv(db.borrowed_file, dtype=str)
+    for column in LOAN_DATE_COLUMNS:
+        values = df[column]
+        epoch = pd.to_numeric(values, errors='coerce')
+        iso = values.notna() & epoch.isna()
+        if iso.any():
+            parsed = pd.to_datetime(values[iso], errors='coerce', format='ISO8601').dropna()
+            # Independent of the datetime unit pandas picked while parsing
+            seconds = (parsed - pd.Timestamp(0)) // pd.Timedelta(seconds=1)
+            epoch = epoch.mask(iso, seconds.reindex(values.index))
+        df[column] = epoch.astype('Int64')
+    df['collected'] = df['collected'].map({'True': True, 'False': False}).fillna(False).astype(bool)
+    df['book_id'] = pd.to_numeric(df['book_id'])
+    db._write_csv(df, db.borrowed_file)
+
+
+def _user_ids(db):
+    """v3: users get an integer id; cart.csv and borrowed.csv reference it instead of the email"""
+    users = pd.read_csv(db.users_file)
+    if 'id' not in users.columns:
+        users.insert(0, 'id', range(1, len(users) + 1))
+        db._write_csv(users, db.users_file)
+    ids = dict(zip(users['email'].str.lower(), users['id']))
+
+    dtypes = {column: 'Int64' for column in LOAN_DATE_COLUMNS}
+    for path, dtype in ((db.cart_file, None), (db.borrowed_file, dtypes)):
+        df = pd.read_csv(path, dtype=dtype)
+        if 'user_email' not in df.columns:
+            continue
+        user_id = df.pop('user_email').str.lower().map(ids).astype('Int64')
+        df.insert(0, 'user_id', user_id)
+        if path == db.cart_file:
+            # Cart rows of deleted users are dropped; their loans are kept for the history
+            df = df[df['user_id'].notna()]
+        db._write_csv(df, path)
+
+
+def _archive_returned_loans(db):
+    """v4: returned loans move from borrowed.csv to per-year partitions in loans_archive/"""
+    dtypes = {'user_id': 'Int64', **{column: 'Int64' for column in LOAN_DATE_COLUMNS}}
+    df = pd.read_csv(db.borrowed_file, dtype=dtypes)
+    returned = (df['status'] == 'returned') & df['issue_date'].notna()
+    archived = df[returned]
+    years = pd.to_datetime(archived['issue_date'], unit='s').dt.year
+    for year, rows in archived.groupby(years):
+        path = db._partition_path(int(year))
+        if path.exists():
+            # Left by an interrupted run of this step
+            rows = pd.concat([pd.read_csv(path, dtype=dtypes), rows], ignore_index=True)
+            rows = rows.drop_duplicates(['user_id', 'book_id', 'issue_date'])
+        db._write_csv(rows, path)
+    db._write_csv(df[~returned], db.borrowed_file)
+
+
+def _cover_store(db):
+    """v5: cover files move into the content-addressed image store; books.csv keeps their key in 'cover'"""
+    # Journaled book edits name the old column, so fold them into books.csv first
+    db.checkpoint()
+    books = pd.read_csv(db.books_file, dtype={'image_path': str})
+    if 'image_path' not in books.columns:
+        return
+    covers = []
+    imported = []
+    for path in books['image_path']:
+        key = ''
+        if isinstance(path, str) and path and os.path.exists(path):
+            try:
+                key = db.images.put(path)
+                imported.append(Path(path))
+            except ValueError:
+                # Unreadable file: the book simply loses its cover
+                pass
+        covers.append(key)
+    books.insert(books.columns.get_loc('image_path'), 'cover', covers)
+    db._write_csv(books.drop(columns=['image_path']), db.books_file)
+    
+    # Loose files in the app's own image folder (and their renditions) are now duplicates
+    images_dir = db.images_dir.resolve()
+    for path in imported:
+        if path.resolve().parent == images_dir:
+            for loose in path.parent.glob(f"{path.stem}.*"):
+                loose.unlink(missing_ok=True)
+
+
+def _cover_previews(db):
+    """v6: books.csv gains cover_preview, a few-pixel placeholder of each cover"""
+    # Books still in the journal would otherwise come back without one
+    db.checkpoint()
+    books = pd.read_csv(db.books_file, dtype={'cover': str})
+    if 'cover_preview' in books.columns:
+        return
+    previews = [db.images.preview(cover) for cover in books['cover']]
+    books.insert(books.columns.get_loc('cover') + 1, 'cover_preview', previews)
+    db._write_csv(books, db.books_file)
+
+
+# (version, description, step) in order; append new steps at the end
+MIGRATIONS = [
+    (1, "loan collection/return columns", _add_loan_tracking_columns),
+    (2, "loan dates as epoch seconds", _loan_dates_to_epoch),
+    (3, "integer user ids in cart and loans", _user_ids),
+    (4, "returned loans archived by year", _archive_returned_loans),
+    (5, "covers in the content-addressed image store", _cover_store),
+    (6, "cover placeholders", _cover_previews),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+# ==================== RUNNER ====================
+
+def read_version(data_dir):
+    """Schema version recorded in data/schema.json (0 for files that predate it)"""
+    try:
+        with open(data_dir / SCHEMA_FILE) as handle:
+            return int(json.load(handle)['version'])
+    except (OSError, ValueError, KeyError):
+        return 0
+
+
+def write_version(data_dir, version):
+    """Record the version through a temp file, so readers never see schema.json empty"""
+    path = data_dir / SCHEMA_FILE
+    temp = path.with_name(path.name + ".tmp")
+    with open(temp, "w") as handle:
+        json.dump({'version': version}, handle)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temp, path)
+
+
+def migrate(db):
+    """Apply every pending step once and record the new version after each.
+
+    Runs under the data directory lock, so when several terminals start
+    together one migrates and the others find the new version on disk.
+    """
+    with db._write_lock:
+        version = read_version(db.data_dir)
+        for target, description, step in MIGRATIONS:
+            if target <= version:
+                continue
+            step(db)
+            write_version(db.data_dir, target)
+            version = target
+    return version
@@ -0,0 +1,153 @@
+from datetime import datetime
+
+import pandas as pd
+
+
+class Record:
+    """Slot-based row with dict-style access, so pages can use rec.name or rec['name']"""
+
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class LoanRecord(Record):
+    """One loan with dates already parsed (datetime or None) and deadline fields pre-computed"""
+
+    __slots__ = (
+        'user_email', 'user_name', 'book_id', 'name', 'author', 'cover',
+        'status', 'collected', 'issue_date', 'collection_deadline',
+        'return_deadline', 'collection_date', 'return_date',
+        'days_left', 'late_days', 'overdue', 'fine',
+    )
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    @property
+    def due_text(self):
+        """'N days left', or 'N days overdue' with the fine so far, for an open loan"""
+        if not self.overdue:
+            return f"{self.days_left} days left"
+        if self.fine:
+            return f"{self.late_days} days overdue, fine ₹{self.fine}"
+        return f"{self.late_days} days overdue"
+
+
+class MemberRecord(Record):
+    """One member with loan counters"""
+
+    __slots__ = ('email', 'first_name', 'last_name', 'full_name', 'active_count', 'total_count')
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+
+# ==================== BUILDERS ====================
+
+# Late return fine in rupees per day after the return deadline
+FINE_PER_DAY = 2
+
+
+def _dates(series):
+    """datetime64 column as a list of datetimes, with NaT as None"""
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def _text(series):
+    """Column as a list of str, with NaN (empty CSV cells) as None"""
+    return [None if pd.isna(value) else value for value in series.tolist()]
+
+
+def deadline_fields(df, now=None):
+    """Days left, days late, overdue flag and fine for every loan in one vectorized pass.
+
+    Returned loans are measured at their return date, open loans at now;
+    fines only accrue once the book has been collected.
+    """
+    now = pd.Timestamp(now or datetime.now())
+    end = df['return_date'].where(df['status'] == 'returned', now)
+    days_left = (df['return_deadline'] - end).dt.days
+    late_days = (-days_left).clip(lower=0).fillna(0).astype(int)
+    collected = df['collected'].fillna(False).astype(bool)
+    overdue = (df['status'] == 'borrowed') & (late_days > 0)
+    fine = late_days.where(collected, 0) * FINE_PER_DAY
+    return days_left, late_days, overdue, fine
+
+
+def loan_records(df, now=None):
+    """Build LoanRecords column-wise from a get_all_borrowed_books() frame"""
+    if len(df) == 0:
+        return []
+
+    days_left, late_days, overdue, fine = deadline_fields(df, now)
+
+    columns = (
+        df['user_email'].tolist(),
+        df['user_name'].tolist(),
+        df['book_id'].tolist(),
+        df['name'].tolist(),
+        df['author'].tolist(),
+        _text(df['cover']),
+        df['status'].tolist(),
+        df['collected'].fillna(False).astype(bool).tolist(),
+        _dates(df['issue_date']),
+        _dates(df['collection_deadline']),
+        _dates(df['return_deadline']),
+        _dates(df['collection_date']),
+        _dates(df['return_date']),
+        [None if pd.isna(value) else int(value) for value in days_left],
+        late_days.tolist(),
+        overdue.tolist(),
+        fine.astype(int).tolist(),
+    )
+    return [LoanRecord(*row) for row in zip(*columns)]
+
+
+def member_records(users_df, borrowed_df, archived=None):
+    """Build MemberRecords with active/total loan counts from one groupby.
+
+    archived maps user_id to loans counted towards the total but not
+    present in borrowed_df (the archive partitions).
+    """
+    if len(users_df) == 0:
+        return []
+
+    if len(borrowed_df) > 0:
+        counts = (
+            borrowed_df.assign(active=borrowed_df['status'] == 'borrowed')
+            .groupby('user_id')['active']
+            .agg(['size', 'sum'])
+            .reindex(users_df['id'])
+            .fillna(0)
+            .astype(int)
+        )
+        total = counts['size'].tolist()
+        active = counts['sum'].tolist()
+    else:
+        total = active = [0] * len(users_df)
+
+    if archived:
+        total = [n + archived.get(int(user_id), 0) for n, user_id in zip(total, users_df['id'])]
+
+    first = users_df['first_name'].tolist()
+    last = users_df['last_name'].tolist()
+    columns = (
+        users_df['email'].tolist(),
+        first,
+        last,
+        [f"{f} {l}" for f, l in zip(first, last)],
+        active,
+        total,
+    )
+    return [MemberRecord(*row) for row in zip(*columns)]
@@ -0,0 +1,104 @@
+import math
+import time
+
+
+class ScrollPrefetcher:
+    """Loads covers around the viewport of a scrolling grid of lazy BookCards.
+
+    Cards in visible rows load their covers; the rows that scrolling at the
+    current speed and direction will reach within LEAD_S seconds are
+    prefetched into the CoverLoader cache, nearest first, so they paint
+    fully decoded; cards further than KEEP rows from that window drop
+    their images again, which keeps Tk image memory to a few screenfuls
+    however long the grid is. Hook on_scroll() to the canvas's
+    yscrollcommand, which fires for every scroll, drag and resize.
+    """
+
+    LEAD_S = 0.5
+    MIN_AHEAD = 1
+    MAX_AHEAD = 12
+    KEEP = 2
+
+    def __init__(self, canvas, container, covers, size, columns):
+        self.canvas = canvas
+        self.container = container
+        self.covers = covers
+        self.size = tuple(size)
+        self.columns = columns
+        self.rows = []
+        self.velocity = 0.0  # px/s, positive downwards
+        self._last = None  # (time, top) of the previous update
+        self._loaded = set()  # rows whose cards may hold a cover image
+        self._after_id = None
+
+    def reset(self):
+        """Forget the grid (its cards are being destroyed) and cancel pending prefetches"""
+        self.rows = []
+        self.velocity = 0.0
+        self._last = None
+        self._loaded = set()
+        self.covers.prefetch((), self.size)
+
+    def add(self, index, card):
+        """Register the card at grid position index (row-major, in order)"""
+        row = index // self.columns
+        if row == len(self.rows):
+            self.rows.append([])
+        self.rows[row].append(card)
+
+    def on_scroll(self, *args):
+        # Coalesce the burst of scroll callbacks of one frame into one update
+        if self._after_id is None:
+            self._after_id = self.canvas.after_idle(self._update)
+
+    def _update(self):
+        self._after_id = None
+        height = self.container.winfo_height()
+        if not self.rows or height <= 1 or not self.canvas.winfo_exists():
+            return
+        pitch = height / len(self.rows)
+        top_fraction, bottom_fraction = self.canvas.yview()
+        top = top_fraction * height
+        bottom = bottom_fraction * height
+        self._track_velocity(top)
+
+        last_row = len(self.rows) - 1
+        first = min(int(top // pitch), last_row)
+        last = min(int(math.ceil(bottom / pitch)) - 1, last_row)
+        ahead = int(math.ceil(abs(self.velocity) * self.LEAD_S / pitch))
+        ahead = max(self.MIN_AHEAD, min(self.MAX_AHEAD, ahead))
+
+        # Nearest rows first: the whole run ahead, then one row behind
+        if self.velocity >= 0:
+            upcoming = list(range(last + 1, min(last + ahead, last_row) + 1))
+            upcoming += [first - 1] if first > 0 else []
+            keep = (first - 1 - self.KEEP, last + ahead + self.KEEP)
+        else:
+            upcoming = list(range(first - 1, max(first - ahead, 0) - 1, -1))
+            upcoming += [last + 1] if last < last_row else []
+            keep = (first - ahead - self.KEEP, last + 1 + self.KEEP)
+
+        for row in range(first, last + 1):
+            for card in self.rows[row]:
+                card.load_cover()
+            self._loaded.add(row)
+        self.covers.prefetch(
+            [card.image_source for row in upcoming for card in self.rows[row]
+             if card.image_source is not None and card.cover_state is None],
+            self.size
+        )
+
+        for row in [row for row in self._loaded if not keep[0] <= row <= keep[1]]:
+            for card in self.rows[row]:
+                card.release_cover()
+            self._loaded.discard(row)
+
+    def _track_velocity(self, top):
+        now = time.monotonic()
+        if self._last is not None:
+            elapsed = now - self._last[0]
+            if elapsed > 0:
+                speed = (top - self._last[1]) / elapsed
+                # Smooth wheel steps into a steady speed; after a pause start afresh
+                self.velocity = speed if elapsed > 0.25 else 0.5 * self.velocity + 0.5 * speed
+        self._last = (now, top)
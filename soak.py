@@ -0,0 +1,408 @@
+"""Long-running soak test for the Tk front end.
+
+Drives the real admin and user dashboards against a throw-away data
+directory: login, tab switches, searches, cart and loan changes, window
+resizes and logout, round after round. While it runs it samples process
+RSS, live Tk widgets, Tk images, Tcl commands (every bound Python callback
+is one) and event-loop lag, then prints a report flagging series that keep
+growing.
+
+    python soak.py --hours 4
+    python soak.py --minutes 10 --csv soak.csv
+
+Without a DISPLAY it starts its own Xvfb server.
+"""
+import os
+import sys
+import time
+import shutil
+import random
+import argparse
+import tempfile
+import subprocess
+import statistics
+import tkinter as tk
+
+
+# Metrics whose steady growth points at a leak
+TRACKED = ("rss_mb", "widgets", "images", "tcl_commands")
+
+
+# ==================== VIRTUAL DISPLAY ====================
+
+def start_xvfb():
+    """Start Xvfb on a free display number and point DISPLAY at it"""
+    xvfb = shutil.which("Xvfb")
+    if xvfb is None:
+        sys.exit("DISPLAY is not set and Xvfb was not found; install xvfb or run under a desktop session")
+
+    number = 99
+    while os.path.exists(f"/tmp/.X{number}-lock"):
+        number += 1
+    display = f":{number}"
+    proc = subprocess.Popen(
+        [xvfb, display, "-screen", "0", "1600x1000x24", "-nolisten", "tcp"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    for _ in range(50):
+        if os.path.exists(f"/tmp/.X11-unix/X{number}"):
+            break
+        if proc.poll() is not None:
+            sys.exit("Xvfb exited during startup")
+        time.sleep(0.1)
+    os.environ["DISPLAY"] = display
+    return proc
+
+
+# ==================== SEED DATA ====================
+
+def seed_data(db, users, books):
+    """Create an admin, some members and a catalogue with generated covers"""
+    from PIL import Image
+
+    db.create_user("admin@soak.test", "Soak", "Admin", "admin", "Admin")
+    for n in range(users):
+        db.create_user(f"user{n}@soak.test", f"User{n}", "Soak", "user", "User")
+
+    os.makedirs(db.images_dir, exist_ok=True)
+    rng = random.Random(7)
+    upload = os.path.join(str(db.images_dir), "upload.png")
+    for n in range(books):
+        color = tuple(rng.randrange(40, 220) for _ in range(3))
+        Image.new("RGB", (440, 460), color).save(upload)
+        cover = db.images.put(upload)
+        db.create_book(f"Soak Book {n}", f"Author {n % 17}", cover=cover, count=rng.randint(0, 5))
+    os.remove(upload)
+
+
+# ==================== SAMPLING ====================
+
+def rss_mb():
+    """Resident set size of this process in MB (Linux /proc), or None"""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def count_widgets(widget):
+    return 1 + sum(count_widgets(child) for child in widget.winfo_children())
+
+
+class Sampler:
+    """Collects one row of metrics every interval_s seconds"""
+
+    def __init__(self, root, db, monitor, interval_s):
+        self.root = root
+        self.db = db
+        self.monitor = monitor
+        self.interval_s = interval_s
+        self.started = time.monotonic()
+        self.rows = []
+
+    def sample(self, rounds):
+        lag = self.monitor.lag_summary()
+        self.monitor.lag_samples.clear()
+        self.rows.append({
+            'elapsed_s': time.monotonic() - self.started,
+            'rounds': rounds,
+            'rss_mb': rss_mb(),
+            'widgets': count_widgets(self.root),
+            'images': len(self.root.tk.splitlist(self.root.tk.call("image", "names"))),
+            'tcl_commands': len(self.root.tk.splitlist(self.root.tk.call("info", "commands"))),
+            'lag_p95_ms': lag['p95_ms'],
+            'lag_max_ms': lag['max_ms'],
+            'loan_rows': len(self.db.get_all_borrowed_books()),
+        })
+
+
+# ==================== SCENARIO ====================
+
+def set_search(page, text):
+    # Setting the StringVar runs the page's own trace -> filter
+    page.search_var.set(text)
+
+
+def user_round(app, email, rng):
+    """One member session; yields after every UI step so Tk can process events"""
+    from user.book import UserBooksPage
+
+    app.show_login()
+    yield
+    app.current_user = app.db.validate_login(email, "user")
+    dashboard = UserBooksPage(app.root, app)
+    yield
+
+    for query in ("soak", "author 3", "book 1", ""):
+        set_search(dashboard, query)
+        yield
+
+    books = app.db.get_all_books().to_dict('records')
+    book = rng.choice(books)
+    dashboard.add_to_cart(book)
+    yield
+
+    dashboard.show_cart()
+    yield
+    cart_page = dashboard.tab_host.tabs['cart']['page']
+    cart_page.remove_from_cart(book)
+    yield
+
+    dashboard.show_books()
+    yield
+    available = [b for b in books if int(float(b['count'])) > 0]
+    if available and app.db.can_borrow_book(email):
+        book = rng.choice(available)
+        if app.db.borrow_book(email, book['id'])['success']:
+            dashboard.refresh_book_card(book['id'])
+        yield
+
+    dashboard.show_borrowed()
+    yield
+    dashboard.show_books()
+    yield
+
+
+def admin_round(app, rng):
+    """One librarian session; collects and returns loans so stock keeps moving"""
+    from admin.manage_book import AdminDashboard
+
+    app.show_login()
+    yield
+    app.current_user = app.db.validate_login("admin@soak.test", "admin")
+    dashboard = AdminDashboard(app.root, app)
+    yield
+
+    for query in ("soak", "42", ""):
+        set_search(dashboard, query)
+        yield
+
+    dashboard.show_member_management()
+    yield
+    members = dashboard.tab_host.tabs['members']['page']
+    for query in ("user1", ""):
+        set_search(members, query)
+        yield
+
+    # Member details is a non-blocking Toplevel; open it and close it again
+    users = app.db.get_member_records()
+    if users:
+        members.show_member_details(rng.choice(users))
+        yield
+    for widget in app.root.winfo_children():
+        if isinstance(widget, tk.Toplevel):
+            widget.destroy()
+    yield
+
+    dashboard.show_issue_return()
+    yield
+    issue_page = dashboard.tab_host.tabs['issue_return']['page']
+    for value in ("pending", "collected", "returned", "all"):
+        issue_page.filter_var.set(value)
+        issue_page.apply_filter()
+        yield
+
+    # Same DB calls as the Collected/Returned buttons, minus the confirmation dialogs
+    borrowed = app.db.get_all_borrowed_books()
+    active = borrowed[borrowed['status'] == 'borrowed'].to_dict('records')
+    for loan in active:
+        if not loan['collected']:
+            app.db.mark_book_collected(loan['user_email'], loan['book_id'])
+        else:
+            app.db.mark_book_returned(loan['user_email'], loan['book_id'])
+        issue_page.refresh_card(loan['user_email'], loan['book_id'])
+        issue_page.refresh_stats()
+        yield
+
+    dashboard.show_reports()
+    yield
+    dashboard.show_library()
+    yield
+
+
+def scenario(app, user_emails, seed):
+    """Endless stream of sessions, each followed by window resizes and a logout"""
+    rng = random.Random(seed)
+    sizes = ("1400x800", "1100x700", "1600x950", "1280x760")
+    while True:
+        if rng.random() < 0.35:
+            yield from admin_round(app, rng)
+        else:
+            yield from user_round(app, rng.choice(user_emails), rng)
+
+        for size in rng.sample(sizes, 3):
+            app.root.geometry(size)
+            yield
+
+        # Same as logout() without the confirmation dialog
+        app.current_user = None
+        app.show_welcome_screen()
+        yield "round"
+
+
+# ==================== REPORT ====================
+
+def growth(rows, key, skip=0.1, min_rise=0.05):
+    """Per-hour slope and whether the series climbs across every quarter of the run"""
+    points = [(row['elapsed_s'], row[key]) for row in rows if row[key] is not None]
+    points = points[int(len(points) * skip):]
+    if len(points) < 8:
+        return 0.0, False
+
+    xs = [x for x, _ in points]
+    ys = [y for _, y in points]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    var_x = sum((x - mean_x) ** 2 for x in xs) or 1.0
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in points) / var_x * 3600
+
+    # Monotonic at the coarse level: each quarter's median above the previous one
+    size = len(ys) // 4
+    quarters = [statistics.median(ys[i * size:(i + 1) * size]) for i in range(4)]
+    climbing = all(later > earlier for earlier, later in zip(quarters, quarters[1:]))
+    rise = (quarters[-1] - quarters[0]) / max(abs(quarters[0]), 1.0)
+    return slope, climbing and rise >= min_rise
+
+
+def format_report(rows, rounds, errors, monitor):
+    if not rows:
+        return "No samples collected."
+    first, last = rows[0], rows[-1]
+    lines = [
+        f"Soak run: {last['elapsed_s'] / 3600:.2f} h, {rounds} rounds, {len(rows)} samples, {errors} callback errors",
+        "",
+        f"{'metric':<14} {'first':>10} {'last':>10} {'min':>10} {'max':>10} {'per hour':>10}  verdict",
+    ]
+    flagged = []
+    for key in TRACKED + ('lag_p95_ms', 'lag_max_ms'):
+        values = [row[key] for row in rows if row[key] is not None]
+        if not values:
+            continue
+        slope, climbing = growth(rows, key)
+        verdict = "GROWING" if climbing and key in TRACKED else "ok"
+        if verdict == "GROWING":
+            flagged.append(key)
+        lines.append(
+            f"{key:<14} {first[key] or 0:>10.1f} {last[key] or 0:>10.1f} {min(values):>10.1f} "
+            f"{max(values):>10.1f} {slope:>+10.1f}  {verdict}"
+        )
+    lines += [
+        "",
+        f"Loan rows grew {first['loan_rows']} -> {last['loan_rows']} (data growth, not a leak)",
+        "",
+        "Slow callbacks:" if monitor.slow_callbacks else "No callbacks over the slow threshold.",
+    ]
+    for _stamp, name, busy_ms in list(monitor.slow_callbacks)[-10:]:
+        lines.append(f"  {busy_ms:>8.0f} ms  {name}")
+    lines += ["", f"Monotonic growth: {', '.join(flagged)}" if flagged else "No monotonic growth detected."]
+    return "\n".join(lines)
+
+
+def write_csv(rows, path):
+    import csv
+    with open(path, "w", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+# ==================== MAIN ====================
+
+def main():
+    parser = argparse.ArgumentParser(description="LibraEase UI soak test")
+    parser.add_argument("--hours", type=float, default=0.0)
+    parser.add_argument("--minutes", type=float, default=0.0)
+    parser.add_argument("--step-ms", type=int, default=150, help="pause between UI steps")
+    parser.add_argument("--sample-s", type=float, default=30.0, help="seconds between metric samples")
+    parser.add_argument("--users", type=int, default=40)
+    parser.add_argument("--books", type=int, default=120)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--csv", help="also write every sample to this CSV file")
+    parser.add_argument("--keep-data", action="store_true", help="leave the temporary data directory behind")
+    args = parser.parse_args()
+    duration_s = (args.hours * 60 + args.minutes) * 60 or 600
+
+    xvfb = start_xvfb() if not os.environ.get("DISPLAY") else None
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, repo_dir)
+    csv_path = os.path.abspath(args.csv) if args.csv else None
+
+    # DatabaseManager and the pages use paths relative to the working directory
+    work_dir = tempfile.mkdtemp(prefix="libraease-soak-")
+    os.chdir(work_dir)
+
+    from main import LibraryManagementSystem
+    from ui_monitor import EventLoopMonitor
+
+    root = tk.Tk()
+    app = LibraryManagementSystem(root)
+    seed_data(app.db, args.users, args.books)
+    monitor = app.monitor or EventLoopMonitor(root).start()
+    sampler = Sampler(root, app.db, monitor, args.sample_s)
+
+    state = {'rounds': 0, 'errors': 0}
+
+    def report_callback_exception(exc, value, tb):
+        state['errors'] += 1
+        import traceback
+        traceback.print_exception(exc, value, tb)
+    root.report_callback_exception = report_callback_exception
+
+    user_emails = [f"user{n}@soak.test" for n in range(args.users)]
+    steps = scenario(app, user_emails, args.seed)
+    deadline = time.monotonic() + duration_s
+
+    def step():
+        nonlocal steps
+        if time.monotonic() >= deadline:
+            root.quit()
+            return
+        try:
+            if next(steps) == "round":
+                state['rounds'] += 1
+        except Exception:
+            state['errors'] += 1
+            import traceback
+            traceback.print_exc()
+            # An exception ends the generator; start a new session from the welcome screen
+            app.current_user = None
+            app.show_welcome_screen()
+            steps = scenario(app, user_emails, args.seed + state['errors'])
+        root.after(args.step_ms, step)
+
+    def sample():
+        sampler.sample(state['rounds'])
+        row = sampler.rows[-1]
+        print(
+            f"[{row['elapsed_s'] / 60:7.1f} min] rounds={row['rounds']} rss={row['rss_mb'] or 0:.1f}MB "
+            f"widgets={row['widgets']} images={row['images']} cmds={row['tcl_commands']} "
+            f"lag p95={row['lag_p95_ms']:.0f}ms",
+            flush=True
+        )
+        root.after(int(args.sample_s * 1000), sample)
+
+    root.after(1000, step)
+    root.after(int(args.sample_s * 1000), sample)
+    try:
+        root.mainloop()
+    finally:
+        print()
+        print(format_report(sampler.rows, state['rounds'], state['errors'], monitor))
+        if csv_path and sampler.rows:
+            write_csv(sampler.rows, csv_path)
+        monitor.stop()
+        root.destroy()
+        os.chdir(repo_dir)
+        if not args.keep_data:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        if xvfb is not None:
+            xvfb.terminate()
+
+
+if __name__ == "__main__":
+    main()
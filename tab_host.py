@@ -0,0 +1,83 @@
+import tkinter as tk
+
+
+class TabHost:
+    """Keeps every tab's frame alive and only rebuilds a tab when its tables changed"""
+
+    def __init__(self, container, db, bg):
+        self.container = container
+        self.db = db
+        self.bg = bg
+        self.tabs = {}
+        self.current = None
+
+    def add(self, name, build, tables, refresh=None):
+        """Register a tab and return its (hidden) frame.
+
+        build(frame) creates the page and returns the page object; refresh(page)
+        brings an existing page up to date and defaults to a full rebuild.
+        tables lists the DatabaseManager tables the page displays.
+        """
+        frame = tk.Frame(self.container, bg=self.bg)
+        self.tabs[name] = {
+            'frame': frame,
+            'build': build,
+            'refresh': refresh,
+            'tables': tuple(tables),
+            'page': None,
+            'version': None,
+        }
+        return frame
+
+    def show(self, name):
+        """Hide the current tab and show name, refreshing it only if its data changed"""
+        tab = self.tabs[name]
+        if self.current is not None and self.current != name:
+            self.hide(self.current)
+
+        version = self.db.data_version(*tab['tables'])
+        if tab['page'] is None:
+            tab['page'] = tab['build'](tab['frame'])
+        elif version != tab['version']:
+            self._refresh(name, tab)
+        tab['version'] = version
+
+        tab['frame'].pack(fill="both", expand=True)
+        self.current = name
+
+        # Pages with a scrolling list set page.mousewheel = (canvas, handler);
+        # the binding is global, so the shown page takes it back from the others
+        mousewheel = getattr(tab['page'], 'mousewheel', None)
+        if mousewheel is not None:
+            canvas, handler = mousewheel
+            canvas.bind_all("<MouseWheel>", handler)
+
+        # Pages streaming cards with a ChunkedRenderer expose it as page.renderer;
+        # it only builds while the tab is visible
+        renderer = getattr(tab['page'], 'renderer', None)
+        if renderer is not None:
+            renderer.resume()
+
+    def hide(self, name):
+        tab = self.tabs[name]
+        tab['frame'].pack_forget()
+        # tab['version'] stays what the page was last built or refreshed from:
+        # changes that reached it while visible, from this terminal or another,
+        # bring it up to date on the next show()
+        renderer = getattr(tab['page'], 'renderer', None)
+        if renderer is not None:
+            renderer.suspend()
+
+    def invalidate(self, name=None):
+        """Force a refresh the next time the tab (or every tab) is shown"""
+        for tab_name, tab in self.tabs.items():
+            if name is None or tab_name == name:
+                tab['version'] = None
+
+    def _refresh(self, name, tab):
+        if tab['refresh'] is not None:
+            tab['refresh'](tab['page'])
+            return
+        for widget in tab['frame'].winfo_children():
+            widget.destroy()
+        tab['page'] = tab['build'](tab['frame'])
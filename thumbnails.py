@@ -0,0 +1,85 @@
+"""Pre-generate the card renditions of every stored cover.
+
+Walks the cover store in data/book_images and renders each cover at the
+card sizes the UI draws (or the sizes given with --size) on every CPU
+core, skipping renditions that are already newer than their cover. Files
+are written to a temp name and renamed into place, and the workers run
+at low priority, so it is safe to run while terminals are open.
+
+    python thumbnails.py
+    python thumbnails.py --size 240x250 --jobs 2
+    python thumbnails.py --force
+"""
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from covers import ImageStore, RENDITION_SIZES
+
+
+def parse_size(text):
+    try:
+        width, height = (int(part) for part in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {text!r}")
+    return (width, height)
+
+
+def _lower_priority():
+    # Keep the kiosk UI responsive while the pool is busy
+    if hasattr(os, "nice"):
+        os.nice(10)
+
+
+def render(job):
+    """Worker: write the stale renditions of one cover; returns (renditions written, bytes read)"""
+    root, key, sizes, force = job
+    store = ImageStore(root)
+    try:
+        stale = list(sizes) if force else store.stale_renditions(key, sizes)
+        if not stale:
+            return 0, 0
+        size = store.path(key).stat().st_size
+        store.make_renditions(key, sizes=stale)
+    except FileNotFoundError:
+        # Garbage-collected by compaction meanwhile
+        return 0, 0
+    return len(stale), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate cover renditions (run from the app folder)")
+    parser.add_argument("--size", type=parse_size, action="append",
+                        help="rendition size as WIDTHxHEIGHT (repeatable; default: the UI card sizes)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--force", action="store_true", help="re-render renditions that are up to date")
+    parser.add_argument("--root", default=os.path.join("data", "book_images"), help="cover store directory")
+    args = parser.parse_args()
+
+    sizes = tuple(args.size or RENDITION_SIZES)
+    keys = sorted(ImageStore(args.root).keys())
+    jobs = [(args.root, key, sizes, args.force) for key in keys]
+
+    started = time.perf_counter()
+    written = read = updated = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs), initializer=_lower_priority) as pool:
+        for count, size in pool.map(render, jobs, chunksize=16):
+            written += count
+            read += size
+            updated += count > 0
+    elapsed = time.perf_counter() - started
+
+    print(f"{len(keys)} covers, {updated} updated ({written} renditions), "
+          f"{len(keys) - updated} already up to date")
+    if updated:
+        print(f"{elapsed:.2f}s with {args.jobs} processes: {updated / elapsed:.1f} covers/s, "
+              f"{read / 2**20 / elapsed:.1f} MB/s of masters decoded")
+    else:
+        print(f"{elapsed:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+import time
+import logging
+import functools
+import tkinter as tk
+from collections import deque
+
+
+logger = logging.getLogger("libraease.ui")
+
+# Active monitor (None unless LIBRAEASE_DEBUG is set); read by timed_render
+_monitor = None
+
+
+def get_monitor():
+    """Return the running EventLoopMonitor, if any"""
+    return _monitor
+
+
+class _TimedCallWrapper(tk.CallWrapper):
+    """Drop-in replacement for tkinter.CallWrapper that times every callback"""
+
+    def __call__(self, *args):
+        monitor = _monitor
+        if monitor is None:
+            return super().__call__(*args)
+        frame = monitor._enter()
+        try:
+            return super().__call__(*args)
+        finally:
+            monitor._exit(frame, self.func)
+
+
+class EventLoopMonitor:
+    """Measures Tk event-loop lag and reports callbacks that block the UI"""
+
+    def __init__(self, root, interval_ms=100, threshold_ms=100, history=600):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.threshold_ms = threshold_ms
+        self.lag_samples = deque(maxlen=history)
+        self.slow_callbacks = deque(maxlen=200)
+        self.callback_stats = {}
+        self.render_stats = {}
+        self._frames = []
+        self._render_depth = 0
+        self._expected = None
+        self._after_id = None
+        self._original_wrapper = None
+
+    # ==================== LIFECYCLE ====================
+
+    def start(self):
+        """Install the callback hook and start the heartbeat"""
+        global _monitor
+        _monitor = self
+        if self._original_wrapper is None:
+            self._original_wrapper = tk.CallWrapper
+            tk.CallWrapper = _TimedCallWrapper
+        self._expected = time.perf_counter() + self.interval_ms / 1000
+        self._after_id = self.root.after(self.interval_ms, self._heartbeat)
+        return self
+
+    def stop(self):
+        """Remove the hook and stop the heartbeat"""
+        global _monitor
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        if self._original_wrapper is not None:
+            tk.CallWrapper = self._original_wrapper
+            self._original_wrapper = None
+        if _monitor is self:
+            _monitor = None
+
+    def reset(self):
+        """Drop all collected samples"""
+        self.lag_samples.clear()
+        self.slow_callbacks.clear()
+        self.callback_stats.clear()
+        self.render_stats.clear()
+
+    def _heartbeat(self):
+        now = time.perf_counter()
+        lag_ms = max(0.0, (now - self._expected) * 1000)
+        self.lag_samples.append(lag_ms)
+        self._expected = now + self.interval_ms / 1000
+        self._after_id = self.root.after(self.interval_ms, self._heartbeat)
+
+    # ==================== CALLBACK TIMING ====================
+
+    def _enter(self):
+        now = time.perf_counter()
+        # A callback starting while another is running means a nested event
+        # loop (wait_window in a modal dialog); the outer callback is idle
+        # until the nested loop returns, so that span is excluded below
+        for frame in self._frames:
+            if frame['nested_start'] is None:
+                frame['nested_start'] = now
+        frame = {'start': now, 'nested_start': None, 'nested_end': None}
+        self._frames.append(frame)
+        return frame
+
+    def _exit(self, frame, func):
+        now = time.perf_counter()
+        self._frames.pop()
+        for outer in self._frames:
+            outer['nested_end'] = now
+        if frame['nested_start'] is None:
+            busy = now - frame['start']
+        else:
+            busy = (frame['nested_start'] - frame['start']) + (now - frame['nested_end'])
+        busy_ms = busy * 1000
+
+        name = callback_name(func)
+        stats = self.callback_stats.setdefault(name, {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'slow': 0})
+        stats['calls'] += 1
+        stats['total_ms'] += busy_ms
+        stats['max_ms'] = max(stats['max_ms'], busy_ms)
+        if busy_ms >= self.threshold_ms:
+            stats['slow'] += 1
+            self.slow_callbacks.append((time.time(), name, busy_ms))
+            logger.warning("Slow Tk callback %s took %.0f ms", name, busy_ms)
+
+    # ==================== PAGE RENDER TIMES ====================
+
+    def record_render(self, page, build_ms, settled_ms):
+        """Record how long a page took to build and to settle (idle tasks done)"""
+        stats = self.render_stats.setdefault(page, {
+            'renders': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'last_ms': 0.0,
+            'settled_total_ms': 0.0, 'settled_max_ms': 0.0,
+        })
+        stats['renders'] += 1
+        stats['total_ms'] += build_ms
+        stats['max_ms'] = max(stats['max_ms'], build_ms)
+        stats['last_ms'] = build_ms
+        stats['settled_total_ms'] += settled_ms
+        stats['settled_max_ms'] = max(stats['settled_max_ms'], settled_ms)
+
+    # ==================== REPORTS ====================
+
+    def lag_summary(self):
+        """Mean, p95 and max heartbeat lag in milliseconds"""
+        samples = sorted(self.lag_samples)
+        if not samples:
+            return {'samples': 0, 'mean_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
+        return {
+            'samples': len(samples),
+            'mean_ms': sum(samples) / len(samples),
+            'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+            'max_ms': samples[-1],
+        }
+
+    def format_render_report(self):
+        """Per-page render-time summary, slowest first"""
+        lines = [
+            f"{'page':<32} {'renders':>8} {'avg ms':>9} {'max ms':>9} {'last ms':>9} {'settled avg':>12} {'settled max':>12}",
+        ]
+        items = sorted(self.render_stats.items(), key=lambda item: item[1]['max_ms'], reverse=True)
+        for page, stats in items:
+            renders = max(stats['renders'], 1)
+            lines.append(
+                f"{page[:32]:<32} {stats['renders']:>8} {stats['total_ms'] / renders:>9.1f} "
+                f"{stats['max_ms']:>9.1f} {stats['last_ms']:>9.1f} "
+                f"{stats['settled_total_ms'] / renders:>12.1f} {stats['settled_max_ms']:>12.1f}"
+            )
+        if not items:
+            lines.append("No pages rendered yet.")
+        return "\n".join(lines)
+
+    def format_loop_report(self):
+        """Event-loop lag plus the slowest callbacks"""
+        lag = self.lag_summary()
+        lines = [
+            f"Heartbeat every {self.interval_ms} ms, slow threshold {self.threshold_ms} ms",
+            f"Lag over last {lag['samples']} beats: mean {lag['mean_ms']:.1f} ms, "
+            f"p95 {lag['p95_ms']:.1f} ms, max {lag['max_ms']:.1f} ms",
+            "",
+            f"{'callback':<70} {'calls':>7} {'slow':>6} {'avg ms':>9} {'max ms':>9}",
+        ]
+        items = sorted(self.callback_stats.items(), key=lambda item: item[1]['max_ms'], reverse=True)
+        for name, stats in items[:40]:
+            calls = max(stats['calls'], 1)
+            lines.append(
+                f"{name[:70]:<70} {stats['calls']:>7} {stats['slow']:>6} "
+                f"{stats['total_ms'] / calls:>9.1f} {stats['max_ms']:>9.1f}"
+            )
+        lines += ["", "Recent slow callbacks:"]
+        for stamp, name, busy_ms in list(self.slow_callbacks)[-20:]:
+            lines.append(f"  {time.strftime('%H:%M:%S', time.localtime(stamp))}  {busy_ms:>8.0f} ms  {name}")
+        return "\n".join(lines)
+
+
+def callback_name(func):
+    """Readable module.qualname for a Tk callback"""
+    func = getattr(func, "__func__", func)
+    # after()/after_idle() register a private callit() closure; report the wrapped function
+    code = getattr(func, "__code__", None)
+    if code is not None and code.co_name == "callit" and func.__closure__:
+        cells = dict(zip(code.co_freevars, func.__closure__))
+        if "func" in cells:
+            func = getattr(cells["func"].cell_contents, "__func__", cells["func"].cell_contents)
+    module = getattr(func, "__module__", None) or "?"
+    qualname = getattr(func, "__qualname__", None) or repr(func)
+    return f"{module}.{qualname}"
+
+
+def timed_render(page):
+    """Decorator recording a page's build time with the active monitor"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            monitor = _monitor
+            if monitor is None or monitor._render_depth:
+                return method(*args, **kwargs)
+            monitor._render_depth += 1
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                monitor._render_depth -= 1
+                build_ms = (time.perf_counter() - start) * 1000
+
+                # Geometry and redraw run as idle tasks queued during the build,
+                # so an idle callback queued now fires once the page has settled
+                def settled():
+                    settled_ms = (time.perf_counter() - start) * 1000
+                    monitor.record_render(page, build_ms, settled_ms)
+                monitor.root.after_idle(settled)
+        return wrapper
+    return decorator
+
+
+def show_report_window(root, title, build_text):
+    """Open a read-only monospace window showing build_text(), with a refresh button"""
+    window = tk.Toplevel(root)
+    window.title(title)
+    window.geometry("1000x560")
+    window.configure(bg="#1e293b")
+
+    text = tk.Text(
+        window,
+        font=("Courier", 10),
+        bg="#0f172a",
+        fg="#e5e7eb",
+        insertbackground="#e5e7eb",
+        relief="flat",
+        wrap="none"
+    )
+
+    def refresh():
+        text.config(state="normal")
+        text.delete("1.0", tk.END)
+        text.insert("1.0", build_text())
+        text.config(state="disabled")
+
+    tk.Button(
+        window,
+        text="⟳ Refresh",
+        font=("Helvetica", 11, "bold"),
+        bg="#667eea",
+        fg="white",
+        relief="flat",
+        cursor="hand2",
+        command=refresh
+    ).pack(anchor="e", padx=10, pady=8)
+    text.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+    refresh()
+    return window
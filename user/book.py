@@ -1,10 +1,12 @@
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk
 from user.cart import UserCartPage
 from user.borrowing import UserBorrowingPage
 from user.styled_message_box import StyledMessageBox
-import os
+from ui_monitor import timed_render
+from tab_host import TabHost
+from book_card import BookCard
+from scroll_prefetch import ScrollPrefetcher
 
 class UserBooksPage:
     def __init__(self, root, main_app):
@@ -25,6 +27,10 @@ class UserBooksPage:
         # Track active nav button
         self.active_nav_button = None
         
+        # Catalogue cards keyed by book_id for in-place updates
+        self.book_cards = {}
+        self.mousewheel = None
+        
         self.show_user_dashboard()
     
     def show_user_dashboard(self):
@@ -58,6 +64,28 @@ class UserBooksPage:
         self.content_frame = tk.Frame(content_container, bg=self.APP_BG)
         self.content_frame.pack(fill="both", expand=True)
         
+        # Tabs stay alive while hidden and are rebuilt only when their tables change
+        self.tab_host = TabHost(self.content_frame, self.db, self.APP_BG)
+        self.books_frame = self.tab_host.add(
+            "books", lambda frame: self.build_books_page(), ("books", "cart", "borrowed"),
+            refresh=lambda page: self.build_books_page()
+        )
+        self.tab_host.add(
+            "cart", lambda frame: UserCartPage(frame, self.main_app), ("cart", "books"),
+            refresh=lambda page: page.show_cart()
+        )
+        self.tab_host.add(
+            "borrowed", lambda frame: UserBorrowingPage(frame, self.main_app), ("borrowed", "books"),
+            refresh=lambda page: page.show_borrowed_books()
+        )
+        
+        # Keep the catalogue cards in step with changes made here and in other terminals
+        events = self.db.events
+        events.subscribe('book_updated', self.on_book_updated, owner=self.content_frame)
+        events.subscribe('cart_changed', self.on_cart_changed, owner=self.content_frame)
+        events.subscribe('loan_changed', self.on_loan_changed, owner=self.content_frame)
+        events.subscribe('data_reloaded', self.on_data_reloaded, owner=self.content_frame)
+        
         # Show Books by default
         self.show_books()
     
@@ -252,23 +280,24 @@ class UserBooksPage:
         if not initial:
             command()
     
-    def clear_content(self):
-        for widget in self.content_frame.winfo_children():
-            widget.destroy()
-    
+    @timed_render("User · Cart")
     def show_cart(self):
-        self.clear_content()
-        UserCartPage(self.content_frame, self.main_app)
+        self.tab_host.show("cart")
     
+    @timed_render("User · Borrowed")
     def show_borrowed(self):
-        self.clear_content()
-        UserBorrowingPage(self.content_frame, self.main_app)
+        self.tab_host.show("borrowed")
     
+    @timed_render("User · Books")
     def show_books(self):
-        self.clear_content()
+        self.tab_host.show("books")
+    
+    def build_books_page(self):
+        for widget in self.books_frame.winfo_children():
+            widget.destroy()
         
         # Header with title centered
-        header_frame = tk.Frame(self.content_frame, bg=self.APP_BG)
+        header_frame = tk.Frame(self.books_frame, bg=self.APP_BG)
         header_frame.pack(fill="x", padx=40, pady=20)
         
         title_container = tk.Frame(header_frame, bg=self.APP_BG)
@@ -283,7 +312,7 @@ class UserBooksPage:
         ).pack()
         
         # Search Bar
-        search_frame = tk.Frame(self.content_frame, bg=self.APP_BG)
+        search_frame = tk.Frame(self.books_frame, bg=self.APP_BG)
         search_frame.pack(fill="x", padx=40, pady=(0, 20))
         
         tk.Label(
@@ -327,7 +356,7 @@ class UserBooksPage:
         search_entry.pack(fill="x", padx=15, pady=10)
         
         # Books Grid with Scrollbar
-        canvas_frame = tk.Frame(self.content_frame, bg=self.APP_BG)
+        canvas_frame = tk.Frame(self.books_frame, bg=self.APP_BG)
         canvas_frame.pack(fill="both", expand=True, padx=(40, 20), pady=(0, 20))
         
         canvas = tk.Canvas(canvas_frame, bg=self.APP_BG, highlightthickness=0)
@@ -346,7 +375,16 @@ class UserBooksPage:
             canvas.itemconfigure(self._books_window_id, width=event.width)
         
         canvas.bind("<Configure>", on_canvas_configure)
-        canvas.configure(yscrollcommand=scrollbar.set)
+        
+        # Covers load as rows scroll near the viewport, the next ones prefetched
+        self.prefetcher = ScrollPrefetcher(
+            canvas, self.books_container, self.main_app.covers, BookCard.IMAGE_SIZE, columns=4
+        )
+        
+        def on_yscroll(first, last):
+            scrollbar.set(first, last)
+            self.prefetcher.on_scroll()
+        canvas.configure(yscrollcommand=on_yscroll)
         
         # Style scrollbar
         style = ttk.Style()
@@ -371,13 +409,18 @@ class UserBooksPage:
         def _on_mousewheel(event):
             canvas.yview_scroll(int(-1*(event.delta/120)), "units")
         canvas.bind_all("<MouseWheel>", _on_mousewheel)
+        self.mousewheel = (canvas, _on_mousewheel)
         
         # Load and display books
         self.display_books()
+        return self
     
+    @timed_render("User · Books (search)")
     def display_books(self, search_query=""):
         for widget in self.books_container.winfo_children():
             widget.destroy()
+        self.book_cards = {}
+        self.prefetcher.reset()
         
         if search_query:
             books_df = self.db.search_books(search_query)
@@ -397,7 +440,7 @@ class UserBooksPage:
         books = books_df.to_dict('records')
         
         # 4-column grid
-        cols = 4
+        cols = self.prefetcher.columns
         for c in range(cols):
             self.books_container.grid_columnconfigure(c, weight=1, uniform="bookcol")
         
@@ -406,155 +449,82 @@ class UserBooksPage:
             c = idx % cols
             cell = tk.Frame(self.books_container, bg=self.APP_BG)
             cell.grid(row=r, column=c, padx=20, pady=20, sticky="nsew")
-            self.create_book_card(cell, book)
+            self.prefetcher.add(idx, self.create_book_card(cell, book))
+        self.prefetcher.on_scroll()
     
     def create_book_card(self, parent, book):
-        # Container with fixed height
-        card_container = tk.Frame(parent, bg=self.APP_BG, height=450)
-        card_container.pack(fill="both", expand=True)
-        card_container.pack_propagate(False)
-        
-        # Use a Canvas to draw a rounded rectangle for the card
-        card_canvas = tk.Canvas(card_container, bg=self.APP_BG, highlightthickness=0)
-        card_canvas.pack(fill="both", expand=True)
-
-        # Store references to avoid garbage collection
-        card_canvas.images = []
-        
-        def redraw_card(event=None):
-            canvas = card_canvas
-            width = canvas.winfo_width()
-            height = 450  # Fixed height
-            canvas.delete("all")
-
-            # Draw the rounded card background
-            card_id = self.round_rectangle(canvas, 5, 5, width - 10, height - 5, radius=20, fill=self.CARD_BG, outline="#334155")
-
-            # Add hover effect
-            def on_hover_enter(e):
-                canvas.itemconfig(card_id, outline=self.ACCENT_PURPLE, width=2)
-            
-            def on_hover_leave(e):
-                canvas.itemconfig(card_id, outline="#334155", width=1)
-            
-            canvas.bind("<Enter>", on_hover_enter)
-            canvas.bind("<Leave>", on_hover_leave)
-
-            # --- Image ---
-            img_y_pos = 135
-            try:
-                if book.get('image_path') and os.path.exists(book['image_path']):
-                    img = Image.open(book['image_path'])
-                    # Fixed size for image
-                    img = img.resize((220, 230), Image.Resampling.LANCZOS)
-                    
-                    photo = ImageTk.PhotoImage(img)
-                    canvas.images.append(photo)  # Keep reference
-                    canvas.create_image(width / 2, img_y_pos, image=photo)
-                else:
-                    canvas.create_text(width / 2, img_y_pos, text="📚\nNo Image", font=("Helvetica", 16), fill="#64748b", justify="center")
-            except Exception:
-                canvas.create_text(width / 2, img_y_pos, text="📚\nNo Image", font=("Helvetica", 16), fill="#64748b", justify="center")
-
-            # --- Book Details ---
-            title_text = book['name'][:20] + "..." if len(book['name']) > 20 else book['name']
-            author_text = f"by {book['author'][:18]}..." if len(book['author']) > 18 else f"by {book['author']}"
-            
-            canvas.create_text(20, 280, text=title_text, anchor="nw", font=("Helvetica", 14, "bold"), fill=self.TEXT_FG)
-            canvas.create_text(20, 305, text=author_text, anchor="nw", font=("Helvetica", 11), fill="#94a3b8")
-            book_count = int(float(book.get('count', 0)))
-            count_text = f"📊 Available: {book_count}"
-            count_color = self.ACCENT_GREEN if book_count > 0 else "#ef4444"
-            canvas.create_text(20, 330, text=count_text, anchor="nw", font=("Helvetica", 11, "bold"), fill=count_color)
-
-            # --- Rounded Buttons ---
-            btn_width = (width - 50) / 2
-            btn_height = 38
-            btn_y = 380
-
-            # Check if book is in cart
-            user_email = self.current_user['email']
-            is_in_cart = self.db.is_in_cart(user_email, book['id'])
-            
-            # Modify button text and color based on cart status
-            if is_in_cart:
-                cart_btn_text = "✓ In Cart"
-                cart_btn_color = "#64748b"  # Gray color
-                cart_btn_hover = "#475569"
-            else:
-                cart_btn_text = "🛒 Add to Cart"
-                cart_btn_color = self.ACCENT_PURPLE
-                cart_btn_hover = "#5568d3"
-            
-            self.create_rounded_button(
-                canvas, x=20, y=btn_y, width=btn_width, height=btn_height, radius=10,
-                text=cart_btn_text, text_color="white", 
-                bg_color=cart_btn_color, hover_color=cart_btn_hover,
-                command=lambda b=book: self.add_to_cart(b) if not is_in_cart else None
-            )
-
-            user_email = self.current_user['email']
-            is_borrowed_by_current_user = self.db.is_book_borrowed_by_user(user_email, book['id'])
-
-            if is_borrowed_by_current_user:
-                borrow_btn_text = "📖 Borrowed"
-                borrow_btn_color = "#64748b"
-                borrow_btn_hover = "#475569"
-                borrow_enabled = False
-            elif book_count <= 0:
-                borrow_btn_text = "❌ Not Available"
-                borrow_btn_color = "#64748b"
-                borrow_btn_hover = "#475569"
-                borrow_enabled = False
-            else:
-                borrow_btn_text = "📖 Borrow"
-                borrow_btn_color = self.ACCENT_GREEN
-                borrow_btn_hover = "#38d46a"
-                borrow_enabled = True
-
-            self.create_rounded_button(
-                canvas, x=30 + btn_width, y=btn_y, width=btn_width, height=btn_height, radius=10,
-                text=borrow_btn_text, text_color="white", 
-                bg_color=borrow_btn_color, hover_color=borrow_btn_hover,
-                command=lambda b=book: self.borrow_book(b) if borrow_enabled else None
-            )
+        card = BookCard(
+            parent, self.main_app.covers, bg=self.APP_BG, card_bg=self.CARD_BG,
+            text_fg=self.TEXT_FG, hover_outline=self.ACCENT_PURPLE, lazy=True
+        )
+        self.book_cards[book['id']] = {'book': book, 'card': card}
+        self.update_book_card(book, card)
+        return card
 
-        card_canvas.bind("<Configure>", redraw_card)
-        # Initial draw
-        card_canvas.after(10, redraw_card)
+    def update_book_card(self, book, card):
+        """Restyle a card from the book's count and the user's cart/loan state"""
+        book_count = int(float(book.get('count', 0)))
+        count_color = self.ACCENT_GREEN if book_count > 0 else "#ef4444"
+        card.set_book(book, detail=(f"📊 Available: {book_count}", count_color))
 
-    def round_rectangle(self, canvas, x1, y1, x2, y2, radius=25, **kwargs):
-        """Draw a rounded rectangle on a canvas."""
-        points = [
-            x1 + radius, y1, x2 - radius, y1,
-            x2, y1, x2, y1 + radius,
-            x2, y2 - radius, x2, y2,
-            x2 - radius, y2, x1 + radius, y2,
-            x1, y2, x1, y2 - radius,
-            x1, y1 + radius, x1, y1
-        ]
-        return canvas.create_polygon(points, **kwargs, smooth=True)
+        user_email = self.current_user['email']
+        if self.db.is_in_cart(user_email, book['id']):
+            card.set_button("cart", "✓ In Cart", "#64748b", "#475569")
+        else:
+            card.set_button("cart", "🛒 Add to Cart", self.ACCENT_PURPLE, "#5568d3",
+                            command=lambda b=book: self.add_to_cart(b))
 
-    def create_rounded_button(self, canvas, x, y, width, height, radius, text, text_color, bg_color, hover_color, command):
-        """Create a rounded button on a canvas with hover effects."""
-        button_shape = self.round_rectangle(canvas, x, y, x + width, y + height, radius=radius, fill=bg_color, outline="")
-        button_text = canvas.create_text(x + width / 2, y + height / 2, text=text, fill=text_color, font=("Helvetica", 10, "bold"))
-        
-        # Tags for binding
-        button_tag = f"button_{button_shape}"
-        canvas.addtag_withtag(button_tag, button_shape)
-        canvas.addtag_withtag(button_tag, button_text)
+        if self.db.is_book_borrowed_by_user(user_email, book['id']):
+            card.set_button("borrow", "📖 Borrowed", "#64748b", "#475569")
+        elif book_count <= 0:
+            card.set_button("borrow", "❌ Not Available", "#64748b", "#475569")
+        else:
+            card.set_button("borrow", "📖 Borrow", self.ACCENT_GREEN, "#38d46a",
+                            command=lambda b=book: self.borrow_book(b))
 
-        canvas.tag_bind(button_tag, "<Button-1>", lambda event: command())
-        
-        def on_enter(event):
-            canvas.itemconfig(button_shape, fill=hover_color)
+    def refresh_book_card(self, book_id, book=None):
+        """Reload one book (unless given) and update only its card"""
+        entry = self.book_cards.get(book_id)
+        if entry is None or not entry['card'].canvas.winfo_exists():
+            return
         
-        def on_leave(event):
-            canvas.itemconfig(button_shape, fill=bg_color)
-            
-        canvas.tag_bind(button_tag, "<Enter>", on_enter)
-        canvas.tag_bind(button_tag, "<Leave>", on_leave)
+        if book is None:
+            book = self.db.get_book_by_id(book_id)
+        if book is None:
+            return
+        entry['book'].update(book.to_dict())
+        self.update_book_card(entry['book'], entry['card'])
+        # A new cover is painted if the card is in view
+        self.prefetcher.on_scroll()
+    
+    # Events are ignored while the Books tab is hidden: TabHost rebuilds it when shown again
+    
+    def on_book_updated(self, book_id):
+        if not self.books_frame.winfo_manager():
+            return
+        # One read, so a book deleted in between is not taken for an edit
+        book = self.db.get_book_by_id(book_id) if book_id in self.book_cards else None
+        if book is not None:
+            self.refresh_book_card(book_id, book)
+        else:
+            # Added or deleted: the grid itself changes
+            self.filter_books()
+    
+    def on_cart_changed(self, user_email, book_id):
+        if user_email != self.current_user['email'] or not self.books_frame.winfo_manager():
+            return
+        book_ids = list(self.book_cards) if book_id is None else [book_id]
+        for book_id in book_ids:
+            self.refresh_book_card(book_id)
+    
+    def on_loan_changed(self, user_email, book_id):
+        # Any member's loan moves the available count
+        if self.books_frame.winfo_manager():
+            self.refresh_book_card(book_id)
+    
+    def on_data_reloaded(self, tables):
+        if self.books_frame.winfo_manager():
+            self.filter_books()
     
     def filter_books(self):
         search_query = self.search_var.get()
@@ -567,15 +537,14 @@ class UserBooksPage:
         
         # Check if already in cart
         if self.db.is_in_cart(user_email, book['id']):
-            self.display_books()
+            self.refresh_book_card(book['id'])
             return
         
         # Add to cart
         success = self.db.add_to_cart(user_email, book['id'])
         
-        if success:
-            pass
-        else:
+        # On success the cart_changed event updates the card
+        if not success:
             StyledMessageBox.show_error(self.root, "Error", "Failed to add book to cart!")
 
     def borrow_book(self, book):
@@ -645,7 +614,6 @@ class UserBooksPage:
                     "⚠️ Failure to return on time will result in a fine of ₹2 per day.\n\n"
                     "Check 'Borrowed Books' section for details."
                 ))
-                self.root.after(100, self.display_books)
             else:
                 StyledMessageBox.show_error(self.root, "Error", borrow_result['message'])
     
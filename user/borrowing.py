@@ -1,9 +1,8 @@
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk
-from datetime import datetime
-import pandas as pd
-import os
+from chunked_render import ChunkedRenderer
+from covers import LIST_SIZE
+from book_card import cover_label
 
 class UserBorrowingPage:
     def __init__(self, parent, main_app):
@@ -20,12 +19,40 @@ class UserBorrowingPage:
         self.ACCENT_GREEN = "#43e97b"
         self.ACCENT_PURPLE = "#667eea"
         
+        self.mousewheel = None
+        # Loan cards stream in a few per slice so long histories don't freeze the UI
+        self.renderer = ChunkedRenderer(parent, first=4)
+        # Book ids on display, to tell which catalogue edits concern this page
+        self.book_ids = set()
+        
+        # Collections and returns by the admin show up here, from any terminal
+        events = self.db.events
+        events.subscribe('loan_changed', self.on_loan_changed, owner=parent)
+        events.subscribe('book_updated', self.on_book_updated, owner=parent)
+        events.subscribe('data_reloaded', self.on_data_reloaded, owner=parent)
+        
         self.show_borrowed_books()
     
+    # Hidden tabs ignore events: TabHost rebuilds them when shown again
+    
+    def on_loan_changed(self, user_email, book_id):
+        if user_email == self.current_user['email'] and self.parent.winfo_manager():
+            self.show_borrowed_books()
+    
+    def on_book_updated(self, book_id):
+        if book_id in self.book_ids and self.parent.winfo_manager():
+            self.show_borrowed_books()
+    
+    def on_data_reloaded(self, tables):
+        if self.parent.winfo_manager():
+            self.show_borrowed_books()
+    
     def show_borrowed_books(self):
-        # Clear parent
+        # Clear parent (and drop any batches still queued for the old list)
+        self.renderer.cancel()
         for widget in self.parent.winfo_children():
             widget.destroy()
+        self.mousewheel = None
         
         # Header
         header_frame = tk.Frame(self.parent, bg=self.APP_BG)
@@ -44,7 +71,8 @@ class UserBorrowingPage:
         
         # Get borrowed books
         user_email = self.current_user['email']
-        borrowed_books = self.db.get_user_borrowed_books(user_email)
+        borrowed_books = self.db.get_loan_records(user_email=user_email)
+        self.book_ids = {book_data.book_id for book_data in borrowed_books}
         
         if len(borrowed_books) == 0:
             tk.Label(
@@ -99,14 +127,16 @@ class UserBorrowingPage:
         scrollbar.pack(side="right", fill="y", pady=(0, 20), padx=(0, 40))
         
         # Display each borrowed book
-        borrowed_list = borrowed_books.to_dict('records')
-        for book_data in borrowed_list:
-            self.create_borrowed_book_card(books_frame, book_data)
+        self.renderer.start(
+            borrowed_books,
+            lambda book_data: self.create_borrowed_book_card(books_frame, book_data)
+        )
         
         # Mouse wheel scrolling
         def _on_mousewheel(event):
             canvas.yview_scroll(int(-1*(event.delta/120)), "units")
         canvas.bind_all("<MouseWheel>", _on_mousewheel)
+        self.mousewheel = (canvas, _on_mousewheel)
     
     def create_borrowed_book_card(self, parent, book_data):
         # Card container
@@ -122,32 +152,7 @@ class UserBorrowingPage:
         left_frame = tk.Frame(content_frame, bg=self.CARD_BG)
         left_frame.pack(side="left", padx=(0, 20))
         
-        try:
-            if book_data.get('image_path') and os.path.exists(book_data['image_path']):
-                img = Image.open(book_data['image_path'])
-                img = img.resize((160, 220), Image.Resampling.LANCZOS)
-                photo = ImageTk.PhotoImage(img)
-                img_label = tk.Label(left_frame, image=photo, bg=self.CARD_BG)
-                img_label.image = photo
-                img_label.pack()
-            else:
-                tk.Label(
-                    left_frame,
-                    text="📚\nNo Image",
-                    font=("Helvetica", 12),
-                    fg="#64748b",
-                    bg=self.CARD_BG,
-                    justify="center"
-                ).pack()
-        except Exception:
-            tk.Label(
-                left_frame,
-                text="📚\nNo Image",
-                font=("Helvetica", 12),
-                fg="#64748b",
-                bg=self.CARD_BG,
-                justify="center"
-            ).pack()
+        cover_label(left_frame, self.db.images, book_data.cover, LIST_SIZE, self.CARD_BG).pack()
         
         # Right side - Book details
         right_frame = tk.Frame(content_frame, bg=self.CARD_BG)
@@ -156,7 +161,7 @@ class UserBorrowingPage:
         # Book title
         tk.Label(
             right_frame,
-            text=book_data['name'],
+            text=book_data.name,
             font=("Helvetica", 18, "bold"),
             fg=self.TEXT_FG,
             bg=self.CARD_BG,
@@ -166,7 +171,7 @@ class UserBorrowingPage:
         # Author
         tk.Label(
             right_frame,
-            text=f"by {book_data['author']}",
+            text=f"by {book_data.author}",
             font=("Helvetica", 12),
             fg="#94a3b8",
             bg=self.CARD_BG,
@@ -174,7 +179,7 @@ class UserBorrowingPage:
         ).pack(fill="x", pady=(0, 15))
         
         # Status indicator
-        status = book_data['status']
+        status = book_data.status
         if status == 'returned':
             status_color = self.ACCENT_GREEN
             status_text = "✓ RETURNED"
@@ -210,8 +215,8 @@ class UserBorrowingPage:
             ).pack(fill="x")
             
             # Show return date if available
-            if pd.notna(book_data.get('return_date')) and book_data.get('return_date'):
-                return_date = datetime.fromisoformat(book_data['return_date'])
+            if book_data.return_date is not None:
+                return_date = book_data.return_date
                 tk.Label(
                     info_frame,
                     text=f"📅 Returned on: {return_date.strftime('%d %B %Y, %I:%M %p')}",
@@ -222,7 +227,7 @@ class UserBorrowingPage:
                 ).pack(fill="x", pady=(5, 0))
         else:
             # Issue date
-            issue_date = datetime.fromisoformat(book_data['issue_date'])
+            issue_date = book_data.issue_date
             tk.Label(
                 info_frame,
                 text=f"📅 Issue Date: {issue_date.strftime('%d %B %Y, %I:%M %p')}",
@@ -233,13 +238,12 @@ class UserBorrowingPage:
             ).pack(fill="x", pady=2)
             
             # Check if collected
-            is_collected = book_data.get('collected', False)
+            is_collected = book_data.collected
             
             if is_collected:
                 # Show collected status
-                collection_date = book_data.get('collection_date')
-                if pd.notna(collection_date) and collection_date:
-                    col_date = datetime.fromisoformat(collection_date)
+                col_date = book_data.collection_date
+                if col_date is not None:
                     tk.Label(
                         info_frame,
                         text=f"✅ Collected on: {col_date.strftime('%d %B %Y, %I:%M %p')}",
@@ -259,7 +263,7 @@ class UserBorrowingPage:
                     ).pack(fill="x", pady=2)
             else:
                 # Collection deadline
-                collection_deadline = datetime.fromisoformat(book_data['collection_deadline'])
+                collection_deadline = book_data.collection_deadline
                 tk.Label(
                     info_frame,
                     text=f"📍 Collect by: {collection_deadline.strftime('%d %B %Y')}",
@@ -270,14 +274,14 @@ class UserBorrowingPage:
                 ).pack(fill="x", pady=2)
             
             # Return deadline
-            return_deadline = datetime.fromisoformat(book_data['return_deadline'])
-            days_left = (return_deadline - datetime.now()).days
+            return_deadline = book_data.return_deadline
+            days_left = book_data.days_left
             
             deadline_color = "#ef4444" if days_left < 7 else self.ACCENT_GREEN
             
             tk.Label(
                 info_frame,
-                text=f"⏰ Return by: {return_deadline.strftime('%d %B %Y')} ({days_left} days left)",
+                text=f"⏰ Return by: {return_deadline.strftime('%d %B %Y')} ({book_data.due_text})",
                 font=("Helvetica", 11),
                 fg=deadline_color,
                 bg=self.CARD_BG,
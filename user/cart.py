@@ -1,7 +1,6 @@
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk
-import os
+from book_card import BookCard
 
 class UserCartPage:
     def __init__(self, parent_frame, main_app):
@@ -18,8 +17,32 @@ class UserCartPage:
         self.ACCENT_GREEN = "#43e97b"
         self.ACCENT_PURPLE = "#667eea"
         
+        self.mousewheel = None
+        # Book ids on display, to tell which catalogue edits concern this page
+        self.book_ids = set()
+        
+        # Keep the cart in step with changes made here and in other terminals
+        events = self.db.events
+        events.subscribe('cart_changed', self.on_cart_changed, owner=parent_frame)
+        events.subscribe('book_updated', self.on_book_updated, owner=parent_frame)
+        events.subscribe('data_reloaded', self.on_data_reloaded, owner=parent_frame)
+        
         self.show_cart()
     
+    # Hidden tabs ignore events: TabHost rebuilds them when shown again
+    
+    def on_cart_changed(self, user_email, book_id):
+        if user_email == self.current_user['email'] and self.parent_frame.winfo_manager():
+            self.display_cart_items()
+    
+    def on_book_updated(self, book_id):
+        if book_id in self.book_ids and self.parent_frame.winfo_manager():
+            self.display_cart_items()
+    
+    def on_data_reloaded(self, tables):
+        if self.parent_frame.winfo_manager():
+            self.display_cart_items()
+    
     def show_cart(self):
         # Clear parent frame
         for widget in self.parent_frame.winfo_children():
@@ -85,6 +108,7 @@ class UserCartPage:
         def _on_mousewheel(event):
             canvas.yview_scroll(int(-1*(event.delta/120)), "units")
         canvas.bind_all("<MouseWheel>", _on_mousewheel)
+        self.mousewheel = (canvas, _on_mousewheel)
         
         # Load and display cart items
         self.display_cart_items()
@@ -96,6 +120,7 @@ class UserCartPage:
         # Get user's cart items
         user_email = self.current_user['email']
         cart_items_df = self.db.get_user_cart(user_email)
+        self.book_ids = set(cart_items_df['id']) if len(cart_items_df) else set()
         
         if len(cart_items_df) == 0:
             self.cart_container.grid_rowconfigure(0, weight=1)
@@ -148,105 +173,16 @@ class UserCartPage:
             self.create_cart_card(cell, book)
     
     def create_cart_card(self, parent, book):
-        # Container with fixed height
-        card_container = tk.Frame(parent, bg=self.APP_BG, height=450)
-        card_container.pack(fill="both", expand=True)
-        card_container.pack_propagate(False)
-        
-        # Canvas for rounded card
-        card_canvas = tk.Canvas(card_container, bg=self.APP_BG, highlightthickness=0)
-        card_canvas.pack(fill="both", expand=True)
-        
-        # Store references
-        card_canvas.images = []
-        
-        def redraw_card(event=None):
-            canvas = card_canvas
-            width = canvas.winfo_width()
-            height = 450
-            canvas.delete("all")
-            
-            # Draw rounded card
-            card_id = self.round_rectangle(canvas, 5, 5, width - 10, height - 5, radius=20, fill=self.CARD_BG, outline="#334155")
-            
-            # Hover effects
-            def on_hover_enter(e):
-                canvas.itemconfig(card_id, outline=self.ACCENT_GREEN, width=2)
-            
-            def on_hover_leave(e):
-                canvas.itemconfig(card_id, outline="#334155", width=1)
-            
-            canvas.bind("<Enter>", on_hover_enter)
-            canvas.bind("<Leave>", on_hover_leave)
-            
-            # Image
-            img_y_pos = 135
-            try:
-                if book.get('image_path') and os.path.exists(book['image_path']):
-                    img = Image.open(book['image_path'])
-                    img = img.resize((220, 230), Image.Resampling.LANCZOS)
-                    
-                    photo = ImageTk.PhotoImage(img)
-                    canvas.images.append(photo)
-                    canvas.create_image(width / 2, img_y_pos, image=photo)
-                else:
-                    canvas.create_text(width / 2, img_y_pos, text="📚\nNo Image", font=("Helvetica", 16), fill="#64748b", justify="center")
-            except Exception:
-                canvas.create_text(width / 2, img_y_pos, text="📚\nNo Image", font=("Helvetica", 16), fill="#64748b", justify="center")
-            
-            # Book details
-            title_text = book['name'][:20] + "..." if len(book['name']) > 20 else book['name']
-            author_text = f"by {book['author'][:18]}..." if len(book['author']) > 18 else f"by {book['author']}"
-            
-            canvas.create_text(20, 280, text=title_text, anchor="nw", font=("Helvetica", 14, "bold"), fill=self.TEXT_FG)
-            canvas.create_text(20, 305, text=author_text, anchor="nw", font=("Helvetica", 11), fill="#94a3b8")
-            
-            # Remove button (centered)
-            btn_width = width - 40
-            btn_height = 38
-            btn_y = 360
-            
-            self.create_rounded_button(
-                canvas, x=20, y=btn_y, width=btn_width, height=btn_height, radius=10,
-                text="❌ Remove from Cart", text_color="white",
-                bg_color="#ef4444", hover_color="#dc2626",
-                command=lambda b=book: self.remove_from_cart(b)
-            )
-        
-        card_canvas.bind("<Configure>", redraw_card)
-        card_canvas.after(10, redraw_card)
-    
-    def round_rectangle(self, canvas, x1, y1, x2, y2, radius=25, **kwargs):
-        points = [
-            x1 + radius, y1, x2 - radius, y1,
-            x2, y1, x2, y1 + radius,
-            x2, y2 - radius, x2, y2,
-            x2 - radius, y2, x1 + radius, y2,
-            x1, y2, x1, y2 - radius,
-            x1, y1 + radius, x1, y1
-        ]
-        return canvas.create_polygon(points, **kwargs, smooth=True)
-    
-    def create_rounded_button(self, canvas, x, y, width, height, radius, text, text_color, bg_color, hover_color, command):
-        button_shape = self.round_rectangle(canvas, x, y, x + width, y + height, radius=radius, fill=bg_color, outline="")
-        button_text = canvas.create_text(x + width / 2, y + height / 2, text=text, fill=text_color, font=("Helvetica", 10, "bold"))
-        
-        button_tag = f"button_{button_shape}"
-        canvas.addtag_withtag(button_tag, button_shape)
-        canvas.addtag_withtag(button_tag, button_text)
-        
-        canvas.tag_bind(button_tag, "<Button-1>", lambda event: command())
-        
-        def on_enter(event):
-            canvas.itemconfig(button_shape, fill=hover_color)
-        
-        def on_leave(event):
-            canvas.itemconfig(button_shape, fill=bg_color)
-        
-        canvas.tag_bind(button_tag, "<Enter>", on_enter)
-        canvas.tag_bind(button_tag, "<Leave>", on_leave)
+        card = BookCard(
+            parent, self.main_app.covers, bg=self.APP_BG, card_bg=self.CARD_BG,
+            text_fg=self.TEXT_FG, hover_outline=self.ACCENT_GREEN, button_y=360
+        )
+        card.set_book(book)
+        card.set_button("remove", "❌ Remove from Cart", "#ef4444", "#dc2626",
+                        command=lambda b=book: self.remove_from_cart(b))
+        return card
     
     def remove_from_cart(self, book):
         user_email = self.current_user['email']
-        self.db.remove_from_cart(user_email, book['id'])
-        self.display_cart_items()
\ No newline at end of file
+        # The cart_changed event redraws the list
+        self.db.remove_from_cart(user_email, book['id'])
\ No newline at end of file
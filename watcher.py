@@ -0,0 +1,134 @@
+"""Change detection for a data directory shared by several terminals.
+
+On Linux an inotify watch (through ctypes, no extra packages) on data/
+and data/loans_archive/ wakes the watcher as soon as another terminal
+appends to the journal or swaps in a checkpoint file; elsewhere, or if
+inotify is unavailable, it polls. Either way it calls db.refresh(), which
+replays only what changed and publishes the matching change events, so
+open pages update within a fraction of a second.
+"""
+import os
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+import traceback
+
+
+# inotify(7) event masks
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+class Inotify:
+    """Minimal ctypes binding: watch directories and read the names of changed files"""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def watch(self, directory, mask=WATCH_MASK):
+        if self._add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), str(directory))
+
+    def read(self, timeout):
+        """Names of the files changed since the last read (waits up to timeout seconds).
+
+        Returns None if the kernel queue overflowed, i.e. anything may have changed.
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        names = set()
+        position = 0
+        while position + EVENT_HEADER.size <= len(data):
+            _wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, position)
+            position += EVENT_HEADER.size
+            if mask & IN_Q_OVERFLOW:
+                return None
+            names.add(data[position:position + length].rstrip(b"\0").decode(errors="replace"))
+            position += length
+        return names
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class DataWatcher(threading.Thread):
+    """Calls db.refresh() whenever another terminal changes the data directory, until stop()"""
+
+    def __init__(self, db, poll_interval=1.0, settle=0.02):
+        super().__init__(name="data-watcher", daemon=True)
+        self.db = db
+        self.poll_interval = poll_interval
+        self.settle = settle
+        self.mode = None
+        self._stop_event = threading.Event()
+        self._inotify = None
+        try:
+            inotify = Inotify()
+            try:
+                for directory in (db.data_dir, db.archive_dir):
+                    inotify.watch(directory)
+            except OSError:
+                inotify.close()
+                raise
+            self._inotify = inotify
+            self.mode = "inotify"
+        except (OSError, AttributeError):
+            # Not Linux, or out of inotify instances/watches
+            self.mode = "poll"
+
+    def run(self):
+        if self._inotify is not None:
+            self.db.set_watched(True)
+        try:
+            while not self._stop_event.is_set():
+                if self._inotify is None:
+                    self._stop_event.wait(self.poll_interval)
+                elif not self._changed(self._inotify.read(self.poll_interval)):
+                    # Timeouts fall through to a refresh as well; it is only a few stats
+                    # and covers an append that was still in flight at the last one
+                    continue
+                try:
+                    self.db.refresh()
+                except Exception:
+                    # Keep watching; the next change retries from the files
+                    traceback.print_exc()
+        finally:
+            self.db.set_watched(False)
+            if self._inotify is not None:
+                self._inotify.close()
+
+    def _changed(self, names):
+        """True when a refresh is due: a table or journal change, an overflow, or a quiet timeout"""
+        if names is None or not names:
+            return True
+        if any(name == "journal.log" or name.endswith(".csv") for name in names):
+            # Let the rest of a burst (a checkpoint swaps several files) land first
+            self._stop_event.wait(self.settle)
+            return True
+        return False
+
+    def stop(self):
+        self._stop_event.set()